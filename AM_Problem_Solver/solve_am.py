@@ -1,6 +1,14 @@
+import os
+import sys
 import numpy as np
 import matplotlib.pyplot as plt
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from DSP.analog import am_modulate
+from DSP.plotting import plot_decimated
+from DSP.spectrum import zoom_spectrum
+from DSP.tones import measure_tones
+
 # Parameters
 f1 = 500.0
 f2 = 500.0 * np.sqrt(2)
@@ -22,7 +30,7 @@ m_t = 0.2 * np.sin(w1 * t) + 0.5 * np.cos(w1 * t)
 
 # AM Signal
 # s(t) = (Ac + m(t)) cos(wc t)
-s_t = (Ac + m_t) * np.cos(wc * t)
+s_t = am_modulate(m_t, t, fc, Ac, ka=1/Ac)
 
 # Modulation Percentage
 # m(t) = 0.2 sin(w1 t) + 0.5 cos(w1 t)
@@ -34,13 +42,14 @@ mu = (max_m / Ac) * 100
 print(f"Modulation Percentage: {mu:.2f}%")
 
 # Plotting
+# Lines are min/max decimated to the axes width (DSP.plotting)
 
 # 1. Waveform
 plt.figure(figsize=(10, 6))
-plt.plot(t, s_t, 'b', label='AM Signal $s(t)$')
+plot_decimated(t, s_t, 'b', label='AM Signal $s(t)$')
 # Plot Envelope
-plt.plot(t, Ac + m_t, 'r--', linewidth=2, label='Upper Envelope $A_c + m(t)$')
-plt.plot(t, -(Ac + m_t), 'r--', linewidth=2)
+plot_decimated(t, Ac + m_t, 'r--', linewidth=2, label='Upper Envelope $A_c + m(t)$')
+plot_decimated(t, -(Ac + m_t), 'r--', linewidth=2)
 plt.title(f'AM Waveform (Modulation Index $\mu \\approx {mu:.2f}\%$)')
 plt.xlabel('Time (s)')
 plt.ylabel('Amplitude (V)')
@@ -54,21 +63,16 @@ plt.savefig('AM_Waveform.png')
 T_spec = 1.0 
 t_spec = np.arange(0, T_spec, 1/fs)
 m_t_spec = 0.2 * np.sin(w1 * t_spec) + 0.5 * np.cos(w1 * t_spec)
-s_t_spec = (Ac + m_t_spec) * np.cos(wc * t_spec)
-
-N = len(s_t_spec)
-yf = np.fft.fft(s_t_spec)
-xf = np.fft.fftfreq(N, 1/fs)
+s_t_spec = am_modulate(m_t_spec, t_spec, fc, Ac, ka=1/Ac)
 
-# Shift for plotting
-yf_shifted = np.fft.fftshift(yf)
-xf_shifted = np.fft.fftshift(xf)
-magnitude = np.abs(yf_shifted) / N
+# Only the band around the carrier is needed: zoom spectrum (same |FFT|/N
+# scaling) on the 1 Hz FFT bins within +/-2 kHz of the carrier, taken from
+# one real FFT instead of a 200k-point complex FFT that is then masked
+xf, yf = zoom_spectrum(s_t_spec, fs, round(fc) - 2000, round(fc) + 2000, 4001)
+magnitude = np.abs(yf)
 
 plt.figure(figsize=(12, 6))
-# Only plot positive frequencies around carrier
-mask = (xf_shifted >= fc - 2000) & (xf_shifted <= fc + 2000)
-plt.plot(xf_shifted[mask], magnitude[mask], 'k')
+plot_decimated(xf, magnitude, 'k')
 plt.title('Spectrum of AM Signal (Zoomed around Carrier)')
 plt.xlabel('Frequency (Hz)')
 plt.ylabel('Magnitude (V)')
@@ -81,8 +85,15 @@ plt.text(fc, np.max(magnitude), f'$f_c={fc:.1f}$', ha='center', va='bottom')
 # Sidebands (Only f1 exists now)
 # Combined amplitude of m(t) is R = sqrt(0.2^2 + 0.5^2) = 0.5385
 # Sideband amplitude = R/2 = 0.269
-plt.annotate(f'$f_c+f_1$', xy=(fc+f1, 0.269), xytext=(fc+f1, 0.4), arrowprops=dict(arrowstyle='->'))
-plt.annotate(f'$f_c-f_1$', xy=(fc-f1, 0.269), xytext=(fc-f1, 0.4), arrowprops=dict(arrowstyle='->'))
+# Measured at the exact line frequencies with the tone bank (no bin picking)
+line_freqs = [fc - f1, fc, fc + f1]
+lsb_amp, carrier_amp, usb_amp = np.abs(measure_tones(s_t_spec, fs, line_freqs))
+print(f"Measured carrier: {carrier_amp:.4f} V (theory {Ac:.4f} V)")
+print(f"Measured sidebands: LSB {lsb_amp:.4f} V, USB {usb_amp:.4f} V (theory {max_m/2:.4f} V)")
+
+# The plot shows |FFT|/N (two-sided), so each line peaks at half its amplitude
+plt.annotate(f'$f_c+f_1$ ({usb_amp:.3f} V)', xy=(fc+f1, usb_amp/2), xytext=(fc+f1, 0.4), arrowprops=dict(arrowstyle='->'))
+plt.annotate(f'$f_c-f_1$ ({lsb_amp:.3f} V)', xy=(fc-f1, lsb_amp/2), xytext=(fc-f1, 0.4), arrowprops=dict(arrowstyle='->'))
 
 plt.tight_layout()
 plt.savefig('AM_Spectrum.png')
@@ -0,0 +1,6 @@
+# Shared signal-processing helpers used by the simulation scripts.
+#
+# The scripts are run from their own folders, so they put the repository
+# root on sys.path before importing, e.g.
+#   sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+#   from DSP.spectrum import zoom_spectrum
@@ -0,0 +1,223 @@
+# Analog Modulation Kernels
+# AM / DSB-SC / SSB and FM / NBFM waveform generation, and the coherent and
+# FM (phase-difference) demodulators. The demodulators work along the last
+# axis, so a 2-D batch (trials x samples) is demodulated in one call.
+# iter_inst_freq / estimate_inst_freq measure the instantaneous frequency of
+# a long real record block by block (FIR Hilbert transformer).
+#
+# Only NumPy is imported here. scipy is loaded the first time a function
+# needs it (the Hilbert transform in ssb_modulate, the low-pass filter in
+# coherent_demodulate, the FIR convolution in iter_inst_freq), so batch
+# jobs that only generate waveforms skip its import cost.
+#
+# Outputs follow DSP.precision (float64 by default, or float32); carrier
+# phases are always evaluated in float64.
+
+import numpy as np
+
+from DSP.filters import butter_lowpass_filter
+from DSP.precision import as_real, real_dtype
+from DSP.profiling import profiled
+
+
+def _rounded(x):
+    # float64 result -> policy dtype (no copy in float64 mode)
+    return x.astype(real_dtype(), copy=False)
+
+
+def _carrier(fc, t, fn=np.cos):
+    t = np.asarray(t, dtype=np.float64)
+    return _rounded(fn(2 * np.pi * fc * t))
+
+
+@profiled
+def am_modulate(m_t, t, fc, Ac=1, ka=1):
+    """
+    Conventional AM: Ac * (1 + ka*m(t)) * cos(2*pi*fc*t).
+    Modulation index mu = ka * max|m(t)|; (Ac + m(t)) cos(...) is ka = 1/Ac.
+    """
+    return Ac * (1 + ka * as_real(m_t)) * _carrier(fc, t)
+
+
+@profiled
+def dsb_sc_modulate(m_t, t, fc, Ac=1):
+    """
+    DSB-SC: Ac * m(t) * cos(2*pi*fc*t).
+    """
+    return Ac * as_real(m_t) * _carrier(fc, t)
+
+
+@profiled
+def ssb_modulate(m_t, t, fc, Ac=1, sideband='upper', m_hat=None):
+    """
+    Phase-shift (Hartley) SSB:
+        USSB = 0.5 * Ac * (m cos(wc t) - m_hat sin(wc t))
+        LSSB = 0.5 * Ac * (m cos(wc t) + m_hat sin(wc t))
+    m_hat (Hilbert transform of m) is computed if not given.
+    """
+    m_t = as_real(m_t)
+    if m_hat is None:
+        from scipy.signal import hilbert
+        m_hat = np.imag(hilbert(m_t))
+    c_i = Ac * _carrier(fc, t)
+    c_q = Ac * _carrier(fc, t, np.sin)
+    if sideband == 'upper':
+        return 0.5 * (m_t * c_i - m_hat * c_q)
+    if sideband == 'lower':
+        return 0.5 * (m_t * c_i + m_hat * c_q)
+    raise ValueError(f'Unknown sideband: {sideband}')
+
+
+@profiled
+def fm_tone(t, fc, fm, beta, Ac=1):
+    """
+    Tone-modulated FM (message cos(2*pi*fm*t), peak deviation beta*fm):
+        Ac * cos(2*pi*fc*t + beta * sin(2*pi*fm*t))
+    """
+    t = np.asarray(t, dtype=np.float64)
+    return Ac * _rounded(np.cos(2 * np.pi * fc * t + beta * np.sin(2 * np.pi * fm * t)))
+
+
+@profiled
+def nbfm_approx(t, fc, fm, beta, Ac=1):
+    """
+    Narrowband approximation of fm_tone (valid for beta << 1):
+        Ac cos(wc t) - Ac * beta * sin(wm t) * sin(wc t)
+    """
+    t = np.asarray(t, dtype=np.float64)
+    return _rounded(Ac * np.cos(2 * np.pi * fc * t)
+                    - Ac * beta * np.sin(2 * np.pi * fm * t) * np.sin(2 * np.pi * fc * t))
+
+
+@profiled
+def fm_modulate(m_t, fs, fc, kf, Ac=1):
+    """
+    FM of an arbitrary sampled message (VCO with sensitivity kf Hz/V):
+        Ac * cos(2*pi*fc*t + 2*pi*kf * integral of m(t) dt)
+    The integral is the running trapezoidal sum, starting at 0 for t = 0.
+    """
+    m_t = np.asarray(m_t, dtype=float)
+    integral = np.concatenate(([0.0], np.cumsum(m_t[1:] + m_t[:-1]) / (2 * fs)))
+    t = np.arange(len(m_t)) / fs
+    return Ac * _rounded(np.cos(2 * np.pi * fc * t + 2 * np.pi * kf * integral))
+
+
+def analytic_signal(x):
+    """
+    x + j*H{x} along the last axis (FFT method, same result as
+    scipy.signal.hilbert).
+    """
+    x = np.asarray(x)
+    N = x.shape[-1]
+    h = np.zeros(N)
+    h[0] = 1
+    if N % 2 == 0:
+        h[N // 2] = 1
+        h[1:N // 2] = 2
+    else:
+        h[1:(N + 1) // 2] = 2
+    return np.fft.ifft(np.fft.fft(x, axis=-1) * h, axis=-1)
+
+
+@profiled
+def coherent_demodulate(r, t, fc, fs, cutoff, order=5, phase=0.0):
+    """
+    Product detector: low-pass (zero-phase Butterworth) of
+    r(t) * cos(2*pi*fc*t + phase). A DSB-SC input Ac*m(t)*cos(wc t) gives
+    Ac*m(t)/2, an SSB input 0.5*Ac*(...) gives Ac*m(t)/4.
+    """
+    lo = np.cos(2 * np.pi * fc * np.asarray(t, dtype=np.float64) + phase)
+    return butter_lowpass_filter(r * _rounded(lo), cutoff, fs, order=order)
+
+
+@profiled
+def fm_discriminate(r, fs, fc, kf):
+    """
+    FM demodulator: instantaneous frequency from the phase step of the
+    analytic signal, f[n] = angle(z[n] conj(z[n-1])) * fs / (2 pi), mapped
+    back to the message, (f - fc) / kf. The first output repeats the second.
+    """
+    z = analytic_signal(r)
+    dphi = np.angle(z[..., 1:] * np.conj(z[..., :-1]))
+    f = dphi * (fs / (2 * np.pi))
+    f = np.concatenate((f[..., :1], f), axis=-1)
+    return _rounded((f - fc) / kf)
+
+
+def hilbert_fir(numtaps=255, kaiser_beta=8.0):
+    """
+    Kaiser-windowed FIR Hilbert transformer (odd length, type III):
+        h[n] = 2 / (pi n) for odd n, 0 for even n
+    """
+    n = np.arange(numtaps) - (numtaps - 1) // 2
+    h = np.zeros(numtaps)
+    odd = n % 2 == 1
+    h[odd] = 2 / (np.pi * n[odd])
+    return h * np.kaiser(numtaps, kaiser_beta)
+
+
+def iter_inst_freq(x, fs, block_size=65536, numtaps=255, smooth=1, decimate=1):
+    """
+    Streaming instantaneous-frequency estimator for a real signal.
+    Yields f_inst (Hz) one block at a time, so `x` can be a long capture
+    (e.g. a np.memmap) that never has to sit in memory as a complex array.
+
+    The analytic signal z = x + j*H{x} uses an FIR Hilbert transformer.
+    Each block is read with (numtaps-1)/2 extra samples on both sides, so
+    the block-wise result is identical to filtering the whole record.
+    The frequency is the phase difference of consecutive analytic samples,
+        f[n] = angle(z[n] * conj(z[n-1])) * fs / (2 pi)
+    which needs no phase unwrapping. `smooth` applies a moving average of
+    that length ((smooth-1)/2 samples of delay) and `decimate` keeps every
+    decimate-th output sample. All state is carried across blocks.
+    """
+    from scipy.signal import oaconvolve
+    N = len(x)
+    h = hilbert_fir(numtaps)
+    half = (numtaps - 1) // 2
+    z_prev = None
+    tail = np.zeros(0)        # last smooth-1 samples for the moving average
+    phase = 0                 # decimation phase carried between blocks
+
+    for start in range(0, N, block_size):
+        stop = min(start + block_size, N)
+        lo = max(start - half, 0)
+        hi = min(stop + half, N)
+        # Zero-pad only at the true ends of the record
+        seg = np.concatenate((np.zeros(half - (start - lo)),
+                              np.asarray(x[lo:hi], dtype=float),
+                              np.zeros(half - (hi - stop))))
+        z = seg[half:-half] + 1j * oaconvolve(seg, h, mode='valid')
+
+        if z_prev is None:
+            z_prev = z[0]
+        dphi = np.angle(z * np.conj(np.concatenate(([z_prev], z[:-1]))))
+        f = dphi * (fs / (2 * np.pi))
+        if start == 0 and len(f) > 1:
+            f[0] = f[1]
+        z_prev = z[-1]
+
+        if smooth > 1:
+            ext = np.concatenate((tail, f))
+            tail = ext[-(smooth - 1):]
+            cs = np.cumsum(np.concatenate(([0.0], ext)))
+            f = (cs[smooth:] - cs[:-smooth]) / smooth
+            if start == 0:
+                # Not enough history yet: running mean over what is available
+                head = cs[1:smooth] / np.arange(1, smooth)
+                f = np.concatenate((head[:len(ext)], f))
+
+        if decimate > 1:
+            out = f[phase::decimate]
+            phase = (phase - len(f)) % decimate
+            f = out
+
+        yield f
+
+
+@profiled
+def estimate_inst_freq(x, fs, **kwargs):
+    """
+    Instantaneous frequency (Hz) of a real signal; see iter_inst_freq.
+    """
+    return np.concatenate(list(iter_inst_freq(x, fs, **kwargs)))
@@ -0,0 +1,406 @@
+# Audio Sources and Sinks
+# Recordings as block streams of normalized floats, read from memory-mapped
+# WAV or raw PCM files, and the matching writers:
+#
+#   src = open_source('speech.wav')                     # WavSource, nothing read yet
+#   src.fs, src.channels, src.n_frames, src.duration
+#   for block in src.blocks(4096, fs_out=8000):         # mono floats in [-1, 1), resampled
+#       ...
+#   raw = open_source('capture.s16', fs=48000, dtype='<i2', channels=2)
+#
+#   with WavSink('out.wav', 8000, bits=16, dither='tpdf') as sink:
+#       sink.write(block)                               # floats -> int16, header fixed on close
+#
+# The sample data is an np.memmap of the file, so a block costs only the
+# pages it touches. Only that block is converted to float: a long
+# recording is never loaded whole. WAV headers are parsed here (PCM 8/16/24/32
+# bit, IEEE float 32/64, WAVE_FORMAT_EXTENSIBLE); 24-bit samples are mapped
+# as bytes and assembled per block. Integers are normalized by 2^(bits-1)
+# (unsigned 8-bit around 128). Sinks round, clip and optionally dither back.
+#
+# StreamResampler is a rational polyphase resampler (scipy.signal.upfirdn
+# with a Kaiser-windowed sinc) that keeps its input history between
+# blocks. The output of block after block equals that of the whole signal,
+# and the filter delay is removed, so output n sits at time n / fs_out.
+# `python -m DSP.audio` streams a generated recording and reports Msample/s
+# and the peak traced memory against the file size.
+
+import os
+import struct
+import sys
+import time
+from fractions import Fraction
+
+import numpy as np
+
+from DSP.precision import real_dtype
+from DSP.profiling import profiled
+
+WAVE_FORMAT_PCM = 0x0001
+WAVE_FORMAT_IEEE_FLOAT = 0x0003
+WAVE_FORMAT_EXTENSIBLE = 0xFFFE
+
+
+def read_wav_header(path):
+    """
+    fs, channels, bits, kind ('int' / 'float'), data offset (bytes) and
+    n_frames of a RIFF/WAVE file, from its fmt and data chunks.
+    """
+    with open(path, 'rb') as f:
+        riff, _, wave = struct.unpack('<4sI4s', f.read(12))
+        if riff != b'RIFF' or wave != b'WAVE':
+            raise ValueError(f'{path}: not a RIFF/WAVE file')
+        fmt = None
+        while True:
+            head = f.read(8)
+            if len(head) < 8:
+                raise ValueError(f'{path}: no data chunk')
+            chunk, size = struct.unpack('<4sI', head)
+            if chunk == b'fmt ':
+                body = f.read(size)
+                tag, channels, fs, _, block_align, bits = struct.unpack('<HHIIHH', body[:16])
+                if tag == WAVE_FORMAT_EXTENSIBLE:
+                    tag = struct.unpack('<H', body[24:26])[0]     # first 2 bytes of the sub-format GUID
+                if tag not in (WAVE_FORMAT_PCM, WAVE_FORMAT_IEEE_FLOAT):
+                    raise ValueError(f'{path}: unsupported WAV format tag {tag:#06x}')
+                fmt = {'fs': fs, 'channels': channels, 'bits': bits, 'block_align': block_align,
+                       'kind': 'float' if tag == WAVE_FORMAT_IEEE_FLOAT else 'int'}
+                f.seek(size & 1, 1)
+            elif chunk == b'data':
+                if fmt is None:
+                    raise ValueError(f'{path}: data chunk before fmt chunk')
+                offset = f.tell()
+                # Streams whose writer never fixed the size: up to the end of the file
+                available = os.path.getsize(path) - offset
+                size = available if size in (0, 0xFFFFFFFF) else min(size, available)
+                return dict(fmt, offset=offset, n_frames=size // fmt['block_align'])
+            else:
+                f.seek(size + (size & 1), 1)
+
+
+def _sample_dtype(kind, bits):
+    if kind == 'float':
+        return np.dtype({32: '<f4', 64: '<f8'}[bits])
+    return np.dtype({8: 'u1', 16: '<i2', 24: 'u1', 32: '<i4'}[bits])
+
+
+def to_float(raw, kind, bits):
+    """
+    Integer or float samples -> floats in [-1, 1) (real_dtype()). 24-bit
+    input is a (..., 3) byte array, little-endian.
+    """
+    if kind == 'float':
+        return np.asarray(raw).astype(real_dtype())
+    if bits == 24:
+        b = np.asarray(raw).astype(np.int32)
+        v = b[..., 0] | (b[..., 1] << 8) | (b[..., 2] << 16)
+        raw = v - ((v & 0x800000) << 1)                       # sign-extend
+    scale = 2.0**(1 - bits)
+    if bits == 8:
+        return ((np.asarray(raw, dtype=np.int16) - 128) * scale).astype(real_dtype())
+    return (np.asarray(raw) * scale).astype(real_dtype())
+
+
+def from_float(x, kind, bits, dither=None, rng=None):
+    """
+    Floats in [-1, 1) -> samples of the given format: rounded (after
+    optional 'rpdf' / 'tpdf' dither, DSP.noiseshape) and clipped. 24-bit
+    output is a (..., 3) byte array.
+    """
+    x = np.asarray(x, dtype=float)
+    if kind == 'float':
+        return x.astype(_sample_dtype(kind, bits))
+    full = 2.0**(bits - 1)
+    v = x * full
+    if dither:
+        from DSP.noiseshape import dither as make_dither
+        v = v + make_dither(v.shape, dither, rng)
+    v = np.clip(np.round(v), -full, full - 1).astype(np.int32)
+    if bits == 8:
+        return (v + 128).astype(np.uint8)
+    if bits == 24:
+        return np.stack([(v >> s) & 0xFF for s in (0, 8, 16)], axis=-1).astype(np.uint8)
+    return v.astype(_sample_dtype(kind, bits))
+
+
+class StreamResampler:
+    """
+    Resampling by fs_out / fs_in (approximated by a fraction with a
+    denominator up to max_denominator) of a stream of blocks along axis 0.
+    The Kaiser-windowed sinc low-pass has half_width zero crossings on each
+    side, cut off at the lower of the two Nyquist frequencies.
+    """
+
+    def __init__(self, fs_in, fs_out, half_width=16, beta=8.0, max_denominator=1000):
+        from scipy.signal import firwin
+        ratio = Fraction(fs_out / fs_in).limit_denominator(max_denominator)
+        self.up, self.down = ratio.numerator, ratio.denominator
+        self.fs_out = fs_in * self.up / self.down
+        q = max(self.up, self.down)
+        taps = firwin(2 * half_width * q + 1, 1 / q, window=('kaiser', beta)) * self.up
+        # Output k uses inputs n with 0 <= k down - n up < len(taps). Leading
+        # zeros make the delay (half_width * q at the up-sampled rate) a whole
+        # number of output samples, which are skipped
+        pad = -half_width * q % self.down
+        self.taps = np.concatenate((np.zeros(pad), taps))
+        self._skip = (half_width * q + pad) // self.down
+        self._buf = None                # inputs from global index self._start on
+        self._start = 0                 # a multiple of down
+        self._n_in = 0
+        self._k = 0                     # next output index (before removing the delay)
+
+    def _outputs(self, k_end):
+        # Outputs k .. k_end - 1 from the buffer, then drop inputs no longer needed
+        from scipy.signal import upfirdn
+        if k_end <= self._k:
+            return self._buf[:0]
+        j0 = self._k - self._start * self.up // self.down
+        y = upfirdn(self.taps, self._buf, self.up, self.down, axis=0)[j0:j0 + k_end - self._k]
+        first = max(0, self._skip - self._k)
+        self._k = k_end
+        n_min = max(0, -(-(k_end * self.down - len(self.taps) + 1) // self.up))
+        start = n_min // self.down * self.down
+        self._buf = self._buf[start - self._start:]
+        self._start = start
+        return y[first:]
+
+    @profiled
+    def process(self, x):
+        x = np.asarray(x, dtype=float)
+        self._buf = x if self._buf is None else np.concatenate((self._buf, x))
+        self._n_in += len(x)
+        return self._outputs((self._n_in * self.up - 1) // self.down + 1)
+
+    def flush(self):
+        """
+        The remaining outputs (zeros after the last input), so that the
+        whole stream gives ceil(n_in * up / down) outputs.
+        """
+        if self._buf is None:
+            return np.zeros(0)
+        target = self._skip - (-self._n_in * self.up // self.down)
+        pad = max(0, -(-target * self.down // self.up) - self._n_in)
+        self._buf = np.concatenate((self._buf, np.zeros((pad,) + self._buf.shape[1:])))
+        self._n_in += pad
+        return self._outputs(target)
+
+
+class PCMSource:
+    """
+    A memory-mapped sample array (n_frames, channels) with its format;
+    WavSource and RawSource fill it in.
+    """
+
+    def __init__(self, data, fs, kind, bits):
+        self._data = data
+        self.fs = fs
+        self.kind = kind
+        self.bits = bits
+        self.n_frames = data.shape[0]
+        self.channels = data.shape[1]
+        self.duration = self.n_frames / fs
+
+    def read(self, start=0, stop=None, mono=True):
+        """
+        Frames start .. stop as floats: (frames,) mixed down to mono, or
+        (frames, channels).
+        """
+        x = to_float(self._data[start:stop], self.kind, self.bits)
+        return x.mean(axis=1, dtype=x.dtype) if mono else x
+
+    def blocks(self, block=4096, fs_out=None, start=0, stop=None, mono=True):
+        """
+        Consecutive blocks of `block` frames (the last one shorter), resampled
+        to fs_out when given (blocks of about block * fs_out / fs frames).
+        """
+        stop = self.n_frames if stop is None else min(stop, self.n_frames)
+        resampler = StreamResampler(self.fs, fs_out) if fs_out and fs_out != self.fs else None
+        for i in range(start, stop, block):
+            x = self.read(i, min(i + block, stop), mono)
+            yield x if resampler is None else resampler.process(x).astype(real_dtype())
+        if resampler is not None:
+            yield resampler.flush().astype(real_dtype())
+
+    def __iter__(self):
+        return self.blocks()
+
+    def close(self):
+        self._data = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class WavSource(PCMSource):
+    def __init__(self, path):
+        info = read_wav_header(path)
+        shape = (info['n_frames'], info['channels']) + ((3,) if info['bits'] == 24 else ())
+        data = np.memmap(path, dtype=_sample_dtype(info['kind'], info['bits']), mode='r',
+                         offset=info['offset'], shape=shape)
+        super().__init__(data, info['fs'], info['kind'], info['bits'])
+        self.path = path
+
+
+class RawSource(PCMSource):
+    """
+    Headerless interleaved samples: dtype '<i2', 'u1', '<i4', '<f4', ...
+    after `offset` header bytes.
+    """
+
+    def __init__(self, path, fs, dtype='<i2', channels=1, offset=0):
+        dtype = np.dtype(dtype)
+        n_frames = (os.path.getsize(path) - offset) // (dtype.itemsize * channels)
+        data = np.memmap(path, dtype=dtype, mode='r', offset=offset, shape=(n_frames, channels))
+        kind = 'float' if dtype.kind == 'f' else 'int'
+        super().__init__(data, fs, kind, dtype.itemsize * 8)
+        self.path = path
+
+
+def open_source(path, **kwargs):
+    """
+    WavSource for .wav files, RawSource(path, **kwargs) otherwise (fs
+    required).
+    """
+    if os.path.splitext(path)[1].lower() in ('.wav', '.wave'):
+        return WavSource(path)
+    return RawSource(path, **kwargs)
+
+
+class RawSink:
+    """
+    Appends blocks of floats to a headerless file as `dtype` samples.
+    """
+
+    def __init__(self, path, dtype='<i2', dither=None, rng=None):
+        dtype = np.dtype(dtype)
+        self.kind = 'float' if dtype.kind == 'f' else 'int'
+        self.bits = dtype.itemsize * 8
+        self.dither = dither
+        self.rng = np.random.default_rng() if rng is None and dither else rng
+        self.frames = 0
+        self._file = open(path, 'wb')
+        self.path = path
+
+    def write(self, x):
+        x = np.asarray(x)
+        self._file.write(from_float(x, self.kind, self.bits, self.dither, self.rng).tobytes())
+        self.frames += len(x)
+
+    def close(self):
+        if not self._file.closed:
+            self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class WavSink(RawSink):
+    """
+    WAV writer: bits 8 / 16 / 24 / 32 integer PCM, or is_float=True for
+    IEEE float 32 / 64. The RIFF and data sizes are filled in on close (an
+    odd-sized data chunk gets a pad byte, counted in the RIFF size).
+    """
+
+    def __init__(self, path, fs, channels=1, bits=16, is_float=False, dither=None, rng=None):
+        self.fs = fs
+        self.channels = channels
+        self.kind = 'float' if is_float else 'int'
+        self.bits = bits
+        self.dither = dither
+        self.rng = np.random.default_rng() if rng is None and dither else rng
+        self.frames = 0
+        self.path = path
+        self._file = open(path, 'wb')
+        self._write_header()
+
+    def _write_header(self):
+        block_align = self.channels * self.bits // 8
+        data_bytes = self.frames * block_align
+        tag = WAVE_FORMAT_IEEE_FLOAT if self.kind == 'float' else WAVE_FORMAT_PCM
+        # The RIFF size counts the pad byte of an odd data chunk, the data size does not
+        riff_bytes = 36 + data_bytes + data_bytes % 2
+        self._file.write(struct.pack('<4sI4s4sIHHIIHH4sI', b'RIFF', riff_bytes, b'WAVE',
+                                     b'fmt ', 16, tag, self.channels, int(self.fs),
+                                     int(self.fs) * block_align, block_align, self.bits,
+                                     b'data', data_bytes))
+
+    def write(self, x):
+        x = np.asarray(x)
+        if x.ndim == 1 and self.channels > 1:
+            raise ValueError(f'Expected (frames, {self.channels}) blocks')
+        super().write(x)
+
+    def close(self):
+        if self._file.closed:
+            return
+        if self.frames * self.channels * self.bits // 8 % 2:
+            self._file.write(b'\0')                            # chunks are word-aligned
+        self._file.seek(0)
+        self._write_header()
+        self._file.close()
+
+
+def benchmark_audio(minutes=2.0, fs=44100, fs_out=48000, block=65536, directory=None):
+    """
+    Writes a stereo 16-bit WAV of `minutes` (a sweep plus noise) block by
+    block, then streams it back mono and resampled to fs_out. Reports
+    Msample/s of each pass and the peak traced memory of the read pass,
+    and checks the first seconds against a one-shot resample_poly with the
+    same filter.
+    """
+    import tempfile
+    from scipy.signal import resample_poly
+    from DSP.memtrace import MemoryTrace
+    rng = np.random.default_rng(0)
+    n = int(minutes * 60 * fs)
+    directory = tempfile.mkdtemp() if directory is None else directory
+    path = os.path.join(directory, 'benchmark.wav')
+
+    t0 = time.perf_counter()
+    with WavSink(path, fs, channels=2, bits=16, dither='tpdf', rng=rng) as sink:
+        for i in range(0, n, block):
+            t = np.arange(i, min(i + block, n)) / fs
+            tone = 0.5 * np.sin(2 * np.pi * (200 + 20 * t) * t)
+            sink.write(np.stack((tone, tone + 0.01 * rng.standard_normal(len(t))), axis=1))
+    write_s = time.perf_counter() - t0
+
+    src = open_source(path)
+    mem = MemoryTrace()
+    with mem:
+        with mem.stage('stream'):
+            t0 = time.perf_counter()
+            head, count = [], 0
+            for y in src.blocks(block, fs_out=fs_out):
+                if count < 5 * fs_out:
+                    head.append(y)
+                count += len(y)
+            read_s = time.perf_counter() - t0
+    resampler = StreamResampler(fs, fs_out)
+    ref = resample_poly(src.read(0, 10 * fs), resampler.up, resampler.down,
+                        window=resampler.taps[resampler.taps != 0] / resampler.up)
+    head = np.concatenate(head)
+    n_check = min(len(head), 4 * fs_out)
+    max_error = float(np.max(np.abs(head[:n_check] - ref[:n_check])))
+    size = os.path.getsize(path)
+    src.close()
+    os.remove(path)
+
+    print(f"{minutes:g} min stereo 16-bit at {fs} Hz ({size / 1e6:.1f} MB), blocks of {block}")
+    print(f"  write {n / write_s / 1e6:8.2f} Msample/s (frames, TPDF dither)")
+    print(f"  read  {n / read_s / 1e6:8.2f} Msample/s (mono, resampled to {fs_out} Hz, "
+          f"{count} samples)")
+    print(f"  peak traced memory of the read pass {mem.stages[0]['peak_bytes'] / 1e6:.1f} MB "
+          f"({mem.stages[0]['peak_bytes'] / size:.1%} of the file)")
+    print(f"  streamed vs one-shot resample_poly (same filter), first 4 s: max |error| {max_error:.1e}")
+    return {'write': n / write_s, 'read': n / read_s, 'peak_bytes': mem.stages[0]['peak_bytes'],
+            'file_bytes': size, 'max_error': max_error}
+
+
+if __name__ == '__main__':
+    benchmark_audio(float(sys.argv[1]) if len(sys.argv) > 1 else 2.0)
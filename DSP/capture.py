@@ -0,0 +1,402 @@
+# Signal Captures on Disk
+# Real or complex sample streams saved as a raw binary file plus a JSON
+# metadata sidecar, following the SigMF layout (name.sigmf-data +
+# name.sigmf-meta), so a long modulated signal is generated once and then
+# analyzed any number of times:
+#
+#   write_capture('lssb', s, fs=4e6, fc=0, description='LSSB, fc = 1 MHz')
+#   with CaptureWriter('wbfm', fs=1e6, datatype='ci16_le', scale=1.0) as w:
+#       for beta, block in ...:
+#           w.annotate(w.n_samples, len(block), label=f'beta={beta}')
+#           w.write(block)
+#
+#   cap = Capture('lssb')                      # nothing read yet
+#   cap.fs, cap.fc, cap.n_samples, cap.duration, cap.annotations
+#   x = cap.time_slice(0.5e-3, 1.5e-3)        # view of the file (float types)
+#   t = cap.times(0.5e-3, 1.5e-3)
+#   for seg in cap.annotated('beta=5'): ...
+#
+#   cap = cached_capture('lssb_2s', make_lssb, fs=4e6, duration=2.0)
+#   cap = cached_capture('lssb_ci16', make_lssb, fs=4e6, datatype='ci16_le', scale=100.0,
+#                        duration=2.0)
+#
+# Datatypes are SigMF's: r/c (real / complex), f32 / f64 / i8 / i16 / i32,
+# _le / _be (e.g. 'cf32_le', 'ci16_le', 'rf32_le'). Complex samples are
+# interleaved I, Q. Float captures are an np.memmap of the data file, and
+# slices of them are views (no copy, only the pages touched are read).
+# Integer captures are mapped the same way, and only the samples that a
+# slice or index selects are converted to real_dtype() / complex_dtype():
+# sample = code / (2^(bits-1) - 1) * scale, with the scale stored in the
+# metadata ('ee357:scale'; full scale is 1.0 unless given, write_capture
+# uses the peak). Annotations carry
+# core:sample_start / core:sample_count and optional core:label,
+# core:comment and core:freq_lower_edge / core:freq_upper_edge.
+# `python -m DSP.capture` writes a 1 MHz LSSB capture and compares
+# regenerating a slice of it with reading it back.
+
+import json
+import os
+import re
+import sys
+import time
+
+import numpy as np
+
+from DSP.precision import complex_dtype, real_dtype
+
+SIGMF_VERSION = '1.0.0'
+EXTENSION = 'ee357'
+DATA_SUFFIX, META_SUFFIX = '.sigmf-data', '.sigmf-meta'
+
+
+def _paths(path):
+    # 'name', 'name.sigmf-data', 'name.sigmf-meta' -> (data, meta)
+    base = str(path)
+    for suffix in (DATA_SUFFIX, META_SUFFIX, '.sigmf'):
+        if base.endswith(suffix):
+            base = base[:-len(suffix)]
+            break
+    return base + DATA_SUFFIX, base + META_SUFFIX
+
+
+def parse_datatype(datatype):
+    """
+    'cf32_le' -> (is_complex, component dtype). Integer types are signed;
+    8-bit types take no byte order.
+    """
+    match = re.fullmatch(r'([rc])([fi])(8|16|32|64)(?:_(le|be))?', datatype)
+    if not match:
+        raise ValueError(f'Unsupported datatype {datatype!r}')
+    kind, number, bits, order = match.groups()
+    if (number, bits) in (('f', '8'), ('f', '16'), ('i', '64')) or (bits != '8') != bool(order):
+        raise ValueError(f'Unsupported datatype {datatype!r}')
+    dtype = np.dtype(('<' if order != 'be' else '>') + number + str(int(bits) // 8))
+    return kind == 'c', dtype
+
+
+def _full_scale(dtype):
+    return float(2**(8 * dtype.itemsize - 1) - 1)
+
+
+class CaptureWriter:
+    """
+    Appends blocks to name.sigmf-data; the metadata (with the annotations
+    and capture segments added along the way) is written on close. Integer
+    datatypes map +/-scale to the full code range (rounded, clipped).
+    """
+
+    def __init__(self, path, fs, datatype='cf32_le', fc=None, scale=None, description=None,
+                 **extensions):
+        self.data_path, self.meta_path = _paths(path)
+        self.fs = fs
+        self.datatype = datatype
+        self.is_complex, self._dtype = parse_datatype(datatype)
+        self.scale = 1.0 if scale is None else float(scale)
+        self.n_samples = 0
+        self.annotations = []
+        self.captures = [_segment(0, fc)]
+        self._global = {'core:datatype': datatype, 'core:sample_rate': float(fs),
+                        'core:version': SIGMF_VERSION}
+        if description:
+            self._global['core:description'] = description
+        if self._dtype.kind == 'i':
+            self._global[f'{EXTENSION}:scale'] = self.scale
+        for key, value in extensions.items():
+            self._global[f'{EXTENSION}:{key}'] = value
+        self._file = open(self.data_path, 'wb')
+
+    def _encode(self, x):
+        x = np.asarray(x)
+        if np.iscomplexobj(x) and not self.is_complex:
+            raise ValueError(f'Complex samples cannot be stored as {self.datatype}')
+        if self.is_complex:
+            parts = np.empty(x.shape + (2,), dtype=x.real.dtype)
+            parts[..., 0] = x.real
+            parts[..., 1] = x.imag if np.iscomplexobj(x) else 0
+            x = parts
+        if self._dtype.kind == 'i':
+            full = _full_scale(self._dtype)
+            x = np.clip(np.round(x * (full / self.scale)), -full, full)
+        return x.astype(self._dtype, copy=False)
+
+    def write(self, x):
+        x = np.asarray(x)
+        if x.ndim != 1:
+            raise ValueError('Expected a 1-D block of samples')
+        self._file.write(self._encode(x).tobytes())
+        self.n_samples += len(x)
+
+    def annotate(self, start, count, label=None, comment=None, f_low=None, f_high=None, **fields):
+        """
+        Annotates samples start .. start + count (any range, also ahead of
+        what has been written). Extra fields go into the extension namespace.
+        """
+        annotation = {'core:sample_start': int(start), 'core:sample_count': int(count)}
+        for key, value in (('label', label), ('comment', comment),
+                           ('freq_lower_edge', f_low), ('freq_upper_edge', f_high)):
+            if value is not None:
+                annotation[f'core:{key}'] = value
+        for key, value in fields.items():
+            annotation[f'{EXTENSION}:{key}'] = value
+        self.annotations.append(annotation)
+
+    def segment(self, fc=None, **fields):
+        """
+        Starts a new capture segment (e.g. a retuned centre frequency) at
+        the next sample written.
+        """
+        if self.n_samples == self.captures[-1]['core:sample_start']:
+            self.captures.pop()
+        self.captures.append(_segment(self.n_samples, fc, fields))
+
+    def close(self):
+        if self._file.closed:
+            return
+        self._file.close()
+        meta = {'global': dict(self._global), 'captures': self.captures,
+                'annotations': sorted(self.annotations, key=lambda a: a['core:sample_start'])}
+        entries = [meta['global']] + self.captures + self.annotations
+        if any(key.startswith(EXTENSION + ':') for entry in entries for key in entry):
+            meta['global']['core:extensions'] = [{'name': EXTENSION, 'version': SIGMF_VERSION,
+                                                  'optional': True}]
+        with open(self.meta_path, 'w') as f:
+            json.dump(meta, f, indent=2)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def _segment(start, fc=None, fields=None):
+    segment = {'core:sample_start': int(start)}
+    if fc is not None:
+        segment['core:frequency'] = float(fc)
+    for key, value in (fields or {}).items():
+        segment[f'{EXTENSION}:{key}'] = value
+    return segment
+
+
+def write_capture(path, x, fs, fc=None, datatype=None, scale=None, description=None,
+                  annotations=(), **extensions):
+    """
+    Saves x in one call: datatype 'cf32_le' for complex x and 'rf32_le'
+    otherwise; integer datatypes default to the peak of x as full scale.
+    annotations are dicts of CaptureWriter.annotate arguments. Returns the
+    Capture.
+    """
+    x = np.asarray(x)
+    if datatype is None:
+        datatype = 'cf32_le' if np.iscomplexobj(x) else 'rf32_le'
+    if scale is None and parse_datatype(datatype)[1].kind == 'i':
+        peak = max(np.max(np.abs(x.real), initial=0), np.max(np.abs(x.imag), initial=0))
+        scale = float(peak) or 1.0
+    with CaptureWriter(path, fs, datatype, fc, scale, description, **extensions) as writer:
+        for annotation in annotations:
+            writer.annotate(**annotation)
+        writer.write(x)
+    return Capture(path)
+
+
+class Capture:
+    """
+    A saved capture: metadata from the sidecar and the samples as a
+    read-only np.memmap (`raw`: complex for cf*, (n, 2) codes for ci*).
+    """
+
+    def __init__(self, path):
+        self.data_path, self.meta_path = _paths(path)
+        with open(self.meta_path) as f:
+            self.meta = json.load(f)
+        g = self.meta['global']
+        self.datatype = g['core:datatype']
+        self.fs = g['core:sample_rate']
+        self.description = g.get('core:description')
+        self.scale = g.get(f'{EXTENSION}:scale', 1.0)
+        self.captures = self.meta.get('captures', [])
+        self.annotations = self.meta.get('annotations', [])
+        self.fc = self.captures[0].get('core:frequency') if self.captures else None
+        self.is_complex, self._dtype = parse_datatype(self.datatype)
+        frame = self._dtype.itemsize * (2 if self.is_complex else 1)
+        self.n_samples = os.path.getsize(self.data_path) // frame
+        self.duration = self.n_samples / self.fs
+        if self._dtype.kind == 'f' and self.is_complex:
+            dtype, shape = np.dtype(self._dtype.byteorder + 'c' + str(2 * self._dtype.itemsize)), (self.n_samples,)
+        else:
+            dtype, shape = self._dtype, (self.n_samples,) + ((2,) if self.is_complex else ())
+        # np.memmap refuses empty files
+        self.raw = (np.memmap(self.data_path, dtype=dtype, mode='r', shape=shape)
+                    if self.n_samples else np.zeros(shape, dtype=dtype))
+
+    def __len__(self):
+        return self.n_samples
+
+    def samples(self, start=0, stop=None):
+        """
+        Samples start .. stop: a view of the file for float datatypes
+        (as stored), converted floats for integer ones.
+        """
+        return self._convert(self.raw[start:stop])
+
+    def _convert(self, raw):
+        # Stored values (any selection of self.raw) -> samples
+        if self._dtype.kind == 'f':
+            return raw
+        x = raw.astype(real_dtype()) * real_dtype()(self.scale / _full_scale(self._dtype))
+        return x.view(complex_dtype())[..., 0][()] if self.is_complex else x
+
+    def __getitem__(self, index):
+        # Only the selected codes are read and converted
+        return self._convert(self.raw[index])
+
+    def index(self, t):
+        """
+        Sample index of time t (s from the start), clipped to the capture.
+        """
+        return int(np.clip(np.ceil(t * self.fs - 1e-9), 0, self.n_samples))
+
+    def time_slice(self, t0=0.0, t1=None):
+        """
+        The samples with t0 <= n / fs < t1.
+        """
+        return self.samples(self.index(t0), self.n_samples if t1 is None else self.index(t1))
+
+    def times(self, t0=0.0, t1=None):
+        """
+        Time axis (s) of time_slice(t0, t1).
+        """
+        stop = self.n_samples if t1 is None else self.index(t1)
+        return np.arange(self.index(t0), stop) / self.fs
+
+    def annotated(self, label=None):
+        """
+        Samples of every annotation (with the given core:label).
+        """
+        return [self.samples(a['core:sample_start'], a['core:sample_start'] + a['core:sample_count'])
+                for a in self.annotations if label is None or a.get('core:label') == label]
+
+    def blocks(self, block=65536, start=0, stop=None):
+        stop = self.n_samples if stop is None else min(stop, self.n_samples)
+        for i in range(start, stop, block):
+            yield self.samples(i, min(i + block, stop))
+
+    def close(self):
+        self.raw = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def cached_capture(path, generate, fs, datatype=None, fc=None, scale=None, **params):
+    """
+    Capture(path) if it was saved by generate(**params) at fs, with the
+    same fc (and datatype and integer full scale, when given), otherwise
+    runs generate(fs=fs, **params) (an array, or an iterable of blocks),
+    saves the result and returns it. The parameters and the generator's name
+    are stored in the metadata ('ee357:params', 'ee357:generator'). An
+    integer datatype needs `scale` when generate yields blocks (the peak is
+    not known in advance).
+    """
+    key = {'generator': f'{generate.__module__}.{generate.__qualname__}',
+           'params': json.loads(json.dumps(params, default=float))}
+    data_path, meta_path = _paths(path)
+    if os.path.exists(meta_path) and os.path.exists(data_path):
+        cap = Capture(path)
+        g = cap.meta['global']
+        if (g.get(f'{EXTENSION}:generator'), g.get(f'{EXTENSION}:params')) == (key['generator'], key['params']) \
+                and cap.fs == fs and cap.fc == fc and datatype in (None, cap.datatype) \
+                and (scale is None or cap._dtype.kind == 'f' or cap.scale == float(scale)):
+            return cap
+        cap.close()
+    x = generate(fs=fs, **params)
+    if isinstance(x, np.ndarray):
+        return write_capture(path, x, fs, fc, datatype, scale, **key)
+    if datatype is not None and scale is None and parse_datatype(datatype)[1].kind == 'i':
+        raise ValueError(f'{datatype} from a block generator needs scale= (full-scale amplitude)')
+    writer = None
+    for block in x:
+        block = np.asarray(block)
+        if writer is None:
+            writer = CaptureWriter(path, fs, datatype or ('cf32_le' if np.iscomplexobj(block) else 'rf32_le'),
+                                   fc, scale, **key)
+        writer.write(block)
+    if writer is None:
+        raise ValueError('generate produced no samples')
+    writer.close()
+    return Capture(path)
+
+
+def _lssb_blocks(fs, duration, fc=1e6, fm=5000, Ac=40.0, block=1 << 20):
+    # labs/AM_Modulation/LSSB_Simulation.py: m = cos + 4 sin, analytic Hilbert
+    n = int(fs * duration)
+    for i in range(0, n, block):
+        t = np.arange(i, min(i + block, n)) / fs
+        wm, wc = 2 * np.pi * fm * t, 2 * np.pi * fc * t
+        m, m_hat = np.cos(wm) + 4 * np.sin(wm), np.sin(wm) - 4 * np.cos(wm)
+        yield (Ac / 2) * (m * np.cos(wc) + m_hat * np.sin(wc))
+
+
+def benchmark_capture(duration=2.0, fs=4e6, window=2e-3, directory=None):
+    """
+    Saves `duration` s of the LSSB signal of LSSB_Simulation.py (rf32) and
+    a ci16 copy, then times opening the capture and taking the zoom spectrum
+    of a `window` slice in the middle, against generating that slice again.
+    """
+    import tempfile
+    from DSP.spectrum import zoom_spectrum
+    directory = tempfile.mkdtemp() if directory is None else directory
+    path = os.path.join(directory, 'lssb')
+
+    t0 = time.perf_counter()
+    cap = cached_capture(path, _lssb_blocks, fs, duration=duration)
+    write_s = time.perf_counter() - t0
+
+    zoom_spectrum(np.zeros(4096, dtype=np.float32), fs, 980e3, 1020e3, 4001)     # first-call setup
+    t0 = time.perf_counter()
+    cap = Capture(path)
+    mid = duration / 2
+    x = cap.time_slice(mid, mid + window)
+    open_s = time.perf_counter() - t0
+    zero_copy = np.shares_memory(x, cap.raw)
+    t0 = time.perf_counter()
+    f, spec_read = zoom_spectrum(x, fs, 980e3, 1020e3, 4001)
+    read_s = open_s + time.perf_counter() - t0
+
+    # Regenerating: the signal has to be computed up to the slice
+    t0 = time.perf_counter()
+    head = int(mid * fs)
+    y = np.concatenate(list(_lssb_blocks(fs, mid + window)))[head:head + len(x)]
+    _, spec_regen = zoom_spectrum(y.astype(np.float32), fs, 980e3, 1020e3, 4001)
+    regen_s = time.perf_counter() - t0
+    error = float(np.max(np.abs(spec_read - spec_regen)) / np.max(np.abs(spec_regen)))
+
+    t0 = time.perf_counter()
+    ci16 = write_capture(path + '_ci16', cap.samples() + 0j, fs, datatype='ci16_le')
+    ci16_write_s = time.perf_counter() - t0
+    x16 = ci16.time_slice(mid, mid + window).real
+    snr16 = float(10 * np.log10(np.sum(x.astype(float)**2) / np.sum((x16 - x)**2)))
+
+    size = os.path.getsize(cap.data_path)
+    print(f"LSSB at {fs / 1e6:g} MHz, {duration:g} s: {cap.n_samples} samples, "
+          f"rf32 {size / 1e6:.1f} MB written in {write_s:.2f} s")
+    print(f"  open + {window * 1e3:g} ms slice + zoom spectrum  {read_s * 1e3:8.2f} ms "
+          f"(slice is a view of the file: {zero_copy})")
+    print(f"  regenerate + zoom spectrum         {regen_s * 1e3:8.2f} ms  "
+          f"(spectra agree to {error:.1e})")
+    print(f"  ci16 copy {os.path.getsize(ci16.data_path) / 1e6:.1f} MB in {ci16_write_s:.2f} s, "
+          f"slice SNR vs rf32 {snr16:.1f} dB")
+    for c in (cap, ci16):
+        c.close()
+        for p in _paths(c.data_path):
+            os.remove(p)
+    return {'write_s': write_s, 'read_s': read_s, 'regen_s': regen_s, 'zero_copy': zero_copy,
+            'error': error, 'ci16_snr_db': snr16}
+
+
+if __name__ == '__main__':
+    sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+    benchmark_capture()
@@ -0,0 +1,91 @@
+# Channel Models
+# Additive white Gaussian noise, carrier frequency offset and oscillator
+# phase noise for real passband signals, vectorized over trials:
+#
+#   n0 = noise_density(signal_power(s), cnr_db=20, bandwidth=2 * W)
+#   r = channel(s, fs, n0=n0, freq_offset=5.0, linewidth=1.0, trials=256, rng=rng)
+#
+# r then has shape (trials, len(s)): one independent noise / phase-noise
+# realization per row, ready for the demodulators in DSP.analog (which work
+# along the last axis).
+#
+# Noise convention: white noise of two-sided PSD N0/2, i.e. per-sample
+# variance N0 * fs / 2 at sample rate fs. The carrier-to-noise ratio is
+# CNR = P_R / (N0 * B_T) for received power P_R and transmission bandwidth
+# B_T; the baseband reference is gamma = P_R / (N0 * W).
+
+import numpy as np
+
+from DSP.analog import analytic_signal
+from DSP.precision import real_dtype
+
+
+def signal_power(x):
+    """
+    Mean square of x along the last axis.
+    """
+    x = np.asarray(x)
+    return np.mean(x.astype(np.float64, copy=False)**2, axis=-1)
+
+
+def noise_density(signal_power, cnr_db, bandwidth):
+    """
+    N0 for which signal_power / (N0 * bandwidth) equals cnr_db.
+    """
+    return signal_power / (bandwidth * 10**(cnr_db / 10))
+
+
+def awgn(x, n0, fs, trials=None, rng=None):
+    """
+    x plus white Gaussian noise of two-sided PSD n0/2. With trials, x is
+    broadcast to (trials, *x.shape) with independent noise in every row.
+    """
+    rng = np.random.default_rng() if rng is None else rng
+    x = np.asarray(x)
+    shape = x.shape if trials is None else (trials,) + x.shape
+    noise = rng.standard_normal(shape, dtype=real_dtype())
+    noise *= np.sqrt(n0 * fs / 2)
+    return x + noise
+
+
+def wiener_phase_noise(shape, fs, linewidth, rng=None):
+    """
+    Oscillator phase noise as a Wiener process (random walk) whose
+    increments have variance 2*pi*linewidth/fs: a Lorentzian line of
+    3-dB width `linewidth` Hz. Walks along the last axis, starting at 0.
+    """
+    rng = np.random.default_rng() if rng is None else rng
+    steps = rng.standard_normal(shape) * np.sqrt(2 * np.pi * linewidth / fs)
+    steps[..., 0] = 0
+    return np.cumsum(steps, axis=-1)
+
+
+def rotate_carrier(x, fs, freq_offset=0.0, phase=0.0):
+    """
+    Shifts every frequency of a real passband signal by freq_offset Hz and
+    adds `phase` (radians, scalar or array broadcastable to x) to its
+    carrier: Re{ z(t) * exp(j(2*pi*freq_offset*t + phase)) }, z analytic.
+    """
+    x = np.asarray(x)
+    t = np.arange(x.shape[-1]) / fs
+    z = analytic_signal(x)
+    out = np.real(z * np.exp(1j * (2 * np.pi * freq_offset * t + phase)))
+    return out.astype(real_dtype(), copy=False)
+
+
+def channel(x, fs, n0=0.0, freq_offset=0.0, linewidth=0.0, trials=None, rng=None):
+    """
+    Carrier offset and phase noise (if any), then AWGN of density n0.
+    With trials the result has shape (trials, len(x)).
+    """
+    rng = np.random.default_rng() if rng is None else rng
+    x = np.asarray(x)
+    shape = x.shape if trials is None else (trials,) + x.shape
+    if freq_offset or linewidth:
+        phase = wiener_phase_noise(shape, fs, linewidth, rng) if linewidth else 0.0
+        x = rotate_carrier(x, fs, freq_offset, phase)
+    if n0 > 0:
+        x = awgn(x, n0, fs, trials=None if x.shape == shape else trials, rng=rng)
+    if x.shape != shape:
+        x = np.broadcast_to(x, shape).copy()
+    return x
@@ -0,0 +1,35 @@
+# Filter Helpers
+# Zero-phase Butterworth low-pass used by the demodulators (Lab 2 AM,
+# PWM/PPM recovery), and an ideal (FFT brick-wall) band-pass used as the
+# predetection filter of the noise chains. scipy.signal is imported on
+# first use. Both filter along the last axis.
+# float32 input gives float32 output (see DSP.precision).
+
+import numpy as np
+
+from DSP.profiling import profiled
+
+
+@profiled
+def butter_lowpass_filter(data, cutoff, fs, order=5):
+    from scipy.signal import butter, filtfilt
+    nyq = 0.5 * fs
+    normal_cutoff = cutoff / nyq
+    b, a = butter(order, normal_cutoff, btype='low', analog=False)
+    y = filtfilt(b, a, data)
+    if np.asarray(data).dtype == np.float32:
+        y = y.astype(np.float32)
+    return y
+
+
+@profiled
+def ideal_bandpass(x, fs, f_lo, f_hi):
+    """
+    Keeps only the components with f_lo <= |f| <= f_hi (FFT brick-wall).
+    Exact for tones on FFT bins; ringing otherwise.
+    """
+    x = np.asarray(x)
+    f = np.abs(np.fft.rfftfreq(x.shape[-1], 1 / fs))
+    X = np.fft.rfft(x, axis=-1)
+    X[..., (f < f_lo) | (f > f_hi)] = 0
+    return np.fft.irfft(X, n=x.shape[-1], axis=-1).astype(x.dtype, copy=False)
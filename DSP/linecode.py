@@ -0,0 +1,181 @@
+# Line Coding and Matched-Filter Detection
+# Baseband transmission of a PCM bitstream (DSP.pcm.pack_codes):
+#
+#   bits -> line_encode -> shape_pulses -> channel -> matched_filter_sample
+#        -> line_decode -> bits
+#
+#   packed_hat, stats = transmit_bits(packed, n_bits_total, 'manchester', ebn0_db=8)
+#   stats['ber'], stats['ber_theory'], stats['bits_per_s']
+#
+# Schemes (amplitude A, bit time T_b, each bit split into two half-bit chips):
+#   nrz         polar NRZ: +A / -A for the whole bit
+#   rz          polar RZ: +A / -A in the first half, 0 in the second
+#   manchester  1 -> (+A, -A), 0 -> (-A, +A)
+#   ami         bipolar RZ: 0 -> 0, 1 -> alternately +A / -A (first half)
+#
+# The pulses are rectangular, so the matched filter sampled at the end of
+# every chip is integrate-and-dump: the mean of the chip's samples. The
+# detectors are then the ML decisions on the two chip statistics (AMI
+# thresholds at +-A/2). The sample rate is sps samples per bit with
+# T_b = 1, so the noise of DSP.channel.awgn (variance N0 * sps / 2) sets
+# Eb/N0 directly. transmit_bits runs the whole chain on chunks of the
+# packed stream, carrying the AMI polarity across chunks, so 10^8-bit
+# streams run in bounded memory; `python -m DSP.linecode` measures BER and
+# throughput on such a stream.
+
+import math
+import sys
+import time
+
+import numpy as np
+
+from DSP.channel import awgn
+from DSP.precision import real_dtype
+from DSP.profiling import profiled
+
+SCHEMES = ('nrz', 'rz', 'manchester', 'ami')
+
+# Mean energy per bit for equiprobable bits, in units of A^2 T_b
+BIT_ENERGY = {'nrz': 1.0, 'rz': 0.5, 'manchester': 1.0, 'ami': 0.25}
+
+
+@profiled
+def line_encode(bits, scheme, state=1):
+    """
+    Chip levels (-1, 0, +1) of a bit array as an (n, 2) int8 array.
+    state is the polarity of the next AMI mark; returns (chips, state).
+    """
+    b = np.asarray(bits).astype(np.int8)
+    polar = 2 * b - 1
+    zero = np.zeros_like(b)
+    if scheme == 'nrz':
+        chips = np.stack((polar, polar), axis=1)
+    elif scheme == 'rz':
+        chips = np.stack((polar, zero), axis=1)
+    elif scheme == 'manchester':
+        chips = np.stack((polar, -polar), axis=1)
+    elif scheme == 'ami':
+        marks = np.cumsum(b, dtype=np.int64)
+        polarity = np.where(marks % 2 == 1, state, -state).astype(np.int8)
+        chips = np.stack((b * polarity, zero), axis=1)
+        if len(marks) and marks[-1] % 2:
+            state = -state
+    else:
+        raise ValueError(f'Unknown line code {scheme!r}; use one of {SCHEMES}')
+    return chips, state
+
+
+@profiled
+def shape_pulses(chips, sps, amplitude=1.0):
+    """
+    Rectangular pulse shaping: every chip held for sps // 2 samples
+    (sps samples per bit, sps even).
+    """
+    if sps % 2:
+        raise ValueError(f'sps must be even (two chips per bit), got {sps}')
+    levels = (amplitude * np.asarray(chips)).astype(real_dtype())
+    return np.repeat(levels, sps // 2, axis=-1).ravel()
+
+
+@profiled
+def matched_filter_sample(r, sps):
+    """
+    Output of the rectangular-chip matched filter sampled at the end of
+    each chip, normalized to the chip amplitude: (n, 2) chip means.
+    """
+    r = np.asarray(r)
+    template = np.full(sps // 2, 1 / (sps // 2), dtype=r.dtype)
+    return (r.reshape(-1, sps // 2) @ template).reshape(-1, 2)   # BLAS, ~8x a .mean()
+
+
+@profiled
+def line_decode(stats, scheme, amplitude=1.0):
+    """
+    Bit decisions (uint8) from the matched-filter chip statistics.
+    """
+    if scheme == 'nrz':
+        bits = stats[:, 0] + stats[:, 1] > 0
+    elif scheme == 'rz':
+        bits = stats[:, 0] > 0
+    elif scheme == 'manchester':
+        bits = stats[:, 0] > stats[:, 1]
+    elif scheme == 'ami':
+        bits = np.abs(stats[:, 0]) > amplitude / 2
+    else:
+        raise ValueError(f'Unknown line code {scheme!r}; use one of {SCHEMES}')
+    return bits.view(np.uint8)
+
+
+def q_function(x):
+    """
+    Gaussian tail probability Q(x) (math.erfc, elementwise).
+    """
+    return 0.5 * np.vectorize(math.erfc, otypes=[float])(np.asarray(x) / np.sqrt(2))
+
+
+def ber_theory(scheme, ebn0_db, ones_fraction=0.5):
+    """
+    Bit error rate of the matched-filter receiver. Polar codes (NRZ, RZ,
+    Manchester): Q(sqrt(2 Eb/N0)). AMI: (p1 + 2 p0) Q(sqrt(Eb/N0)), a
+    zero being able to cross either threshold.
+    """
+    ebn0 = 10**(np.asarray(ebn0_db) / 10)
+    if scheme == 'ami':
+        return (ones_fraction + 2 * (1 - ones_fraction)) * q_function(np.sqrt(ebn0))
+    return q_function(np.sqrt(2 * ebn0))
+
+
+def transmit_bits(packed, n_bits_total, scheme, ebn0_db, sps=8, amplitude=1.0,
+                  chunk_bits=2**18, rng=None):
+    """
+    Runs a packed bitstream through line coder, pulse shaping, AWGN at
+    ebn0_db (Eb of equiprobable bits), matched filter, sampler and decoder,
+    chunk_bits at a time. Returns (packed decisions, stats dict).
+    """
+    rng = np.random.default_rng() if rng is None else rng
+    packed = np.asarray(packed, dtype=np.uint8)
+    chunk_bits -= chunk_bits % 8
+    n0 = BIT_ENERGY[scheme] * amplitude**2 / 10**(ebn0_db / 10)
+    out = np.empty(-(-n_bits_total // 8), dtype=np.uint8)
+    state, errors, ones = 1, 0, 0
+    t0 = time.perf_counter()
+    for start in range(0, n_bits_total, chunk_bits):
+        n = min(chunk_bits, n_bits_total - start)
+        b0 = start // 8
+        bits = np.unpackbits(packed[b0:b0 + -(-n // 8)], count=n)
+        chips, state = line_encode(bits, scheme, state)
+        r = awgn(shape_pulses(chips, sps, amplitude), n0, sps, rng=rng)
+        bits_hat = line_decode(matched_filter_sample(r, sps), scheme, amplitude)
+        out[b0:b0 + -(-n // 8)] = np.packbits(bits_hat)
+        errors += int(np.count_nonzero(bits_hat != bits))
+        ones += int(np.count_nonzero(bits))
+    seconds = time.perf_counter() - t0
+    return out, {
+        'scheme': scheme, 'ebn0_db': ebn0_db, 'bits': n_bits_total, 'errors': errors,
+        'ber': errors / max(n_bits_total, 1),
+        'ber_theory': float(ber_theory(scheme, ebn0_db, ones / max(n_bits_total, 1))),
+        'seconds': seconds, 'bits_per_s': n_bits_total / seconds if seconds else float('inf'),
+    }
+
+
+def benchmark_line_codes(total_bits=10**8, ebn0_db=8.0, sps=8, n_bits=8, seed=0):
+    """
+    BER and throughput of every line code on a total_bits-bit stream: the
+    Sampling/PCM.py tone (5 Hz, fs 100 Hz, +-1.2 V range) coded with n_bits
+    per sample, repeated to length, packed once and transmitted in chunks.
+    """
+    from DSP.pcm import pack_codes, pcm_encode
+    n_codes = -(-total_bits // n_bits)
+    period = pcm_encode(np.cos(2 * np.pi * 5 * np.arange(20) / 100), n_bits, -1.2, 1.2)
+    packed = pack_codes(np.resize(period, n_codes), n_bits)
+    rng = np.random.default_rng(seed)
+    print(f"{total_bits:.3g} bits, {n_bits}-bit PCM codes, {sps} samples/bit, Eb/N0 = {ebn0_db} dB")
+    print(f"{'Scheme':<12}{'errors':>10}{'BER':>12}{'theory':>12}{'time (s)':>10}{'Mbit/s':>9}")
+    for scheme in SCHEMES:
+        _, s = transmit_bits(packed, total_bits, scheme, ebn0_db, sps=sps, rng=rng)
+        print(f"{scheme:<12}{s['errors']:>10}{s['ber']:>12.3e}{s['ber_theory']:>12.3e}"
+              f"{s['seconds']:>10.2f}{s['bits_per_s'] / 1e6:>9.2f}")
+
+
+if __name__ == '__main__':
+    benchmark_line_codes(int(float(sys.argv[1])) if len(sys.argv) > 1 else 10**8)
@@ -0,0 +1,71 @@
+# Per-Stage Memory Instrumentation
+# Records, for each named stage of a computation, the peak traced memory
+# while it ran and the memory it left allocated, using tracemalloc (which
+# sees NumPy array buffers as well as Python objects):
+#
+#   mem = MemoryTrace()
+#   with mem:
+#       with mem.stage('generate'):
+#           s = am_modulate(m_t, t, fc)
+#       with mem.stage('spectrum'):
+#           f, S = get_spectrum(s, fs)
+#   mem.report()
+#
+# Tracing slows Python-level loops down, so time such runs separately.
+
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+
+class MemoryTrace:
+    """
+    Collects one record per stage: name, peak_bytes (highest traced total
+    during the stage, relative to the start of the trace), delta_bytes (net
+    allocation left behind by the stage) and seconds.
+    """
+
+    def __init__(self):
+        self.stages = []
+        self._base = 0
+        self._owner = False
+
+    def __enter__(self):
+        self._owner = not tracemalloc.is_tracing()
+        if self._owner:
+            tracemalloc.start()
+        self._base = tracemalloc.get_traced_memory()[0]
+        return self
+
+    def __exit__(self, *exc):
+        if self._owner:
+            tracemalloc.stop()
+        return False
+
+    @contextmanager
+    def stage(self, name):
+        if not tracemalloc.is_tracing():
+            raise RuntimeError('MemoryTrace.stage() used outside `with MemoryTrace()`')
+        start = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - t0
+            current, peak = tracemalloc.get_traced_memory()
+            self.stages.append({'name': name, 'peak_bytes': peak - self._base,
+                                'delta_bytes': current - start, 'seconds': seconds})
+
+    @property
+    def peak_bytes(self):
+        return max((s['peak_bytes'] for s in self.stages), default=0)
+
+    def report(self, title=None):
+        if title:
+            print(title)
+        print(f"  {'Stage':<24}{'peak (MiB)':>12}{'retained (MiB)':>16}{'time (ms)':>11}")
+        for s in self.stages:
+            print(f"  {s['name']:<24}{s['peak_bytes'] / 2**20:>12.2f}"
+                  f"{s['delta_bytes'] / 2**20:>16.2f}{s['seconds'] * 1e3:>11.2f}")
+        print(f"  {'overall peak':<24}{self.peak_bytes / 2**20:>12.2f}")
@@ -0,0 +1,420 @@
+# Dither, Noise Shaping and Sigma-Delta Modulation
+# Requantization whose error is decorrelated from the signal (dither) and
+# pushed out of the signal band (error feedback), with state kept between
+# blocks:
+#
+#   x_q, delta = dithered_pcm(x, 8, -1.2, 1.2, 'tpdf', rng=rng)
+#
+#   shaper = NoiseShaper(8, -1.2, 1.2, order=2, dither='tpdf', rng=rng)
+#   y = np.concatenate([shaper.process(b) for b in blocks])   # levels of uniform_pcm
+#
+#   sdm = SigmaDelta(order=2, levels=2)                  # 1-bit, +-1
+#   cic = CICDecimator(64, order=3)
+#   out = np.concatenate([sdm.values(cic.process(sdm.process(b))) for b in blocks])
+#   inband_snr_db(y, fs, f_signal, band)
+#
+# All quantizers here are error-feedback loops: with v[n] = x[n] +
+# sum_k h_k eps[n-k] the output is y[n] = Q(v[n] + dither[n]) and
+# eps[n] = y[n] - v[n], so y = x + NTF(z) eps with NTF = 1 + sum h_k z^-k.
+# The default NTF is (1 - z^-1)^N. A sigma-delta modulator is the same loop
+# with a 1-bit or few-level quantizer run at an oversampled rate.
+#
+# The loop is sequential, but for NTF = (1 - z^-1)^N it has an exact
+# vectorized form. In units of the step, 1/NTF (N running sums) maps integer
+# sequences to integer sequences, so p = round((1/NTF) x + dither) and
+# y = NTF p (N differences) give y = x + NTF eps with |eps - dither| <= 1/2.
+# That is the loop's output sample for sample, as long as the quantizer
+# never saturates. Each block is computed that way in wrapping int64 fixed
+# point, which is exact however far the running sums grow. A block is kept if
+# no output leaves the quantizer range; otherwise it reruns as a scalar loop
+# over Python floats. The loop is needed for a 1-bit modulator of order 2 or
+# more, and for any other NTF. `python -m DSP.noiseshape` measures
+# Msample/s and in-band SNR of each case.
+
+import sys
+import time
+from math import comb, floor, pi
+
+import numpy as np
+
+from DSP.profiling import profiled
+
+DITHERS = ('rpdf', 'tpdf')
+
+
+def dither(n, kind='tpdf', rng=None):
+    """
+    n dither samples in units of one quantization step: RPDF is uniform on
+    [-1/2, 1/2), TPDF the sum of two of them (triangular on [-1, 1]).
+    """
+    if kind not in DITHERS:
+        raise ValueError(f'Unknown dither {kind!r}; use one of {DITHERS}')
+    rng = np.random.default_rng() if rng is None else rng
+    d = rng.random(n) - 0.5
+    if kind == 'tpdf':
+        d += rng.random(n) - 0.5
+    return d
+
+
+def dithered_pcm(x, n_bits, V_min=-1, V_max=1, kind='tpdf', subtractive=False, rng=None):
+    """
+    uniform_pcm of x plus dither (x_q, delta). With subtractive=True the
+    dither is removed again after quantization, as a receiver that knows
+    the sequence would.
+    """
+    from DSP.pcm import uniform_pcm
+    x = np.asarray(x, dtype=float)
+    delta = (V_max - V_min) / 2**n_bits
+    d = dither(x.shape, kind, rng) * delta
+    x_q, delta = uniform_pcm(x + d, n_bits, V_min, V_max)
+    return (x_q - d if subtractive else x_q), delta
+
+
+def binomial_ntf(order):
+    """
+    Coefficients of (1 - z^-1)^order: zeros at DC, gain 2^order at fs/2.
+    """
+    return np.array([(-1)**k * comb(order, k) for k in range(order + 1)], dtype=float)
+
+
+def ntf_response_db(ntf, f, fs):
+    """
+    |NTF(e^{j 2 pi f / fs})| in dB.
+    """
+    z = np.exp(-2j * np.pi * np.outer(np.asarray(f, dtype=float) / fs, np.arange(len(ntf))))
+    return 20 * np.log10(np.maximum(np.abs(z @ np.asarray(ntf, dtype=float)), 1e-15))
+
+
+def shaped_snr_theory_db(n_bits, order, osr, loading_db=0.0):
+    """
+    In-band SNR of a full-scale sine (plus loading_db) quantized to n_bits
+    with NTF (1 - z^-1)^order at oversampling ratio osr:
+    6.02 n + 1.76 - 10 log10(pi^2N / (2N + 1)) + (2N + 1) 10 log10(osr).
+    """
+    return (6.02 * n_bits + 1.76 + loading_db - 10 * np.log10(pi**(2 * order) / (2 * order + 1))
+            + (2 * order + 1) * 10 * np.log10(osr))
+
+
+class ErrorFeedbackQuantizer:
+    """
+    Rounding quantizer to the integers lo .. hi inside an error-feedback
+    loop with noise transfer function ntf = [1, h_1, ..., h_N]. Works in
+    units of the step; process(u) returns the integer outputs as floats.
+    The dither (None, 'rpdf', 'tpdf') is added at the quantizer input, so it
+    is shaped together with the rounding error.
+    """
+
+    def __init__(self, ntf, lo=-np.inf, hi=np.inf, dither=None, rng=None, block=65536):
+        self.ntf = np.asarray(ntf, dtype=float)
+        if self.ntf[0] != 1:
+            raise ValueError('ntf must start with 1 (y[n] = Q(v[n]) needs eps[n] unfiltered)')
+        self.order = len(self.ntf) - 1
+        self.lo, self.hi = float(lo), float(hi)
+        self.dither = dither
+        self.rng = np.random.default_rng() if rng is None and dither else rng
+        self.block = block
+        self._e = [0.0] * max(self.order, 2)           # eps[n-1], eps[n-2], ...
+        # An overloaded loop (more input than the NTF can shape within lo .. hi)
+        # lets eps grow without bound. Past e_limit the state is cleared, so
+        # the loop recovers once the input is back in range
+        span = self.hi - self.lo + 1
+        self.e_limit = 2.0**(self.order + 1) * span if np.isfinite(span) else np.inf
+        self.resets = 0
+        self.vectorized = bool(np.array_equal(self.ntf, binomial_ntf(self.order)))
+        self.blocks_vectorized = 0
+        self.blocks_looped = 0
+        # Blocks that saturated in a row; after k of them the next 2^k - 1
+        # blocks go straight to the loop (a 1-bit modulator always saturates)
+        self._failures = 0
+        self._skip = 0
+
+    @profiled
+    def process(self, u):
+        """
+        Quantized outputs of one block of inputs u (in steps); the loop
+        state carries over to the next call.
+        """
+        u = np.asarray(u, dtype=float)
+        d = dither(len(u), self.dither, self.rng) if self.dither else None
+        if self.order == 0:
+            # No feedback: saturation changes nothing upstream
+            return np.clip(np.round(u if d is None else u + d), self.lo, self.hi)
+        out = np.empty(len(u))
+        for i in range(0, len(u), self.block):
+            db = None if d is None else d[i:i + self.block]
+            y = None
+            if self.vectorized and self._skip == 0:
+                y = self._vector_block(u[i:i + self.block], db)
+                self._failures = 0 if y is not None else min(self._failures + 1, 10)
+                self._skip = 2**self._failures - 1
+            elif self._skip:
+                self._skip -= 1
+            if y is None:
+                y = self._loop_block(u[i:i + self.block], db)
+                self.blocks_looped += 1
+            else:
+                self.blocks_vectorized += 1
+            out[i:i + self.block] = y
+        return out
+
+    def _vector_block(self, u, d):
+        # NTF = (1 - z^-1)^N: z = N-fold running sum of u continuing the
+        # integrators of u - y, p = round(z + d), y = N-fold difference of p.
+        # Fixed point with F fraction bits in wrapping int64: p is then known
+        # modulo 2^(64 - F) only, which is enough since differencing commutes
+        # with the wrap and |y| < 2^(63 - F). F leaves room for max |u| plus
+        # the largest shaped error, including the error fed back from the
+        # state (the integrators start at up to 2^N max |eps|), and is otherwise
+        # as fine as float64. None if y leaves [lo, hi] or the state is too
+        # large for a useful F.
+        N = self.order
+        peak = float(np.max(np.abs(u))) if len(u) else 0.0
+        e_max = max(abs(e) for e in self._e[:N])
+        F = 62 - int(np.ceil(np.log2(peak + 2**N * (e_max + 2) + 1)))
+        if F < 24:
+            return None
+        scale = 2.0**F
+        E = [round(e * scale) for e in self._e[:N]]
+        # Integrator j of (u - y) before the block: -(1 - z^-1)^(N - j) eps
+        W = [-sum((-1)**k * comb(N - j, k) * E[k] for k in range(N - j + 1)) for j in range(1, N + 1)]
+        Z = np.round(u * scale).astype(np.int64)
+        for j in range(N):
+            Z = np.cumsum(Z)
+            Z += np.int64(W[j])
+        P = Z + np.int64(1 << (F - 1))
+        if d is not None:
+            P += np.round(d * scale).astype(np.int64)
+        P >>= F
+        y = P
+        for j in range(N):
+            y = np.diff(y, prepend=np.int64(0))
+        y = ((y << F) >> F).astype(float)                 # sign-extend the low 64 - F bits
+        if len(y) and (y.min() < self.lo or y.max() > self.hi):
+            return None
+        k = len(self._e)
+        eps = ((P[::-1][:k] << F) - Z[::-1][:k]) / scale
+        self._e = (eps.tolist() + self._e)[:k]
+        return y
+
+    def _checked(self, e):
+        # Orders 1 and 2 run away at most polynomially (the integrators of a
+        # saturated error), so a check per block is enough
+        if max(abs(e[0]), abs(e[1])) > self.e_limit:
+            self.resets += 1
+            return [0.0] * len(e)
+        return e
+
+    def _loop_block(self, u, d):
+        lo, hi, limit = self.lo, self.hi, self.e_limit
+        y = [0.0] * len(u)
+        dl = [x + 0.5 for x in d.tolist()] if d is not None else [0.5] * len(u)
+        if self.order <= 2:
+            h1, h2 = (self.ntf[1:].tolist() + [0.0, 0.0])[:2]
+            e1, e2 = self._e[0], self._e[1]
+            if hi - lo == 1:
+                # Two levels (1 bit): rounding is a comparison
+                for i, (x, dd) in enumerate(zip(u.tolist(), dl)):
+                    v = x + h1 * e1 + h2 * e2
+                    q = hi if v + dd >= hi else lo
+                    y[i] = q
+                    e2, e1 = e1, q - v
+                self._e = self._checked([e1, e2])
+                return np.array(y, dtype=float)
+            for i, (x, dd) in enumerate(zip(u.tolist(), dl)):
+                v = x + h1 * e1 + h2 * e2
+                q = float(floor(v + dd))
+                if q < lo:
+                    q = lo
+                elif q > hi:
+                    q = hi
+                y[i] = q
+                e2, e1 = e1, q - v
+            self._e = self._checked([e1, e2])
+        else:
+            h = self.ntf[1:].tolist()
+            e = self._e
+            for i, (x, dd) in enumerate(zip(u.tolist(), dl)):
+                v = x
+                for hk, ek in zip(h, e):
+                    v += hk * ek
+                q = min(max(float(floor(v + dd)), lo), hi)
+                y[i] = q
+                e.insert(0, q - v)
+                e.pop()
+                if abs(e[0]) > limit:
+                    e = [0.0] * len(e)
+                    self.resets += 1
+            self._e = e
+        return np.array(y)
+
+
+class NoiseShaper:
+    """
+    Noise-shaped (and optionally dithered) requantization to the levels of
+    uniform_pcm(x, n_bits, V_min, V_max), clipped to codes 0 .. 2^n_bits - 1
+    inside the loop. order gives NTF = (1 - z^-1)^order (order 0 is plain
+    rounding); ntf overrides it.
+    """
+
+    def __init__(self, n_bits, V_min=-1, V_max=1, order=1, ntf=None, dither=None, rng=None):
+        self.n_bits = n_bits
+        self.V_min = V_min
+        self.delta = (V_max - V_min) / 2**n_bits
+        # Integer offset that centers the codes on 0 (smaller integrals)
+        self._center = 2**(n_bits - 1)
+        L = 2**n_bits
+        self.quantizer = ErrorFeedbackQuantizer(
+            binomial_ntf(order) if ntf is None else ntf,
+            -self._center, L - 1 - self._center, dither, rng)
+
+    def encode(self, x):
+        """
+        Integer codes 0 .. 2^n_bits - 1 of a block (pcm_encode layout).
+        """
+        u = (np.asarray(x, dtype=float) - self.V_min) / self.delta - self._center
+        codes = self.quantizer.process(u) + self._center
+        return codes.astype(np.min_scalar_type(2**self.n_bits - 1))
+
+    def process(self, x):
+        """
+        Quantized levels of a block.
+        """
+        return self.encode(x) * self.delta + self.V_min
+
+
+class SigmaDelta:
+    """
+    Sigma-delta modulator with `levels` output levels spread evenly over
+    [-full_scale, full_scale] (levels=2: 1 bit, +-full_scale) and NTF
+    (1 - z^-1)^order, or a given ntf. process returns codes 0 .. levels-1;
+    values() maps codes (or their decimated averages) back to volts.
+
+    With one bit, order 1 runs vectorized and order 2 in the scalar loop.
+    Order 2 loses in-band SNR above about 0.8 of full scale. Higher orders
+    need more levels, or an ntf with less out-of-band gain.
+    """
+
+    def __init__(self, order=2, levels=2, full_scale=1.0, ntf=None):
+        self.order = order
+        self.levels = levels
+        self.full_scale = full_scale
+        self.step = 2 * full_scale / (levels - 1)
+        self._center = (levels - 1) // 2
+        self.quantizer = ErrorFeedbackQuantizer(
+            binomial_ntf(order) if ntf is None else ntf,
+            -self._center, levels - 1 - self._center)
+
+    def process(self, x):
+        """
+        Output codes of a block; the loop state carries over.
+        """
+        u = (np.asarray(x, dtype=float) + self.full_scale) / self.step - self._center
+        codes = self.quantizer.process(u) + self._center
+        return codes.astype(np.min_scalar_type(self.levels - 1))
+
+    def values(self, codes):
+        return np.asarray(codes) * self.step - self.full_scale
+
+
+class CICDecimator:
+    """
+    Cascaded integrator-comb decimator (sinc^order response) by R of an
+    integer stream, in wrapping int64 arithmetic as in hardware. process
+    returns the averages (gain R^order divided out) of every R input
+    samples; integrators, combs and the decimation phase carry over.
+    """
+
+    def __init__(self, R, order=3):
+        self.R = R
+        self.order = order
+        self.gain = float(R)**order
+        self._integrators = np.zeros(order, dtype=np.int64)
+        self._combs = np.zeros(order, dtype=np.int64)
+        self._phase = 0                         # inputs since the last output
+
+    @profiled
+    def process(self, x):
+        s = np.asarray(x).astype(np.int64)
+        for k in range(self.order):
+            s = np.cumsum(s)
+            s += self._integrators[k]
+            if len(s):
+                self._integrators[k] = s[-1]
+        first = self.R - 1 - self._phase
+        v = s[first::self.R]
+        self._phase = (self._phase + len(s)) % self.R
+        for k in range(self.order):
+            prev = self._combs[k]
+            if len(v):
+                self._combs[k] = v[-1]
+                v = np.diff(v, prepend=prev)
+        return v / self.gain
+
+
+def cic_decimate(x, R, order=3):
+    """
+    One-shot CICDecimator(R, order).process(x).
+    """
+    return CICDecimator(R, order).process(x)
+
+
+def _blackman_harris(n):
+    k = 2 * np.pi * np.arange(n) / n
+    return 0.35875 - 0.48829 * np.cos(k) + 0.14128 * np.cos(2 * k) - 0.01168 * np.cos(3 * k)
+
+
+def inband_snr_db(y, fs, f_signal, band, guard=4):
+    """
+    Spectral SNR of a tone at f_signal within 0 .. band: Blackman-Harris
+    windowed power spectrum, signal = the bins within guard of the tone,
+    noise = every other bin up to band (DC bins excluded).
+    """
+    y = np.asarray(y, dtype=float)
+    P = np.abs(np.fft.rfft((y - y.mean()) * _blackman_harris(len(y))))**2
+    f = np.fft.rfftfreq(len(y), 1 / fs)
+    k0 = int(round(f_signal * len(y) / fs))
+    k = np.arange(len(P))
+    signal = np.abs(k - k0) <= guard
+    noise = (k > guard) & (f <= band) & ~signal
+    return float(10 * np.log10(P[signal].sum() / P[noise].sum()))
+
+
+def benchmark_noise_shaping(n_samples=2**20, osr=64, seed=0):
+    """
+    Msample/s and in-band SNR of every loop on a -6 dBFS tone at
+    fs / (2 osr) / 5, one block of n_samples.
+    """
+    rng = np.random.default_rng(seed)
+    fs = 1.0
+    band = fs / (2 * osr)
+    f0 = round(band / 5 * n_samples) / n_samples
+    x = 0.5 * np.sin(2 * np.pi * f0 * np.arange(n_samples))
+    cases = [
+        ('TPDF dither, 8-bit', lambda: dithered_pcm(x, 8, rng=rng)[0]),
+        ('Shaper order 2, 16-bit', lambda: NoiseShaper(16, order=2, dither='tpdf', rng=rng).process(x)),
+        ('Shaper order 3, 8-bit', lambda: NoiseShaper(8, order=3).process(x)),
+        ('SDM order 1, 1-bit', lambda: SigmaDelta(1, 2).process(x)),
+        ('SDM order 2, 1-bit', lambda: SigmaDelta(2, 2).process(x)),
+        ('SDM order 2, 3-bit', lambda: SigmaDelta(2, 8).process(x)),
+    ]
+    print(f"{n_samples} samples, tone at {f0:.2e} fs, band {band:.2e} fs (OSR {osr})")
+    print(f"{'Loop':<26}{'Msample/s':>10}{'in-band SNR (dB)':>18}")
+    rows = {}
+    for name, fn in cases:
+        t0 = time.perf_counter()
+        y = fn()
+        seconds = time.perf_counter() - t0
+        # Codes are an affine map of the levels: same SNR
+        rows[name] = (n_samples / seconds / 1e6, inband_snr_db(y, fs, f0, band))
+        print(f"{name:<26}{rows[name][0]:>10.2f}{rows[name][1]:>18.1f}")
+    codes = SigmaDelta(2, 2).process(x)
+    t0 = time.perf_counter()
+    cic_decimate(codes, osr, 3)
+    seconds = time.perf_counter() - t0
+    rows['CIC order 3'] = (n_samples / seconds / 1e6, None)
+    print(f"{'CIC order 3, R = ' + str(osr):<26}{rows['CIC order 3'][0]:>10.2f}")
+    return rows
+
+
+if __name__ == '__main__':
+    benchmark_noise_shaping(int(float(sys.argv[1])) if len(sys.argv) > 1 else 2**20)
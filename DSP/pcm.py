@@ -0,0 +1,121 @@
+# Pulse Code Modulation Kernels
+# Uniform quantization, SNR measurement and binary code words
+# (used by Sampling/PCM.py).
+#
+# The code words can also be kept as a packed bitstream for the line coders
+# in DSP.linecode (MSB first, 8 bits per byte, as np.packbits):
+#
+#   codes = pcm_encode(x, 8, -1.2, 1.2)        # integer indices 0 .. 255
+#   packed = pack_codes(codes, 8)              # uint8, len(codes) * 8 bits
+#   codes = unpack_codes(packed, 8, len(codes))
+
+import numpy as np
+
+from DSP.profiling import profiled
+
+
+@profiled
+def uniform_pcm(x, n_bits, V_min=-1, V_max=1):
+    """
+    Applies uniform PCM quantization to a signal.
+    """
+    # 1. Levels
+    L = 2**n_bits
+
+    # 2. Step Size (Delta)
+    delta = (V_max - V_min) / L
+
+    # 3. Quantization
+    # x_norm ranges roughly 0 to L
+    x_norm = (x - V_min) / delta
+    x_q_int = np.round(x_norm)
+
+    # Clip to valid limits [0, L-1]
+    # In mid-tread or mid-rise, getting exact boundary handling is key for SNR
+    # This maps to integer indices
+    x_q_int = np.clip(x_q_int, 0, L - 1)
+
+    # Reconstruction
+    x_q = x_q_int * delta + V_min
+
+    return x_q, delta
+
+
+def calculate_snr_db(signal, noise):
+    power_s = np.mean(signal**2)
+    power_n = np.mean(noise**2)
+    if power_n == 0: return float('inf')
+    return 10 * np.log10(power_s / power_n)
+
+
+def get_binary_codes(x_val, n_bits, V_min, V_max):
+    # Code one sample as a binary string
+    L = 2**n_bits
+    delta = (V_max - V_min) / L
+    x_norm = (x_val - V_min) / delta
+    idx = int(np.clip(np.round(x_norm), 0, L-1))
+    return format(idx, f'0{n_bits}b')
+
+
+@profiled
+def pcm_encode(x, n_bits, V_min=-1, V_max=1):
+    """
+    Quantization indices 0 .. 2^n_bits - 1 of uniform_pcm (same rounding
+    and clipping), in the smallest unsigned integer dtype that holds them.
+    """
+    L = 2**n_bits
+    delta = (V_max - V_min) / L
+    idx = np.clip(np.round((np.asarray(x) - V_min) / delta), 0, L - 1)
+    return idx.astype(np.min_scalar_type(L - 1))
+
+
+def pcm_decode(codes, n_bits, V_min=-1, V_max=1):
+    """
+    Reconstruction levels of quantization indices (inverse of pcm_encode).
+    """
+    delta = (V_max - V_min) / 2**n_bits
+    return np.asarray(codes) * delta + V_min
+
+
+def _code_chunks(n_codes, n_bits, chunk_bits=2**23):
+    # Code ranges of about chunk_bits bits that start on a byte boundary
+    step = max(chunk_bits // (8 * n_bits), 1) * 8
+    return [(i, min(i + step, n_codes)) for i in range(0, n_codes, step)]
+
+
+@profiled
+def pack_codes(codes, n_bits):
+    """
+    Packs n_bits-bit code words MSB first into a uint8 bitstream
+    (np.packbits layout). Works in chunks, so 10^8-bit streams never
+    materialize one byte per bit.
+    """
+    codes = np.asarray(codes)
+    if n_bits == 8 and codes.dtype == np.uint8:
+        return codes.copy()
+    shifts = np.arange(n_bits - 1, -1, -1)
+    out = np.empty(-(-len(codes) * n_bits // 8), dtype=np.uint8)
+    for i, j in _code_chunks(len(codes), n_bits):
+        bits = ((codes[i:j, None] >> shifts) & 1).astype(np.uint8)
+        packed = np.packbits(bits.ravel())
+        out[i * n_bits // 8:i * n_bits // 8 + len(packed)] = packed
+    return out
+
+
+@profiled
+def unpack_codes(packed, n_bits, count):
+    """
+    The first `count` code words of a packed bitstream (inverse of
+    pack_codes).
+    """
+    packed = np.asarray(packed, dtype=np.uint8)
+    dtype = np.min_scalar_type(2**n_bits - 1)
+    if n_bits == 8:
+        return packed[:count].copy()
+    weights = (1 << np.arange(n_bits - 1, -1, -1)).astype(dtype)
+    out = np.empty(count, dtype=dtype)
+    for i, j in _code_chunks(count, n_bits):
+        b0 = i * n_bits // 8
+        bits = np.unpackbits(packed[b0:b0 + -(-(j - i) * n_bits // 8)], count=(j - i) * n_bits)
+        out[i:j] = bits.reshape(j - i, n_bits).astype(dtype) @ weights
+    return out
@@ -0,0 +1,371 @@
+# Streaming Link Pipelines
+# A continuous source -> transmitter -> channel -> receiver -> sink link,
+# run as asyncio tasks joined by bounded queues of NumPy blocks:
+#
+#   pipe = am_pipeline(cnr_db=20)                      # Lab 2 AM at 400 kHz
+#   metrics = pipe.run(seconds=5, report_every=0.5)    # a live metrics line twice a second
+#   pipe = pcm_pipeline(n_bits=8, ebn0_db=8, rate=48000)   # paced to real time
+#
+#   pipe = Pipeline(blocks, [Stage('modulate', link.modulate), Stage('channel', ...),
+#                            Stage('demodulate', link.demodulate)], sink, queue_size=4)
+#   metrics = await pipe.arun(seconds=10)              # inside a running event loop
+#
+# Each stage is a task. It takes a block from its input queue and runs its
+# function, either inline on the event loop (offload=None) or through
+# run_in_executor in a thread pool ('thread') or a process pool ('process',
+# for stateless picklable functions only). The result goes to its output
+# queue. Every queue holds at most queue_size blocks, so a slow stage
+# stalls the stages before it and finally the source (backpressure). Memory
+# is therefore bounded by the queue sizes for any run length. A stage
+# handles one block at a time, so blocks stay in order and the stateful
+# DSP.streaming links see them in sequence. Thread-pool stages overlap
+# where NumPy and SciPy release the GIL.
+# With `rate`, the source is paced to that many samples/s, as a live
+# receiver would be. Without it, the link runs as fast as it can.
+# Pipeline.metrics() (printed every report_every seconds) gives:
+#   - throughput in source samples/s at the sink;
+#   - each queue's current depth, and the mean and maximum depth that
+#     arriving blocks found;
+#   - each stage's busy time (wall time per block, including waiting for
+#     the CPU when threads compete) and its share of the run;
+#   - the time the source spent blocked;
+#   - the source-to-sink latency of the last 1000 blocks (mean, p50, p95, max);
+#   - whatever the sink measures (the chains' SNR and BER).
+# `python -m DSP.pipeline` runs both chains flat out and in real time.
+
+import collections
+import functools
+import sys
+import time
+
+import numpy as np
+
+OFFLOAD = (None, 'thread', 'process')
+_END = None                       # end-of-stream marker passed down the queues
+
+
+class Block:
+    """
+    A block on its way through the pipeline: its data, the source block it
+    came from (ref), sequence number and creation time.
+    """
+
+    __slots__ = ('seq', 'data', 'ref', 't0')
+
+    def __init__(self, seq, data, ref, t0):
+        self.seq, self.data, self.ref, self.t0 = seq, data, ref, t0
+
+
+class Stage:
+    """
+    A named block function data -> data. offload: None (on the event loop),
+    'thread' or 'process'. Stateful stages (bound methods) cannot run in a
+    process pool, where their state would stay in the worker's copy.
+    """
+
+    def __init__(self, name, fn, offload='thread'):
+        if offload not in OFFLOAD:
+            raise ValueError(f'offload must be one of {OFFLOAD}, got {offload!r}')
+        if offload == 'process' and hasattr(fn, '__self__'):
+            raise ValueError(f'Stage {name!r}: a bound method keeps state, use offload="thread"')
+        self.name, self.fn, self.offload = name, fn, offload
+        self.blocks = 0
+        self.busy = 0.0
+
+
+class Pipeline:
+    """
+    source (an iterable of 1-D arrays) -> stages -> sink (called with each
+    finished Block), connected by queues of queue_size blocks.
+    """
+
+    def __init__(self, source, stages, sink, queue_size=4, rate=None, name='pipeline'):
+        self.source = source
+        self.stages = list(stages)
+        self.sink = sink
+        self.queue_size = queue_size
+        self.rate = rate
+        self.name = name
+        self._reset()
+
+    def _reset(self):
+        self.blocks = 0
+        self.samples = 0
+        self.stalled = 0.0
+        self._latency = collections.deque(maxlen=1000)
+        self._depth = [[0, 0, 0] for _ in range(len(self.stages) + 1)]     # sum, count, max
+        self._queues = []
+        self._t_start = self._t_stop = None
+        for stage in self.stages:
+            stage.blocks, stage.busy = 0, 0.0
+
+    async def _put(self, i, queue, item):
+        # Depth statistics: the blocks each new one finds waiting ahead of it
+        depth, stats = queue.qsize(), self._depth[i]
+        stats[0] += depth
+        stats[1] += 1
+        stats[2] = max(stats[2], depth)
+        t = time.perf_counter()
+        await queue.put(item)
+        if i == 0:
+            self.stalled += time.perf_counter() - t
+
+    async def _produce(self, queue, seconds):
+        import asyncio
+        t_end = None if seconds is None else self._t_start + seconds
+        emitted = 0
+        for seq, data in enumerate(self.source):
+            now = time.perf_counter()
+            if t_end is not None and now >= t_end:
+                break
+            if self.rate:
+                due = self._t_start + emitted / self.rate
+                if due > now:
+                    await asyncio.sleep(due - now)
+            data = np.asarray(data)
+            await self._put(0, queue, Block(seq, data, data, time.perf_counter()))
+            emitted += len(data)
+        await queue.put(_END)
+
+    async def _work(self, i, stage, inbox, outbox, executors):
+        import asyncio
+        loop = asyncio.get_running_loop()
+        while True:
+            block = await inbox.get()
+            if block is _END:
+                await outbox.put(_END)
+                return
+            t = time.perf_counter()
+            if stage.offload is None:
+                block.data = stage.fn(block.data)
+            else:
+                block.data = await loop.run_in_executor(executors[stage.offload], stage.fn, block.data)
+            stage.busy += time.perf_counter() - t
+            stage.blocks += 1
+            await self._put(i, outbox, block)
+
+    async def _consume(self, queue):
+        while True:
+            block = await queue.get()
+            if block is _END:
+                return
+            self.sink(block)
+            self.blocks += 1
+            self.samples += len(block.ref)
+            self._latency.append(time.perf_counter() - block.t0)
+
+    async def _report(self, every, report):
+        import asyncio
+        while True:
+            await asyncio.sleep(every)
+            report(format_metrics(self.metrics()))
+
+    async def arun(self, seconds=None, report_every=None, report=print):
+        """
+        Runs until the source is exhausted (or for `seconds`), printing
+        format_metrics lines every report_every seconds. Returns metrics().
+        """
+        import asyncio                    # ~40 ms to import: only when a pipeline runs
+        from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+        self._reset()
+        self._queues = [asyncio.Queue(self.queue_size) for _ in range(len(self.stages) + 1)]
+        pools = collections.Counter(stage.offload for stage in self.stages if stage.offload)
+        executors = {}
+        if pools['thread']:
+            executors['thread'] = ThreadPoolExecutor(pools['thread'], thread_name_prefix=self.name)
+        if pools['process']:
+            executors['process'] = ProcessPoolExecutor(pools['process'])
+        self._t_start = time.perf_counter()
+        q = self._queues
+        tasks = [asyncio.create_task(self._produce(q[0], seconds))]
+        tasks += [asyncio.create_task(self._work(i + 1, stage, q[i], q[i + 1], executors))
+                  for i, stage in enumerate(self.stages)]
+        tasks.append(asyncio.create_task(self._consume(q[-1])))
+        if report_every:
+            tasks.append(asyncio.create_task(self._report(report_every, report)))
+        try:
+            # The reporter never finishes: wait for the data tasks only
+            await asyncio.gather(*tasks[:len(self.stages) + 2])
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            for executor in executors.values():
+                executor.shutdown(wait=True)
+            self._t_stop = time.perf_counter()
+        return self.metrics()
+
+    def run(self, seconds=None, report_every=None, report=print):
+        """
+        arun in a new event loop (asyncio.run).
+        """
+        import asyncio
+        return asyncio.run(self.arun(seconds, report_every, report))
+
+    def metrics(self):
+        """
+        Throughput, queue depths, stage loads and latency so far (see the
+        header), as a dict.
+        """
+        if self._t_start is None:
+            return {}
+        elapsed = (self._t_stop or time.perf_counter()) - self._t_start
+        latency = np.array(self._latency) * 1e3
+        names = ['source'] + [stage.name for stage in self.stages]
+        return {
+            'name': self.name, 'seconds': elapsed, 'blocks': self.blocks, 'samples': self.samples,
+            'samples_per_s': self.samples / elapsed if elapsed > 0 else 0.0,
+            'stalled_s': self.stalled,
+            'queues': [{'after': name, 'depth': queue.qsize(), 'max': d[2],
+                        'mean': d[0] / d[1] if d[1] else 0.0}
+                       for name, queue, d in zip(names, self._queues, self._depth)],
+            'stages': [{'name': s.name, 'offload': s.offload, 'blocks': s.blocks, 'busy_s': s.busy,
+                        'load': s.busy / elapsed if elapsed > 0 else 0.0,
+                        'ms_per_block': 1e3 * s.busy / s.blocks if s.blocks else 0.0}
+                       for s in self.stages],
+            'latency_ms': {key: float(fn(latency)) if len(latency) else float('nan')
+                           for key, fn in (('mean', np.mean), ('p50', np.median),
+                                           ('p95', functools.partial(np.percentile, q=95)),
+                                           ('max', np.max))},
+            'sink': self.sink.metrics() if hasattr(self.sink, 'metrics') else {},
+        }
+
+
+def format_metrics(m):
+    """
+    One status line of Pipeline.metrics().
+    """
+    queues = '/'.join(str(q['depth']) for q in m['queues'])
+    loads = ' '.join(f"{s['name']} {s['load']:.0%}" for s in m['stages'])
+    sink = ''.join(f'  {key} {value:.3g}' for key, value in m['sink'].items())
+    lat = m['latency_ms']
+    return (f"{m['name']} {m['seconds']:6.1f} s  {m['samples_per_s'] / 1e6:7.3f} Msample/s  "
+            f"queues {queues}  latency {lat['mean']:7.1f} ms (p95 {lat['p95']:.1f})  "
+            f"busy: {loads}{sink}")
+
+
+class MeterSink:
+    """
+    Sink measuring the output SNR against the source blocks
+    (DSP.streaming.SNRMeter), plus any probes: name -> callable.
+    """
+
+    def __init__(self, delay=0, settle=0, **probes):
+        from DSP.streaming import SNRMeter
+        self.meter = SNRMeter(delay, settle)
+        self.probes = probes
+
+    def __call__(self, block):
+        self.meter.reference(block.ref)
+        self.meter.output(block.data)
+
+    def metrics(self):
+        return dict({'snr_db': self.meter.snr_db()}, **{key: fn() for key, fn in self.probes.items()})
+
+
+def tone_source(f, fs, block, amplitude=1.0, blocks=None):
+    """
+    Blocks of amplitude * cos(2 pi f n / fs), phase carried; endless
+    unless `blocks` is given.
+    """
+    step = 2 * np.pi * f / fs
+    phase, count = 0.0, 0
+    while blocks is None or count < blocks:
+        yield amplitude * np.cos(phase + step * np.arange(block))
+        phase = (phase + step * block) % (2 * np.pi)
+        count += 1
+
+
+class LineCodeChannel:
+    """
+    PCM codes -> packed bits -> DSP.linecode.transmit_bits (line code,
+    AWGN at ebn0_db, matched filter, decisions) -> codes, counting bit
+    errors. Polar schemes only carry no state between blocks (AMI restarts
+    its polarity every block).
+    """
+
+    def __init__(self, n_bits, scheme='nrz', ebn0_db=8.0, sps=8, rng=None):
+        self.n_bits, self.scheme, self.ebn0_db, self.sps = n_bits, scheme, ebn0_db, sps
+        self.rng = np.random.default_rng() if rng is None else rng
+        self.bits = 0
+        self.errors = 0
+
+    def __call__(self, codes):
+        from DSP.linecode import transmit_bits
+        from DSP.pcm import pack_codes, unpack_codes
+        n = len(codes) * self.n_bits
+        packed, stats = transmit_bits(pack_codes(codes, self.n_bits), n, self.scheme, self.ebn0_db,
+                                      self.sps, rng=self.rng)
+        self.bits += n
+        self.errors += stats['errors']
+        return unpack_codes(packed, self.n_bits, len(codes))
+
+    def ber(self):
+        return self.errors / self.bits if self.bits else 0.0
+
+
+def am_pipeline(cnr_db=20.0, block=16384, fm=1000, rate=None, queue_size=4, seed=0,
+                offload='thread', channel_offload=None):
+    """
+    Lab 2 AM: a 1 kHz tone at fs = 400 kHz (ka = 0.8), AMLink.modulate,
+    AWGN at cnr_db over B_T = 2 x the 5 kHz receiver cutoff (None: no
+    noise), AMLink.demodulate, SNR at the sink. channel_offload (default:
+    offload) may be 'process', with fresh noise entropy in every call.
+    """
+    from DSP.channel import awgn, noise_density
+    from DSP.streaming import AMLink
+    link = AMLink()
+    channel_offload = offload if channel_offload is None else channel_offload
+    stages = [Stage('modulate', link.modulate, offload)]
+    if cnr_db is not None:
+        power = link.Ac**2 / 2 * (1 + link.ka**2 / 2)
+        n0 = noise_density(power, cnr_db, 2 * 5000)
+        rng = None if channel_offload == 'process' else np.random.default_rng(seed)
+        stages.append(Stage('channel', functools.partial(awgn, n0=n0, fs=link.fs, rng=rng), channel_offload))
+    stages.append(Stage('demodulate', link.demodulate, offload))
+    sink = MeterSink(delay=int(round(link.delay)), settle=int(0.002 * link.fs))
+    return Pipeline(tone_source(fm, link.fs, block), stages, sink, queue_size, rate, name='am')
+
+
+def pcm_pipeline(n_bits=8, ebn0_db=8.0, scheme='nrz', fs=48000, f=1000, block=4096, order=0,
+                 dither=None, rate=None, queue_size=4, seed=0, offload='thread'):
+    """
+    PCM: a tone at fs, PCMLink.encode (optionally dithered / noise-shaped),
+    a LineCodeChannel at ebn0_db, PCMLink.decode; SNR and BER at the sink.
+    """
+    from DSP.streaming import PCMLink
+    rng = np.random.default_rng(seed)
+    link = PCMLink(n_bits, order=order, dither=dither, rng=rng)
+    channel = LineCodeChannel(n_bits, scheme, ebn0_db, rng=rng)
+    stages = [Stage('encode', link.encode, offload), Stage('channel', channel, offload),
+              Stage('decode', link.decode, offload)]
+    return Pipeline(tone_source(f, fs, block, amplitude=0.9), stages, MeterSink(ber=channel.ber),
+                    queue_size, rate, name='pcm')
+
+
+def benchmark_pipelines(seconds=3.0, report_every=1.0):
+    """
+    Both chains flat out (throughput, queues full, latency set by the
+    backpressure), then paced to real time (queues near empty, latency of
+    about one pass through the stages).
+    """
+    runs = [('AM, flat out', am_pipeline()), ('AM, real time 400 kHz', am_pipeline(rate=400e3)),
+            ('PCM, flat out', pcm_pipeline()), ('PCM, real time 48 kHz', pcm_pipeline(rate=48e3))]
+    results = {}
+    for title, pipe in runs:
+        print(title)
+        m = pipe.run(seconds, report_every)
+        lat = m['latency_ms']
+        depths = '/'.join(f"{q['mean']:.1f}" for q in m['queues'])
+        sink = ', '.join(f'{key} {value:.3g}' for key, value in m['sink'].items())
+        print(f"  {m['samples_per_s'] / 1e6:.3f} Msample/s, latency mean {lat['mean']:.1f} ms / "
+              f"p95 {lat['p95']:.1f} ms, mean queue depths {depths}, "
+              f"source blocked {m['stalled_s'] / m['seconds']:.0%}, {sink}")
+        results[title] = m
+    return results
+
+
+if __name__ == '__main__':
+    import os
+    sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+    benchmark_pipelines()
@@ -0,0 +1,99 @@
+# Plotting Helpers for Long Signals
+# Matplotlib draws (and savefig rasterizes) every point it is given, even
+# the ones outside the x-limits or closer together than one pixel. These
+# helpers hand it only what can be seen:
+#
+#   from DSP.plotting import plot_decimated, axvlines
+#
+#   plot_decimated(t, x_t, 'b', xlim=(0, 0.2))   # clip + min/max per pixel
+#   axvlines(np.arange(40) * Ts, xlim=(0, 0.2), color='k', linestyle=':')
+#
+# Min/max decimation keeps the smallest and largest sample of every pixel
+# column (in time order), so peaks, pulse edges and spectral lines are drawn
+# exactly where the full-resolution line would put them. x must be sorted.
+# matplotlib is only imported when no axes is passed in.
+
+import numpy as np
+
+
+def clip_to_range(x, y, x_min=None, x_max=None):
+    """
+    Views of x and y limited to [x_min, x_max], plus one sample beyond each
+    end so the line still runs to the edges of the axes. x must be sorted.
+    """
+    lo = 0 if x_min is None else max(np.searchsorted(x, x_min, 'right') - 1, 0)
+    hi = len(x) if x_max is None else min(np.searchsorted(x, x_max, 'left') + 1, len(x))
+    return x[lo:hi], y[lo:hi]
+
+
+def minmax_decimate(x, y, max_points):
+    """
+    Reduces (x, y) to at most max_points samples: y is split into
+    max_points // 2 equal bins and the minimum and maximum of each bin are
+    kept, in their original order. Returns (x, y) unchanged if short enough.
+    """
+    n = len(y)
+    bins = max(max_points // 2, 1)
+    if n <= max(max_points, 2):
+        return x, y
+    k = -(-n // bins)                 # samples per bin (ceil)
+    m = n // k                        # full bins; the rest forms a last bin
+    blocks = y[:m * k].reshape(m, k)
+    pair = np.sort(np.stack((blocks.argmin(axis=1), blocks.argmax(axis=1)), axis=1), axis=1)
+    idx = (pair + (np.arange(m) * k)[:, None]).ravel()
+    if m * k < n:
+        tail = y[m * k:]
+        idx = np.concatenate((idx, m * k + np.sort([tail.argmin(), tail.argmax()])))
+    return x[idx], y[idx]
+
+
+def _axes(ax):
+    if ax is None:
+        import matplotlib.pyplot as plt
+        ax = plt.gca()
+    return ax
+
+
+def axes_pixel_width(ax):
+    """
+    Width of the axes in pixels at the figure's dpi.
+    """
+    return int(np.ceil(ax.get_window_extent().width))
+
+
+def plot_decimated(x, y, *args, ax=None, xlim=None, max_points=None, **kwargs):
+    """
+    ax.plot(x, y, *args, **kwargs) with the data clipped to xlim (which is
+    also applied to the axes) and min/max decimated to max_points (default:
+    two per pixel column of the axes). Returns the list of Line2D.
+
+    The y autoscaling still covers the whole line, as it would without
+    clipping, so the figure looks the same as with a plain plot + xlim.
+    """
+    ax = _axes(ax)
+    x = np.asarray(x)
+    y = np.asarray(y)
+    if xlim is not None:
+        ax.set_xlim(xlim)
+        y_full = (np.nanmin(y), np.nanmax(y)) if len(y) else None
+        x, y = clip_to_range(x, y, *xlim)
+    if max_points is None:
+        max_points = 2 * axes_pixel_width(ax)
+    x, y = minmax_decimate(x, y, max_points)
+    lines = ax.plot(x, y, *args, **kwargs)
+    if xlim is not None and y_full is not None and len(x):
+        ax.update_datalim([(x[0], y_full[0]), (x[0], y_full[1])], updatex=False)
+        ax.autoscale_view(scalex=False)
+    return lines
+
+
+def axvlines(xs, ax=None, xlim=None, **kwargs):
+    """
+    Full-height vertical lines at every x in xs, drawn as one LineCollection
+    instead of one axvline artist per line. Lines outside xlim are dropped.
+    """
+    ax = _axes(ax)
+    xs = np.asarray(xs, dtype=float)
+    if xlim is not None:
+        xs = xs[(xs >= xlim[0]) & (xs <= xlim[1])]
+    return ax.vlines(xs, 0, 1, transform=ax.get_xaxis_transform(), **kwargs)
@@ -0,0 +1,223 @@
+# Per-Stage Profiling Hooks
+# Wall time, call count and array sizes for named stages of a simulation:
+#
+#   from DSP.profiling import profiled, stage
+#
+#   @profiled                       # every call is a 'pulse.ppm_to_pwm' event
+#   def ppm_to_pwm(...): ...
+#
+#   with stage('plot', x_t):        # any block, optionally with its arrays
+#       plt.plot(t, x_t)
+#
+# Profiling is off by default: stage() then returns a shared no-op context
+# manager and @profiled wrappers make one flag check before calling through,
+# so the hooks can stay in the kernels. Turn it on with enable(), or for a
+# whole script run with environment variables:
+#
+#   DSP_PROFILE=1 python PPM.py                         # summary table at exit
+#   DSP_PROFILE=1 DSP_PROFILE_TRACE=ppm.json python PPM.py   # + Chrome trace
+#
+# The Chrome trace (chrome://tracing or https://ui.perfetto.dev) shows every
+# call on a timeline, nested stages included. `python -m Tools.run_all
+# --profile` does the same for every simulation and also times savefig().
+
+import atexit
+import functools
+import json
+import os
+import sys
+import threading
+import time
+
+import numpy as np
+
+_enabled = os.environ.get('DSP_PROFILE', '') not in ('', '0')
+_events = []    # (name, start_ns, duration_ns, thread id, info dict)
+
+
+def enable(flag=True):
+    global _enabled
+    _enabled = bool(flag)
+
+
+def is_enabled():
+    return _enabled
+
+
+def reset():
+    """
+    Drops all recorded events.
+    """
+    _events.clear()
+
+
+def events():
+    return list(_events)
+
+
+def _nbytes(obj):
+    # Bytes of the arrays in obj (an array, or a tuple / list / dict of them)
+    if isinstance(obj, np.ndarray):
+        return obj.nbytes
+    if isinstance(obj, (tuple, list)):
+        return sum(x.nbytes for x in obj if isinstance(x, np.ndarray))
+    if isinstance(obj, dict):
+        return sum(x.nbytes for x in obj.values() if isinstance(x, np.ndarray))
+    return 0
+
+
+def _samples(objs):
+    return max((x.size for x in objs if isinstance(x, np.ndarray)), default=0)
+
+
+class _NullStage:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def add(self, **info):
+        pass
+
+
+_NULL_STAGE = _NullStage()
+
+
+class _Stage:
+    __slots__ = ('name', 'info', 't0')
+
+    def __init__(self, name, info):
+        self.name = name
+        self.info = info
+
+    def __enter__(self):
+        self.t0 = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc):
+        _events.append((self.name, self.t0, time.perf_counter_ns() - self.t0,
+                        threading.get_ident(), self.info))
+        return False
+
+    def add(self, **info):
+        """
+        Attaches extra info (e.g. bytes_out=y.nbytes) to the event.
+        """
+        self.info.update(info)
+
+
+def stage(name, *arrays, **info):
+    """
+    Context manager timing one named stage. Arrays passed in are recorded as
+    bytes_in / samples; keyword arguments are stored as they are.
+    """
+    if not _enabled:
+        return _NULL_STAGE
+    if arrays:
+        info['bytes_in'] = _nbytes(arrays)
+        info['samples'] = _samples(arrays)
+    return _Stage(name, info)
+
+
+def profiled(fn=None, *, name=None):
+    """
+    Decorator recording every call of fn as a stage named
+    '<module>.<function>' (or `name`; a script's functions use the script
+    name), with the bytes of its array
+    arguments and results and the longest input array.
+    """
+    def decorate(fn):
+        module = fn.__module__.rsplit('.', 1)[-1]
+        if module == '__main__':
+            module = os.path.splitext(os.path.basename(fn.__code__.co_filename))[0]
+        label = name or f"{module}.{fn.__name__}"
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return fn(*args, **kwargs)
+            t0 = time.perf_counter_ns()
+            out = fn(*args, **kwargs)
+            duration = time.perf_counter_ns() - t0
+            inputs = args + tuple(kwargs.values())
+            _events.append((label, t0, duration, threading.get_ident(),
+                            {'bytes_in': _nbytes(inputs), 'bytes_out': _nbytes(out),
+                             'samples': _samples(inputs)}))
+            return out
+        return wrapper
+
+    return decorate(fn) if fn is not None else decorate
+
+
+def summary(evts=None):
+    """
+    One row per stage name, slowest total first: calls, total_s, mean_s,
+    max_s, samples (largest input), mb_in / mb_out (summed over calls).
+    """
+    rows = {}
+    for name, _, duration, _, info in (_events if evts is None else evts):
+        r = rows.setdefault(name, {'name': name, 'calls': 0, 'total_s': 0.0, 'max_s': 0.0,
+                                   'samples': 0, 'mb_in': 0.0, 'mb_out': 0.0})
+        r['calls'] += 1
+        r['total_s'] += duration / 1e9
+        r['max_s'] = max(r['max_s'], duration / 1e9)
+        r['samples'] = max(r['samples'], info.get('samples', 0))
+        r['mb_in'] += info.get('bytes_in', 0) / 2**20
+        r['mb_out'] += info.get('bytes_out', 0) / 2**20
+    for r in rows.values():
+        r['mean_s'] = r['total_s'] / r['calls']
+    return sorted(rows.values(), key=lambda r: r['total_s'], reverse=True)
+
+
+def print_summary(evts=None, file=None):
+    """
+    Prints the summary table. Times are inclusive (a stage's time contains
+    the stages nested in it); % is relative to the span of all events.
+    """
+    evts = _events if evts is None else evts
+    if not evts:
+        print('No profiling events recorded (is profiling enabled?)', file=file)
+        return
+    span = (max(e[1] + e[2] for e in evts) - min(e[1] for e in evts)) / 1e9
+    print(f"{'Stage':<34}{'calls':>7}{'total (ms)':>12}{'mean (ms)':>11}{'max (ms)':>10}"
+          f"{'%':>7}{'samples':>11}{'MB in':>9}{'MB out':>9}", file=file)
+    for r in summary(evts):
+        print(f"{r['name']:<34}{r['calls']:>7}{r['total_s'] * 1e3:>12.2f}{r['mean_s'] * 1e3:>11.3f}"
+              f"{r['max_s'] * 1e3:>10.2f}{100 * r['total_s'] / span:>7.1f}{r['samples']:>11}"
+              f"{r['mb_in']:>9.1f}{r['mb_out']:>9.1f}", file=file)
+    print(f"{'(span)':<34}{'':>7}{span * 1e3:>12.2f}", file=file)
+
+
+def chrome_trace(evts=None):
+    """
+    The events in Chrome trace-event format ('X' complete events, us).
+    """
+    pid = os.getpid()
+    return {'traceEvents': [
+        {'name': name, 'ph': 'X', 'ts': start / 1e3, 'dur': duration / 1e3,
+         'pid': pid, 'tid': tid, 'args': info}
+        for name, start, duration, tid, info in (_events if evts is None else evts)
+    ], 'displayTimeUnit': 'ms'}
+
+
+def write_chrome_trace(path, evts=None):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(chrome_trace(evts), f)
+
+
+def _report_at_exit():
+    if not _enabled or not _events:
+        return
+    print('\n--- DSP profile ---', file=sys.stderr)
+    print_summary(file=sys.stderr)
+    trace = os.environ.get('DSP_PROFILE_TRACE')
+    if trace:
+        write_chrome_trace(trace)
+        print(f'Chrome trace saved to {trace}', file=sys.stderr)
+
+
+if _enabled:
+    atexit.register(_report_at_exit)
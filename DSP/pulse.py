@@ -0,0 +1,114 @@
+# Pulse Modulation Kernels
+# Pulse trains for natural sampling and PWM / PPM generation and detection
+# on a high-resolution simulation grid (f_sim samples per second).
+
+import numpy as np
+
+from DSP.precision import real_dtype
+from DSP.profiling import profiled
+
+
+@profiled
+def natural_pulse_train(t, fs, tau):
+    """
+    Rectangular switching signal: 1 within tau/2 of every n/fs, else 0.
+    """
+    Ts = 1/fs
+    pulse_train = np.zeros_like(t)
+    for n in range(int(np.floor(t[0] * fs)) - 1, int(np.ceil(t[-1] * fs)) + 2):
+        center = n * Ts
+        # Find indices within [center - tau/2, center + tau/2]
+        # Use boolean mask for efficiency
+        mask = np.abs(t - center) <= tau/2
+        pulse_train[mask] = 1
+    return pulse_train
+
+
+@profiled
+def pwm_modulate(m_t, f_sim, fs, tau_0, kp_w, A=1):
+    """
+    Trailing-edge PWM: pulse n is ON from n*Ts to n*Ts + tau_n with
+    tau_n = tau_0 + kp_w * m(n*Ts), clipped to [0, Ts].
+    """
+    Ts = 1/fs
+    duration = len(m_t) / f_sim
+    pwm_signal = np.zeros(len(m_t), dtype=real_dtype())
+
+    num_pulses = int(duration / Ts)
+    for n in range(num_pulses):
+        # Sample message at start of period n*Ts
+        t_sample = n * Ts
+        if t_sample >= duration: break
+
+        # We need sample index in high res grid
+        idx = int(t_sample * f_sim)
+        sample_val = m_t[idx] if idx < len(m_t) else 0
+
+        # Calculate Pulse Width (within physical limits 0 < tau_n < Ts)
+        tau_n = np.clip(tau_0 + kp_w * sample_val, 0, Ts)
+
+        start_idx = idx
+        end_idx = start_idx + int(tau_n * f_sim)
+        if start_idx < len(m_t):
+            pwm_signal[start_idx : min(end_idx, len(m_t))] = A
+
+    return pwm_signal
+
+
+@profiled
+def ppm_modulate(m_t, f_sim, fs, tau, kp_p, A=1):
+    """
+    Shifted-center PPM: pulse n of fixed width tau is centred at
+    n*Ts + kp_p * m(n*Ts). Returns (ppm_signal, clock_ticks).
+    """
+    Ts = 1/fs
+    duration = len(m_t) / f_sim
+    N = len(m_t)
+    ppm_signal = np.zeros(N, dtype=real_dtype())
+    clock_ticks = np.zeros(N, dtype=real_dtype()) # For visualization
+
+    num_pulses = int(duration / Ts)
+    for n in range(num_pulses):
+        t_clock = n * Ts
+        if t_clock >= duration: break
+
+        idx_clock = int(t_clock * f_sim)
+        if idx_clock < N:
+            clock_ticks[idx_clock] = 1 # Marker
+
+        # Sample Message
+        sample_val = m_t[idx_clock] if idx_clock < N else 0
+
+        # Pulse exists in [t_center - tau/2, t_center + tau/2]
+        t_center = t_clock + kp_p * sample_val
+        idx_start = int((t_center - tau/2) * f_sim)
+        idx_end = int((t_center + tau/2) * f_sim)
+
+        if idx_start < N and idx_end > 0:
+            ppm_signal[max(0, idx_start) : min(N, idx_end)] = A
+
+    return ppm_signal, clock_ticks
+
+
+@profiled
+def ppm_to_pwm(ppm_signal, clock_period_samples):
+    """
+    PPM -> PWM conversion: set high at each clock tick, reset low at the
+    next PPM rising edge.
+    """
+    pwm_conv = np.zeros_like(ppm_signal)
+    current_state = 0
+
+    for i in range(1, len(ppm_signal)):
+        # 1. Synchronization (Clock Tick)
+        if (i % clock_period_samples) == 0:
+            current_state = 1
+
+        # 2. Reset on PPM Pulse (Rising Edge)
+        # Detect rising edge: current is high, previous was low
+        if ppm_signal[i] > 0.5 and ppm_signal[i-1] < 0.5 and current_state == 1:
+            current_state = 0
+
+        pwm_conv[i] = current_state
+
+    return pwm_conv
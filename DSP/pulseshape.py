@@ -0,0 +1,200 @@
+# Pulse Shaping and Eye Diagrams
+# Raised-cosine / root-raised-cosine pulses, a polyphase interpolator that
+# turns a symbol stream into a shaped waveform block by block, and an eye
+# diagram accumulator that folds a long waveform into a 2-D histogram:
+#
+#   h = raised_cosine(beta=0.35, sps=16, span=12)
+#   up = PolyphaseUpsampler(h, sps=16)
+#   eye = EyeDiagram(sps=16, delay=up.delay)
+#   for block in symbol_blocks:
+#       eye.update(up.process(block))
+#   eye.metrics()     # eye height, best sampling offset, RMS ISI
+#
+# Upsampling by zero insertion and then filtering would multiply every tap
+# by sps - 1 zeros out of sps. The polyphase form splits h into sps phases
+# of ceil(len(h) / sps) taps. Output sample n*sps + k is phase k applied to
+# the last few symbols, so each sample costs len(h) / sps multiply-adds.
+# The eye accumulator keeps one histogram and a few per-column statistics.
+# It never stores the traces, so the stream length is unbounded.
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+from DSP.precision import real_dtype
+from DSP.profiling import profiled
+
+
+def _pulse_time(sps, span):
+    # Tap times in symbol periods, span symbols long, centred on 0
+    n = span * sps
+    return (np.arange(n + 1) - n / 2) / sps
+
+
+def raised_cosine(beta, sps, span=12):
+    """
+    Raised-cosine pulse, span symbols long with sps samples per symbol,
+    h(0) = 1 and zeros at every other symbol instant (Nyquist pulse).
+    """
+    t = _pulse_time(sps, span)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        h = np.sinc(t) * np.cos(np.pi * beta * t) / (1 - (2 * beta * t)**2)
+    if beta > 0:
+        h[np.isclose(np.abs(t), 1 / (2 * beta))] = np.pi / 4 * np.sinc(1 / (2 * beta))
+    return h
+
+
+def root_raised_cosine(beta, sps, span=12):
+    """
+    Root-raised-cosine pulse with unit energy (sum h^2 = 1), so a matched
+    RRC pair gives a raised cosine with peak 1.
+    """
+    t = _pulse_time(sps, span)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        h = (np.sin(np.pi * t * (1 - beta)) + 4 * beta * t * np.cos(np.pi * t * (1 + beta))) \
+            / (np.pi * t * (1 - (4 * beta * t)**2))
+    h[t == 0] = 1 - beta + 4 * beta / np.pi
+    if beta > 0:
+        edge = np.isclose(np.abs(t), 1 / (4 * beta))
+        h[edge] = beta / np.sqrt(2) * ((1 + 2 / np.pi) * np.sin(np.pi / (4 * beta))
+                                       + (1 - 2 / np.pi) * np.cos(np.pi / (4 * beta)))
+    return h / np.sqrt(np.sum(h**2))
+
+
+class PolyphaseUpsampler:
+    """
+    Streaming interpolate-by-sps FIR: process(symbols) returns
+    len(symbols) * sps samples of sum_m symbols[m] h[n - m*sps], keeping the
+    last few symbols between calls. delay is the filter's group delay in
+    samples (where symbol 0's pulse peaks).
+    """
+
+    def __init__(self, h, sps):
+        h = np.asarray(h, dtype=float)
+        self.sps = sps
+        self.taps = -(-len(h) // sps)
+        padded = np.zeros(self.taps * sps)
+        padded[:len(h)] = h
+        # phases[k, m] = h[m*sps + k], reversed in m to line up with the
+        # oldest-first symbol windows
+        self.phases = padded.reshape(self.taps, sps).T[:, ::-1].astype(real_dtype())
+        self.delay = (len(h) - 1) / 2
+        self.state = np.zeros(self.taps - 1, dtype=real_dtype())
+
+    @profiled
+    def process(self, symbols):
+        symbols = np.asarray(symbols, dtype=real_dtype())
+        if len(symbols) == 0:
+            return np.zeros(0, dtype=real_dtype())
+        ext = np.concatenate((self.state, symbols))
+        windows = sliding_window_view(ext, self.taps)        # (N, taps), no copy
+        self.state = ext[len(ext) - (self.taps - 1):].copy() if self.taps > 1 else self.state
+        return (windows @ self.phases.T).ravel()
+
+    def flush(self):
+        """
+        The tail of the last pulses (as if zeros followed).
+        """
+        return self.process(np.zeros(self.taps - 1))
+
+
+def upsample_filter(symbols, h, sps):
+    """
+    One-shot polyphase interpolation: the first len(symbols) * sps samples
+    of h convolved with the zero-stuffed symbols.
+    """
+    return PolyphaseUpsampler(h, sps).process(symbols)
+
+
+class EyeDiagram:
+    """
+    Incremental eye diagram of a binary antipodal waveform.
+
+        eye = EyeDiagram(sps, delay=up.delay)
+        eye.update(chunk)                    # any chunk sizes
+        hist, t, y_edges = eye.histogram()   # t in symbol periods, 0 = instant
+        eye.metrics()
+
+    Symbol instants are at delay + k*sps, k >= 0. Each trace spans
+    n_symbols symbol periods centred on an instant, one trace per symbol;
+    skip_symbols leaves out the first traces (the filters' start-up).
+    Traces are binned into an (n_columns, n_bins) count histogram. Running
+    minimum/maximum (of the traces above / below zero at the instant) and
+    sums per column give the eye opening and RMS ISI without keeping any
+    trace.
+    """
+
+    def __init__(self, sps, delay=0, n_symbols=2, y_range=(-1.5, 1.5), n_bins=200,
+                 skip_symbols=0):
+        self.sps = sps
+        self.width = n_symbols * sps + 1
+        self.center = n_symbols * sps // 2
+        self.y_range = y_range
+        self.n_bins = n_bins
+        self.hist = np.zeros((self.width, n_bins), dtype=np.int64)
+        self.upper_min = np.full(self.width, np.inf)
+        self.lower_max = np.full(self.width, -np.inf)
+        self.abs_sum = np.zeros(self.width)
+        self.abs_sumsq = np.zeros(self.width)
+        self.traces = 0
+        # Samples to skip before the first trace: the one centred on the
+        # instant of symbol skip_symbols (earlier traces hold the start-up)
+        first = int(round(delay)) + skip_symbols * sps - self.center
+        self._skip = first if first >= 0 else first % sps
+        self._buffer = np.zeros(0)
+
+    @profiled
+    def update(self, chunk):
+        chunk = np.asarray(chunk, dtype=np.float64)
+        if self._skip:
+            drop = min(self._skip, len(chunk))
+            chunk = chunk[drop:]
+            self._skip -= drop
+        buf = np.concatenate((self._buffer, chunk))
+        n_traces = (len(buf) - self.width) // self.sps + 1 if len(buf) >= self.width else 0
+        if n_traces:
+            w = sliding_window_view(buf, self.width)[::self.sps][:n_traces]     # (traces, width)
+            y0, y1 = self.y_range
+            bins = np.floor((w - y0) / (y1 - y0) * self.n_bins).astype(np.int64)
+            inside = (bins >= 0) & (bins < self.n_bins)
+            flat = (np.arange(self.width) * self.n_bins + bins)[inside]
+            self.hist += np.bincount(flat, minlength=self.hist.size).reshape(self.hist.shape)
+            # Traces are split by their sign at the instant (the decision)
+            upper = (w[:, self.center] >= 0)[:, None]
+            self.upper_min = np.minimum(self.upper_min, np.where(upper, w, np.inf).min(axis=0))
+            self.lower_max = np.maximum(self.lower_max, np.where(upper, -np.inf, w).max(axis=0))
+            self.abs_sum += np.abs(w).sum(axis=0)
+            self.abs_sumsq += (w**2).sum(axis=0)
+            self.traces += n_traces
+        self._buffer = buf[n_traces * self.sps:]
+
+    def histogram(self):
+        """
+        (hist, t, y_edges): counts per (column, bin), column times in symbol
+        periods relative to the symbol instant, and the bin edges.
+        """
+        t = (np.arange(self.width) - self.center) / self.sps
+        return self.hist, t, np.linspace(*self.y_range, self.n_bins + 1)
+
+    def metrics(self):
+        """
+        eye_height (lowest upper trace - highest lower trace at the instant,
+        traces classed by their sign there; 0 if closed),
+        eye_width (symbol periods of open eye around the instant),
+        best_offset (symbol periods from the instant to the widest opening),
+        isi_rms (std / mean of |y| at the instant) and traces.
+        """
+        opening = self.upper_min - self.lower_max
+        closed = np.flatnonzero(opening <= 0) - self.center
+        left = -closed[closed < 0].max() if (closed < 0).any() else self.center + 1
+        right = closed[closed > 0].min() if (closed > 0).any() else self.center + 1
+        width = 0 if opening[self.center] <= 0 else (left + right - 2) / self.sps
+        n = max(self.traces, 1)
+        mean = self.abs_sum[self.center] / n
+        var = max(self.abs_sumsq[self.center] / n - mean**2, 0.0)
+        return {
+            'eye_height': float(max(opening[self.center], 0)),
+            'eye_width': float(width),
+            'best_offset': float((np.argmax(opening) - self.center) / self.sps),
+            'isi_rms': float(np.sqrt(var) / mean) if mean else float('nan'),
+            'traces': self.traces,
+        }
@@ -0,0 +1,182 @@
+# Reconstruction of Sampled Sequences
+# Band-limited interpolation of samples x[n] = x(t0 + n / fs) onto an
+# output grid:
+#
+#   y = fft_interpolate(x, factor=8)                # uniform grid, fs * 8
+#   y = sinc_reconstruct(x, fs, t_out)              # ideal (truncated) sinc sum, exact reference
+#   interp = SincInterpolator(half_width=16)
+#   y = interp(x, fs, t_out)                        # windowed sinc, any output times
+#   y = interp.resample(x, fs, fs_out)              # arbitrary ratio
+#
+# The ideal reconstruction sum_n x[n] sinc(fs (t - t0) - n) costs N * M
+# for N samples and M output points. It is evaluated in blocks of output
+# points, which keeps memory bounded, and serves as the exact reference.
+#   fft_interpolate zero-pads the spectrum: M log M, exact for periodic
+#   band-limited records.
+#   SincInterpolator truncates the sinc to 2 * half_width taps with a
+#   Kaiser window and tabulates it at n_phases fractional offsets (a
+#   polyphase bank). Each output point takes the 2 * half_width samples
+#   around it and a coefficient row linearly interpolated between the two
+#   nearest phases, so the cost is M * 2 * half_width. Output points are
+#   gathered in blocks of `block`.
+
+import sys
+import time
+
+import numpy as np
+
+from DSP.precision import real_dtype
+from DSP.profiling import profiled
+
+
+@profiled
+def fft_interpolate(x, factor=None, n_out=None):
+    """
+    Zero-padded FFT interpolation along the last axis onto n_out (or
+    len * factor) uniform points over the same record. The Nyquist bin of
+    an even-length record is split between +fs/2 and -fs/2.
+    """
+    x = np.asarray(x)
+    n = x.shape[-1]
+    n_out = int(round(n * factor)) if n_out is None else n_out
+    if n_out < n:
+        raise ValueError(f'n_out ({n_out}) must be at least the record length ({n})')
+    X = np.fft.rfft(x, axis=-1)
+    if n % 2 == 0 and n_out > n:
+        X[..., -1] *= 0.5
+    return np.fft.irfft(X, n_out, axis=-1) * (n_out / n)
+
+
+@profiled
+def sinc_reconstruct(x, fs, t_out, t0=0.0, max_elements=2**22):
+    """
+    sum_n x[n] sinc(fs (t - t0) - n) at every t_out (O(N * M) work), in
+    blocks of output points with at most max_elements sinc values each.
+    """
+    x = np.asarray(x, dtype=float)
+    tau = (np.asarray(t_out, dtype=float) - t0) * fs
+    n = np.arange(len(x))
+    block = max(1, max_elements // max(len(x), 1))
+    y = np.empty(len(tau), dtype=real_dtype())
+    for start in range(0, len(tau), block):
+        y[start:start + block] = np.sinc(tau[start:start + block, None] - n) @ x
+    return y
+
+
+def kaiser(u, beta):
+    """
+    Continuous Kaiser window at u in [-1, 1] (0 outside).
+    """
+    u = np.asarray(u, dtype=float)
+    w = np.i0(beta * np.sqrt(np.clip(1 - u**2, 0, None))) / np.i0(beta)
+    return np.where(np.abs(u) <= 1, w, 0.0)
+
+
+class SincInterpolator:
+    """
+    Kaiser-windowed sinc interpolator with a polyphase coefficient table.
+
+    half_width: taps on each side (2 * half_width per output point).
+    n_phases: fractional offsets tabulated between two samples.
+    cutoff: pass band as a fraction of fs / 2 (below 1 when the output rate
+    is lower than fs, to filter before decimating).
+    """
+
+    def __init__(self, half_width=16, n_phases=512, cutoff=1.0, beta=8.0):
+        self.half_width = half_width
+        self.n_phases = n_phases
+        self.cutoff = cutoff
+        # table[p, j]: weight of x[n + j - half_width + 1] for an output at
+        # n + p / n_phases
+        frac = np.arange(n_phases + 1)[:, None] / n_phases
+        offsets = frac - (np.arange(2 * half_width) - half_width + 1)
+        self.table = cutoff * np.sinc(cutoff * offsets) * kaiser(offsets / half_width, beta)
+
+    @profiled
+    def __call__(self, x, fs, t_out, t0=0.0, block=8192):
+        """
+        Interpolated values at t_out; samples outside the record count as 0.
+        """
+        x = np.asarray(x, dtype=float)
+        hw = self.half_width
+        # 2 hw zeros per side: every tap of an output within hw samples of the
+        # record (the `inside` mask) lands in the padded array
+        padded = np.concatenate((np.zeros(2 * hw), x, np.zeros(2 * hw)))
+        tau = (np.asarray(t_out, dtype=float) - t0) * fs
+        taps = np.arange(2 * hw)
+        y = np.empty(len(tau), dtype=real_dtype())
+        for start in range(0, len(tau), block):
+            tb = tau[start:start + block]
+            n = np.floor(tb)
+            pos = (tb - n) * self.n_phases
+            p = np.minimum(pos.astype(np.int64), self.n_phases - 1)
+            w = (pos - p)[:, None]
+            coeffs = (1 - w) * self.table[p] + w * self.table[p + 1]
+            # Sample n + j - hw + 1 sits at padded index n + j + hw + 1; the
+            # clip only moves outputs that `inside` zeroes anyway
+            idx = np.clip(n.astype(np.int64) + hw + 1, 0, len(padded) - 2 * hw)[:, None] + taps
+            inside = ((n >= -hw) & (n < len(x) + hw - 1))
+            y[start:start + block] = np.where(inside, np.einsum('ij,ij->i', coeffs, padded[idx]), 0.0)
+        return y
+
+    def resample(self, x, fs, fs_out, t0=0.0):
+        """
+        The record resampled at fs_out (any ratio) over the same time span.
+        """
+        n_out = int(np.floor(len(x) * fs_out / fs))
+        return self(x, fs, t0 + np.arange(n_out) / fs_out, t0)
+
+
+def reconstruction_error_db(y, reference):
+    """
+    Error power relative to the reference power, in dB.
+    """
+    e = np.asarray(y, dtype=float) - reference
+    return 10 * np.log10(np.sum(e**2) / np.sum(np.asarray(reference, dtype=float)**2))
+
+
+def benchmark_reconstruction(n_samples=100000, factor=8, n_tones=20, bandwidth=0.4, seed=0):
+    """
+    Error and throughput of the three reconstructions for a long record: a
+    sum of n_tones random tones below bandwidth * fs (fs = 1), evaluated
+    analytically on the factor-times finer grid. The exact sinc sum runs on
+    a 500-point excerpt only, and its time is projected to the full grid.
+    """
+    rng = np.random.default_rng(seed)
+    f = rng.uniform(0, bandwidth, n_tones)
+    a = rng.uniform(0.5, 1, n_tones)
+    phi = rng.uniform(0, 2 * np.pi, n_tones)
+
+    def signal(t):
+        out = np.zeros(len(t))
+        for fk, ak, pk in zip(f, a, phi):
+            out += ak * np.cos(2 * np.pi * fk * t + pk)
+        return out
+
+    x = signal(np.arange(n_samples))
+    t_out = np.arange(n_samples * factor) / factor
+    truth = signal(t_out)
+    # Edges: every method loses accuracy near the ends of a finite record
+    core = slice(64 * factor, -64 * factor)
+
+    print(f"{n_samples} samples -> {len(t_out)} points, {n_tones} tones below {bandwidth} fs")
+    print(f"{'Method':<26}{'error (dB)':>12}{'time (s)':>10}{'Mpoints/s':>11}")
+    rows = {}
+    for name, fn in [('FFT zero-padding', lambda: fft_interpolate(x, factor)),
+                     ('Windowed sinc (32 taps)', lambda: SincInterpolator(16)(x, 1.0, t_out))]:
+        t0 = time.perf_counter()
+        y = fn()
+        seconds = time.perf_counter() - t0
+        rows[name] = (reconstruction_error_db(y[core], truth[core]), seconds)
+    excerpt = slice(n_samples * factor // 2, n_samples * factor // 2 + 500)
+    t0 = time.perf_counter()
+    y = sinc_reconstruct(x, 1.0, t_out[excerpt])
+    seconds = (time.perf_counter() - t0) * len(t_out) / 500
+    rows['Exact sinc sum (projected)'] = (reconstruction_error_db(y, truth[excerpt]), seconds)
+    for name, (err, seconds) in rows.items():
+        print(f"{name:<26}{err:>12.1f}{seconds:>10.3f}{len(t_out) / seconds / 1e6:>11.2f}")
+    return rows
+
+
+if __name__ == '__main__':
+    benchmark_reconstruction(int(float(sys.argv[1])) if len(sys.argv) > 1 else 100000)
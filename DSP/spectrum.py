@@ -0,0 +1,337 @@
+# Spectrum Analysis Helpers
+# - get_spectrum: the magnitude spectrum every script used to re-implement,
+#   with memoized frequency axes, a real-input rFFT fast path and windowing
+# - welch_spectrum: averaged periodogram for long signals
+# - zoom_spectrum: evaluate only a band (e.g. +/-2 kHz around a carrier) on
+#   a chosen grid instead of computing a full-length FFT and masking it
+#   away: the requested bins of one folded FFT when the grid allows, or
+#   mix-decimate + chirp-z for narrow bands
+#
+# All FFTs go through scipy.fft; `workers` (or set_fft_workers) lets it use
+# several threads for long transforms. scipy.signal (about 1 s to import) is
+# only loaded when zoom_spectrum is first called.
+
+import time
+from functools import lru_cache
+
+import numpy as np
+import scipy.fft
+
+from DSP.profiling import profiled
+
+FFT_WORKERS = None    # default scipy.fft `workers` (None = single thread)
+
+
+def set_fft_workers(workers):
+    """
+    Sets the default number of scipy.fft threads (-1 = all cores).
+    """
+    global FFT_WORKERS
+    FFT_WORKERS = workers
+
+
+def _workers(workers):
+    return FFT_WORKERS if workers is None else workers
+
+
+def _real_dtype(x):
+    # float32 / complex64 input is processed in single precision, anything
+    # else in double (see DSP.precision)
+    return np.float32 if x.dtype in (np.float32, np.complex64) else np.float64
+
+
+@lru_cache(maxsize=64)
+def _window_cached(name, N, dtype='float64', periodic=False):
+    # periodic: the first N points of the (N+1)-point symmetric window, as
+    # used for spectral averaging (scipy.signal.get_window's default)
+    M = N + 1 if periodic else N
+    if name == 'hann':
+        w = np.hanning(M)
+    elif name == 'hamming':
+        w = np.hamming(M)
+    elif name == 'blackman':
+        w = np.blackman(M)
+    else:
+        raise ValueError(f'Unknown window: {name}')
+    w = w[:N].astype(dtype, copy=False)
+    w.flags.writeable = False
+    return w
+
+
+def _window(name, N, dtype=np.float64, periodic=False):
+    # dtype: real dtype of the signal, so float32 input stays float32
+    if name is None or name == 'rect':
+        return None
+    return _window_cached(name, N, np.dtype(dtype).name, periodic)
+
+
+@lru_cache(maxsize=64)
+def frequency_axis(N, fs, onesided=False):
+    """
+    Frequency axis (Hz) for an N-point FFT at rate fs, memoized on (N, fs).
+    Two-sided axes are fftshift-ed (-fs/2 .. fs/2); one-sided axes match
+    rfft (0 .. fs/2). The returned array is read-only because it is shared.
+    """
+    if onesided:
+        f = scipy.fft.rfftfreq(N, 1 / fs)
+    else:
+        f = scipy.fft.fftshift(scipy.fft.fftfreq(N, 1 / fs))
+    f.flags.writeable = False
+    return f
+
+
+@profiled
+def get_spectrum(sig, fs, window=None, onesided=False, workers=None):
+    """
+    Magnitude spectrum |X(f)| / sum(w) of a signal.
+
+    Default output is what the scripts' old local get_spectrum returned:
+    (fftshift-ed frequencies, |fftshift(fft(sig))| / N). Real input takes
+    the rFFT path (about half the work) and mirrors it for the negative
+    frequencies. onesided=True returns the rFFT half only.
+    """
+    sig = np.asarray(sig)
+    N = len(sig)
+    w = _window(window, N, _real_dtype(sig))
+    gain = N if w is None else np.sum(w)
+    x = sig if w is None else sig * w
+    workers = _workers(workers)
+
+    if np.iscomplexobj(sig):
+        if onesided:
+            raise ValueError('onesided spectrum needs a real signal')
+        mag = np.abs(scipy.fft.fftshift(scipy.fft.fft(x, workers=workers))) / gain
+        return frequency_axis(N, fs), mag
+
+    mag = np.abs(scipy.fft.rfft(x, workers=workers)) / gain
+    if onesided:
+        return frequency_axis(N, fs, onesided=True), mag
+    # |X(-f)| = |X(f)| for real input
+    mag = np.concatenate((mag[N // 2:0:-1], mag[:(N + 1) // 2]))
+    return frequency_axis(N, fs), mag
+
+
+@profiled
+def welch_spectrum(sig, fs, nperseg=4096, window='hann', overlap=0.5,
+                   scaling='density', workers=None):
+    """
+    Welch averaged periodogram of a real signal (one-sided).
+    Segments of nperseg samples overlapping by `overlap` are windowed,
+    transformed together in one batched rFFT, and their powers averaged.
+    scaling='density' gives V^2/Hz, 'spectrum' gives V^2 per line.
+    Windows are periodic, so the result matches scipy.signal.welch with
+    detrend=False.
+    """
+    sig = np.asarray(sig)
+    sig = sig.astype(_real_dtype(sig), copy=False)
+    nperseg = min(nperseg, len(sig))
+    step = max(1, int(nperseg * (1 - overlap)))
+    n_seg = 1 + (len(sig) - nperseg) // step
+    segments = np.lib.stride_tricks.as_strided(
+        sig, shape=(n_seg, nperseg), strides=(sig.strides[0] * step, sig.strides[0]),
+        writeable=False)
+
+    w = _window(window, nperseg, sig.dtype, periodic=True)
+    if w is None:
+        w = np.ones(nperseg, dtype=sig.dtype)
+    X = scipy.fft.rfft(segments * w, axis=-1, workers=_workers(workers))
+    P = np.mean(np.abs(X)**2, axis=0)
+
+    if scaling == 'density':
+        P /= fs * np.sum(w**2)
+    elif scaling == 'spectrum':
+        P /= np.sum(w)**2
+    else:
+        raise ValueError(f'Unknown scaling: {scaling}')
+    # One-sided: double everything except DC (and Nyquist for even nperseg)
+    if nperseg % 2:
+        P[1:] *= 2
+    else:
+        P[1:-1] *= 2
+    return frequency_axis(nperseg, fs, onesided=True), P
+
+
+def _oscillator(f_norm, N, block=4096):
+    # exp(2j*pi*f_norm*n) built as (block start phasor) x (one block of
+    # phasors): one complex multiply per sample instead of an exp().
+    k = np.arange(block)
+    starts = np.exp(2j * np.pi * f_norm * block * np.arange(-(-N // block)))
+    return (starts[:, None] * np.exp(2j * np.pi * f_norm * k)).ravel()[:N]
+
+
+def _decimate(z, D, atten_db=80):
+    # Polyphase low-pass + decimate by D. Passband up to fs/(4D), stopband
+    # from 3fs/(4D), so the kept band (|f| < fs/(4D)) is alias-free.
+    from scipy.signal import firwin, kaiserord, resample_poly
+    numtaps, beta = kaiserord(atten_db, 1 / D)
+    h = firwin(numtaps | 1, 1 / D, window=('kaiser', beta))
+    if np.iscomplexobj(z):
+        return (resample_poly(z.real, 1, D, window=h)
+                + 1j * resample_poly(z.imag, 1, D, window=h))
+    return resample_poly(z, 1, D, window=h)
+
+
+def _grid_bins(fs, f_start, f_stop, n_points):
+    # (M, k0) if the grid is f = (k0 + k) fs / M for integers M, k0, else None
+    if n_points < 2:
+        return None
+    df = (f_stop - f_start) / (n_points - 1)
+    M, k0 = fs / df, f_start / df
+    if df <= 0 or abs(M - round(M)) > 1e-6 * M or abs(k0 - round(k0)) > 1e-6 * max(abs(k0), 1):
+        return None
+    return int(round(M)), int(round(k0))
+
+
+def _folded_fft(xw, M, k0, n_points, workers=None):
+    # DTFT at (k0 + k) fs / M: fold x modulo M (exact for any N), one M-point FFT
+    N = len(xw)
+    if N > M:
+        xw = np.concatenate((xw, np.zeros(-N % M, dtype=xw.dtype))).reshape(-1, M).sum(axis=0)
+    k = (k0 + np.arange(n_points)) % M
+    if np.iscomplexobj(xw):
+        return scipy.fft.fft(xw, n=M, workers=_workers(workers))[k]
+    # Real x: X[M - k] = conj(X[k]), so the rFFT half covers every bin
+    X = scipy.fft.rfft(xw, n=M, workers=_workers(workers))
+    upper = k > M // 2
+    return np.where(upper, np.conj(X[np.where(upper, M - k, 0)]), X[np.where(upper, 0, k)])
+
+
+@profiled
+def zoom_spectrum(x, fs, f_start, f_stop, n_points, window=None, method='auto'):
+    """
+    Complex spectrum of x on n_points frequencies from f_start to f_stop
+    (inclusive). Normalized like np.fft.fft(x * w) / sum(w), so a tone
+    A*cos(2*pi*f0*t) shows a peak of A/2 at f0, exactly as with the full FFT.
+
+    method='fft': when the grid step divides fs (f = k fs / M), one M-point
+        FFT of x folded modulo M, keeping only the requested bins. Exact,
+        and cheaper than the full two-sided FFT when M is not much larger
+        than N (wide bands on a fine grid).
+    method='czt': chirp-z transform of the whole record, any grid.
+    method='mix': mix the band centre to DC, low-pass and decimate by the
+        largest factor that keeps the band, then chirp-z the short
+        decimated record. One pass over x: the cheapest choice for a band
+        that is narrow next to fs on a grid finer than fs / N.
+    method='auto': 'fft' if the grid allows it with M <= 4 (N + n_points),
+        'mix' otherwise.
+
+    Returns (freqs, spectrum). The grid needs n_points >= 2 and
+    f_stop > f_start.
+    """
+    if n_points < 2 or not f_stop > f_start:
+        raise ValueError(f'zoom_spectrum needs n_points >= 2 and f_stop > f_start '
+                         f'(got n_points={n_points}, f_start={f_start}, f_stop={f_stop})')
+    from scipy.signal import zoom_fft
+    x = np.asarray(x)
+    N = len(x)
+    freqs = np.linspace(f_start, f_stop, n_points)
+    w = _window(window, N)
+    gain = N if w is None else np.sum(w)
+    xw = x if w is None else x * w
+
+    bins = _grid_bins(fs, f_start, f_stop, n_points)
+    if method == 'auto':
+        method = 'fft' if bins and bins[0] <= 4 * (N + n_points) else 'mix'
+    if method == 'fft':
+        if bins is None:
+            raise ValueError('method="fft" needs a grid step that divides fs')
+        return freqs, _folded_fft(xw, *bins, n_points) / gain
+
+    if method == 'czt':
+        X = zoom_fft(xw, [f_start, f_stop], m=n_points, fs=fs, endpoint=True)
+        return freqs, X / gain
+
+    if method != 'mix':
+        raise ValueError(f'Unknown method: {method}')
+
+    f_mid = (f_start + f_stop) / 2
+    half_bw = max((f_stop - f_start) / 2, fs / N)
+    # Band edges must stay in the flat part of the decimator (|f| < fs_d/4);
+    # keep >= 1024 decimated samples so the filter stays short next to N
+    D = max(1, min(int(fs // (4 * half_bw)), N // 1024))
+    baseband = xw * _oscillator(-f_mid / fs, N)
+    if D > 1:
+        baseband = _decimate(baseband, D)
+    fs_d = fs / D
+
+    X = zoom_fft(baseband, [f_start - f_mid, f_stop - f_mid], m=n_points,
+                 fs=fs_d, endpoint=True)
+    # Decimation keeps the sample-sum scale 1/D of the original
+    return freqs, X * D / gain
+
+
+def benchmark_zoom(x, fs, f_start, f_stop, n_points, window=None, repeats=3):
+    """
+    Times a full-length FFT + mask against zoom_spectrum (each method that
+    applies) for the same band and prints the comparison. Returns the timings (s).
+    """
+    def best_of(fn):
+        best = np.inf
+        for _ in range(repeats):
+            t0 = time.perf_counter()
+            fn()
+            best = min(best, time.perf_counter() - t0)
+        return best
+
+    def full_fft():
+        X = np.fft.fft(x)
+        f = np.fft.fftfreq(len(x), 1 / fs)
+        mask = (f >= f_start) & (f <= f_stop)
+        return f[mask], X[mask]
+
+    timings = {'full FFT + mask': best_of(full_fft)}
+    methods = ('fft', 'czt', 'mix') if _grid_bins(fs, f_start, f_stop, n_points) else ('czt', 'mix')
+    for method in methods:
+        timings[f'zoom ({method})'] = best_of(
+            lambda: zoom_spectrum(x, fs, f_start, f_stop, n_points, window, method))
+    full_bins = int(np.floor((f_stop - f_start) * len(x) / fs)) + 1
+    print(f"Zoom {f_start:g}-{f_stop:g} Hz, N={len(x)}: "
+          f"full FFT gives {full_bins} bins, zoom gives {n_points} points")
+    for name, sec in timings.items():
+        print(f"  {name:<16}{sec * 1e3:8.2f} ms")
+    return timings
+
+
+def _legacy_get_spectrum(sig, fs):
+    # The per-script version this module replaces (kept for the benchmark)
+    N = len(sig)
+    spec = np.fft.fftshift(np.fft.fft(sig)) / N
+    freqs = np.fft.fftshift(np.fft.fftfreq(N, 1/fs))
+    return freqs, np.abs(spec)
+
+
+def benchmark_get_spectrum(repeats=20):
+    """
+    Compares the old per-script get_spectrum with the shared one for the
+    call sites that moved here, plus a long record with threaded FFTs.
+    """
+    cases = [
+        ('SSB_Analysis.py', 5000, 10000, 1),
+        ('SSB_Modulation.py', 1000, 2000, 4),
+        ('VSB_Mixing_Analysis.py', 1000, 10000, 1),
+        ('Lab1_Simulation.py', 10000, 10000, 6),
+        ('long record (2^22)', 2**22, 1e6, 1),
+    ]
+    rng = np.random.default_rng(0)
+
+    def best_of(fn, *args, **kwargs):
+        best = np.inf
+        for _ in range(repeats):
+            t0 = time.perf_counter()
+            fn(*args, **kwargs)
+            best = min(best, time.perf_counter() - t0)
+        return best
+
+    print(f"{'Call site':<24}{'N':>9}{'calls':>6}{'legacy (ms)':>13}{'shared (ms)':>13}"
+          f"{'threads (ms)':>14}{'speed-up':>10}")
+    for name, N, fs, calls in cases:
+        signals = [rng.standard_normal(N) for _ in range(calls)]
+        legacy = best_of(lambda: [_legacy_get_spectrum(x, fs) for x in signals])
+        shared = best_of(lambda: [get_spectrum(x, fs) for x in signals])
+        threaded = best_of(lambda: [get_spectrum(x, fs, workers=-1) for x in signals])
+        print(f"{name:<24}{N:>9}{calls:>6}{legacy * 1e3:>13.3f}{shared * 1e3:>13.3f}"
+              f"{threaded * 1e3:>14.3f}{legacy / min(shared, threaded):>9.1f}x")
+
+
+if __name__ == '__main__':
+    benchmark_get_spectrum()
@@ -0,0 +1,202 @@
+# Block-Streaming Modulation Links
+# Stateful versions of the AM (Lab 2), FM and PCM chains: the transmitter
+# and receiver each process one block at a time and carry their state to
+# the next block, so a recording of any length can be sent through them:
+#
+#   link = AMLink()                       # Lab 2: fc = 20 kHz, fs = 400 kHz, Ac = 2
+#   for m in blocks:                      # message blocks at link.fs, |m| <= 1
+#       r = awgn(link.modulate(m), n0, link.fs)
+#       m_hat = link.demodulate(r)        # delayed by the causal low-pass
+#
+#   pcm = PCMLink(n_bits=8, order=1, dither='tpdf')
+#   codes = pcm.encode(x); x_q = pcm.decode(codes)
+#
+# The one-shot kernels in DSP.analog filter with zero phase (filtfilt) and
+# take Hilbert transforms by FFT, neither of which can run on a stream. Here:
+#   - the carrier phase comes from a running sample counter, reduced modulo
+#     the carrier period, so it stays exact for any stream length;
+#   - the FM phase integral (trapezoidal, as fm_modulate) carries over;
+#   - the receivers use causal Butterworth sections (scipy.signal.sosfilt
+#     with the filter state kept). The FM receiver mixes to complex baseband
+#     and takes the phase step from the previous block's last sample.
+# The outputs therefore lag the message by the low-pass group delay
+# (link.delay, in samples at low frequencies). SNRMeter accumulates the
+# output SNR against the message block by block.
+
+from math import gcd
+
+import numpy as np
+
+from DSP.precision import real_dtype
+from DSP.profiling import profiled
+
+
+def _butter_sos(cutoff, fs, order):
+    from scipy.signal import butter
+    return butter(order, cutoff, btype='low', fs=fs, output='sos')
+
+
+def _group_delay(sos, fs, f=None):
+    # Group delay (samples) of the low-pass near DC (or at f)
+    from scipy.signal import group_delay, sos2tf
+    b, a = sos2tf(sos)
+    w = 2 * np.pi * (f if f else fs / 1000) / fs
+    return float(group_delay((b, a), w=[w])[1][0])
+
+
+class _Carrier:
+    """
+    cos / exp of 2 pi fc n / fs for consecutive blocks of n.
+    """
+
+    def __init__(self, fc, fs):
+        self.fc, self.fs = fc, fs
+        # Whole carrier periods repeat every fs / gcd(fs, fc) samples
+        exact = float(fc).is_integer() and float(fs).is_integer()
+        self.period = int(fs) // gcd(int(fs), int(fc)) if exact else None
+        self.n = 0
+
+    def phase(self, count):
+        n = self.n + np.arange(count)
+        self.n += count
+        if self.period:
+            self.n %= self.period
+        return 2 * np.pi * self.fc * n / self.fs
+
+
+class AMLink:
+    """
+    Conventional AM s = Ac (1 + ka m) cos(2 pi fc t) and the synchronous
+    receiver of Lab 2: product with cos(2 pi fc t), causal Butterworth
+    low-pass (cutoff, order), then m = (2 y / Ac - 1) / ka.
+    """
+
+    def __init__(self, fs=400000, fc=20000, Ac=2.0, ka=0.8, cutoff=5000, order=2):
+        self.fs, self.fc, self.Ac, self.ka = fs, fc, Ac, ka
+        self._tx = _Carrier(fc, fs)
+        self._rx = _Carrier(fc, fs)
+        self._sos = _butter_sos(cutoff, fs, order)
+        self._zi = np.zeros((len(self._sos), 2))
+        self.delay = _group_delay(self._sos, fs)
+
+    @profiled
+    def modulate(self, m):
+        m = np.asarray(m, dtype=float)
+        s = self.Ac * (1 + self.ka * m) * np.cos(self._tx.phase(len(m)))
+        return s.astype(real_dtype(), copy=False)
+
+    @profiled
+    def demodulate(self, r):
+        from scipy.signal import sosfilt
+        v = np.asarray(r, dtype=float) * np.cos(self._rx.phase(len(r)))
+        y, self._zi = sosfilt(self._sos, v, zi=self._zi)
+        return ((2 * y / self.Ac - 1) / self.ka).astype(real_dtype(), copy=False)
+
+
+class FMLink:
+    """
+    FM s = Ac cos(2 pi fc t + 2 pi kf * integral of m) and a
+    phase-difference receiver: complex mixing to baseband, causal
+    Butterworth low-pass at `cutoff` (about half the Carson bandwidth),
+    m = angle(z[n] conj(z[n-1])) fs / (2 pi kf).
+    """
+
+    def __init__(self, fs=400000, fc=100000, kf=5000.0, Ac=1.0, cutoff=12000, order=5):
+        self.fs, self.fc, self.kf, self.Ac = fs, fc, kf, Ac
+        self._tx = _Carrier(fc, fs)
+        self._rx = _Carrier(fc, fs)
+        self._integral = 0.0          # 2 pi kf * integral of m up to the last sample
+        self._m_last = None
+        self._sos = _butter_sos(cutoff, fs, order)
+        self._zi = np.zeros((len(self._sos), 2), dtype=complex)
+        self._z_last = None
+        self.delay = _group_delay(self._sos, fs)
+
+    @profiled
+    def modulate(self, m):
+        m = np.asarray(m, dtype=float)
+        if not len(m):
+            return np.zeros(0, dtype=real_dtype())
+        prev = m[0] if self._m_last is None else self._m_last
+        # Trapezoidal steps from the previous sample (the first sample of the
+        # stream starts the integral at 0, as fm_modulate)
+        steps = np.concatenate(([prev], m))
+        phi = self._integral + np.cumsum((steps[1:] + steps[:-1]) * (np.pi * self.kf / self.fs))
+        if self._m_last is None:
+            phi -= phi[0]
+        self._integral = float(phi[-1]) % (2 * np.pi)
+        self._m_last = float(m[-1])
+        s = self.Ac * np.cos(self._tx.phase(len(m)) + phi)
+        return s.astype(real_dtype(), copy=False)
+
+    @profiled
+    def demodulate(self, r):
+        from scipy.signal import sosfilt
+        v = np.asarray(r, dtype=float) * np.exp(-1j * self._rx.phase(len(r)))
+        z, self._zi = sosfilt(self._sos, v, zi=self._zi)
+        if not len(z):
+            return np.zeros(0, dtype=real_dtype())
+        prev = z[:1] if self._z_last is None else self._z_last
+        dphi = np.angle(z * np.conj(np.concatenate((prev, z[:-1]))))
+        self._z_last = z[-1:]
+        return (dphi * (self.fs / (2 * np.pi * self.kf))).astype(real_dtype(), copy=False)
+
+
+class PCMLink:
+    """
+    Uniform PCM over [V_min, V_max] with n_bits, optionally dithered and
+    noise-shaped (DSP.noiseshape.NoiseShaper, state carried): encode gives
+    the codes, decode their levels.
+    """
+
+    def __init__(self, n_bits=8, V_min=-1, V_max=1, order=0, dither=None, rng=None):
+        from DSP.noiseshape import NoiseShaper
+        self.n_bits, self.V_min, self.V_max = n_bits, V_min, V_max
+        self._shaper = NoiseShaper(n_bits, V_min, V_max, order=order, dither=dither, rng=rng)
+        self.delay = 0.0
+
+    @profiled
+    def encode(self, x):
+        return self._shaper.encode(x)
+
+    def decode(self, codes):
+        from DSP.pcm import pcm_decode
+        return pcm_decode(codes, self.n_bits, self.V_min, self.V_max).astype(real_dtype(), copy=False)
+
+    # Same interface as the analog links
+    modulate, demodulate = encode, decode
+
+
+class SNRMeter:
+    """
+    Running SNR of out[j] against gain * ref[j - delay] (least-squares
+    gain), skipping the first `settle` output samples.
+    """
+
+    def __init__(self, delay=0, settle=0):
+        self.delay = delay
+        self.settle = settle
+        self._ref = np.zeros(0)
+        self._ref_start = 0            # global index of self._ref[0]
+        self._out_next = 0             # global index of the next output sample
+        self._sums = np.zeros(3)       # sum r^2, sum y^2, sum r y
+
+    def reference(self, x):
+        self._ref = np.concatenate((self._ref, x))
+
+    def output(self, y):
+        j = self._out_next + np.arange(len(y))
+        self._out_next += len(y)
+        i = j - self.delay - self._ref_start
+        keep = (j >= self.settle) & (i >= 0) & (i < len(self._ref))
+        r, y = self._ref[i[keep]], np.asarray(y, dtype=float)[keep]
+        self._sums += [np.dot(r, r), np.dot(y, y), np.dot(r, y)]
+        # Reference samples no later output can pair with
+        drop = max(0, min(self._out_next - self.delay - self._ref_start, len(self._ref)))
+        self._ref = self._ref[drop:]
+        self._ref_start += drop
+
+    def snr_db(self):
+        rr, yy, ry = self._sums
+        signal = ry**2 / rr if rr else 0.0
+        return float(10 * np.log10(signal / max(yy - signal, 1e-30)))
@@ -0,0 +1,177 @@
+# Time-Division Multiplexing
+# Many sampled channels (PAM values or PCM codes) interleaved into frames,
+# each frame one sync word followed by one sample of every channel:
+#
+#   | sync[0] ... sync[S-1] | ch 0 | ch 1 | ... | ch C-1 |  frame 0
+#   | sync[0] ... sync[S-1] | ch 0 | ch 1 | ... | ch C-1 |  frame 1 ...
+#
+#   mux = TDMMux(n_channels=1024, max_frames=4096, dtype=np.uint8)
+#   stream = mux.mux(codes)                    # codes: (channels, samples)
+#   channels, info = tdm_demux(stream, 1024, mux.sync)
+#   channels[k]                                # channel k, a view of stream
+#
+# The multiplexer owns a preallocated (frames, S + C) buffer whose sync
+# columns are written once. Muxing a block is a single transposed
+# assignment into the channel columns (the only copy in the chain), and the
+# flat stream is a view of that buffer. Demultiplexing reshapes the
+# aligned stream to (frames, S + C) and returns the transposed channel
+# columns, a strided view with no copy. The frame alignment is found by
+# correlating the sync pattern with the fraction of "high" slots in every
+# column of the first few frames. `python -m DSP.tdm` measures frames/s for
+# 1024 channels.
+
+import sys
+import time
+
+import numpy as np
+
+from DSP.profiling import profiled
+
+# Barker-7: low off-peak autocorrelation, so partial overlaps of the sync
+# word with itself score poorly
+BARKER_7 = np.array([1, 1, 1, -1, -1, 1, -1])
+
+
+def sync_word(dtype=float, high=None, low=None, pattern=BARKER_7):
+    """
+    Sync slots of the given dtype: pattern +1 -> high, -1 -> low. Defaults
+    are +-1 for floats and the dtype's extreme values for integers.
+    """
+    dtype = np.dtype(dtype)
+    if high is None or low is None:
+        if np.issubdtype(dtype, np.integer):
+            info = np.iinfo(dtype)
+            high, low = (info.max if high is None else high), (info.min if low is None else low)
+        else:
+            high, low = (1.0 if high is None else high), (-1.0 if low is None else low)
+    return np.where(np.asarray(pattern) > 0, high, low).astype(dtype)
+
+
+def _threshold(sync):
+    # Midpoint between the sync levels; slots above it count as "high"
+    return (float(sync.max()) + float(sync.min())) / 2
+
+
+class TDMMux:
+    """
+    Frames (n_channels, n_samples) blocks into a flat TDM stream, up to
+    max_frames samples per channel per call. The returned stream is a view
+    of the internal buffer and is overwritten by the next call.
+    """
+
+    def __init__(self, n_channels, max_frames, dtype=float, sync=None):
+        self.n_channels = n_channels
+        self.sync = sync_word(dtype) if sync is None else np.asarray(sync, dtype=dtype)
+        self.frame_len = len(self.sync) + n_channels
+        self._buffer = np.empty((max_frames, self.frame_len), dtype=dtype)
+        self._buffer[:, :len(self.sync)] = self.sync
+
+    @profiled
+    def mux(self, x):
+        x = np.asarray(x)
+        if x.ndim != 2 or x.shape[0] != self.n_channels:
+            raise ValueError(f'Expected ({self.n_channels}, samples), got {x.shape}')
+        n = x.shape[1]
+        if n > len(self._buffer):
+            raise ValueError(f'{n} samples per channel exceed max_frames={len(self._buffer)}')
+        self._buffer[:n, len(self.sync):] = x.T
+        return self._buffer[:n].reshape(-1)
+
+
+def tdm_mux(x, sync=None):
+    """
+    One-shot multiplexing of a (channels, samples) array.
+    """
+    x = np.asarray(x)
+    return TDMMux(x.shape[0], x.shape[1], dtype=x.dtype, sync=sync).mux(x)
+
+
+def frame_view(stream, frame_len, offset=0):
+    """
+    The whole frames of stream[offset:] as a (frames, frame_len) view.
+    """
+    n_frames = (len(stream) - offset) // frame_len
+    return stream[offset:offset + n_frames * frame_len].reshape(n_frames, frame_len)
+
+
+@profiled
+def find_frame_offset(stream, frame_len, sync, search_frames=64):
+    """
+    (offset, score) of the frame alignment: the slot where the sync word
+    starts, and the fraction of sync slots on the expected side of the
+    threshold (1.0 = every slot of every searched frame agrees).
+    """
+    sync = np.asarray(sync)
+    n = min(search_frames, len(stream) // frame_len)
+    if n == 0:
+        raise ValueError(f'Stream shorter than one frame ({frame_len} slots)')
+    high = stream[:n * frame_len].reshape(n, frame_len) > _threshold(sync)
+    p_high = high.mean(axis=0)                                     # (frame_len,)
+    cols = (np.arange(frame_len)[:, None] + np.arange(len(sync))) % frame_len
+    expect_high = sync > _threshold(sync)
+    agree = np.where(expect_high, p_high[cols], 1 - p_high[cols])  # (frame_len, S)
+    score = agree.mean(axis=1)
+    offset = int(np.argmax(score))
+    return offset, float(score[offset])
+
+
+@profiled
+def tdm_demux(stream, n_channels, sync, offset=None, search_frames=64):
+    """
+    Splits a TDM stream into a (n_channels, frames) view of its channel
+    slots, aligning on the sync word first if offset is None. info holds
+    offset, score, frames and per-frame sync checks (sync_ok, sync_errors).
+    """
+    stream = np.asarray(stream)
+    sync = np.asarray(sync)
+    frame_len = len(sync) + n_channels
+    score = None
+    if offset is None:
+        offset, score = find_frame_offset(stream, frame_len, sync, search_frames)
+    frames = frame_view(stream, frame_len, offset)
+    threshold = _threshold(sync)
+    sync_ok = ((frames[:, :len(sync)] > threshold) == (sync > threshold)).all(axis=1)
+    return frames[:, len(sync):].T, {
+        'offset': offset, 'score': score, 'frames': len(frames),
+        'sync_ok': sync_ok, 'sync_errors': int(len(frames) - np.count_nonzero(sync_ok)),
+    }
+
+
+def benchmark_tdm(n_channels=1024, n_frames=4096, dtype=np.int16, repeats=5, seed=0):
+    """
+    Frames/s of TDMMux.mux and tdm_demux (with the sync search) on random
+    (n_channels, n_frames) blocks; the demuxed channels are checked against
+    the input.
+    """
+    rng = np.random.default_rng(seed)
+    info = np.iinfo(dtype) if np.issubdtype(dtype, np.integer) else None
+    if info is not None:
+        # Keep the data off the sync levels, as a PCM code range would
+        x = rng.integers(info.min + 1, info.max, (n_channels, n_frames), dtype=dtype)
+    else:
+        x = rng.uniform(-0.9, 0.9, (n_channels, n_frames)).astype(dtype)
+    mux = TDMMux(n_channels, n_frames, dtype=dtype)
+    pad = np.zeros(123, dtype=dtype)                 # unaligned start
+
+    timings = {'mux': [], 'demux': []}
+    for _ in range(repeats):
+        t0 = time.perf_counter()
+        stream = mux.mux(x)
+        timings['mux'].append(time.perf_counter() - t0)
+        received = np.concatenate((pad, stream))
+        t0 = time.perf_counter()
+        channels, info_ = tdm_demux(received, n_channels, mux.sync)
+        timings['demux'].append(time.perf_counter() - t0)
+    ok = np.array_equal(channels, x) and np.shares_memory(channels, received)
+    result = {k: n_frames / min(v) for k, v in timings.items()}
+    frame_bytes = mux.frame_len * np.dtype(dtype).itemsize
+    print(f"{n_channels} channels x {n_frames} frames of {np.dtype(dtype).name} "
+          f"({frame_bytes} bytes/frame), offset {info_['offset']}, "
+          f"{info_['sync_errors']} sync errors, demux exact and zero-copy: {ok}")
+    for k, fps in result.items():
+        print(f"  {k:<6}{fps:>14,.0f} frames/s{fps * frame_bytes / 1e9:>10.2f} GB/s")
+    return result
+
+
+if __name__ == '__main__':
+    benchmark_tdm(int(sys.argv[1]) if len(sys.argv) > 1 else 1024)
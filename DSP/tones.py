@@ -0,0 +1,141 @@
+# Tone-Bank Measurement
+# Measures the complex amplitude of a real signal at a short list of exact
+# frequencies (carrier, sidebands, Bessel lines ...) without a full FFT.
+#
+# Each frequency is a single-bin DFT (what a Goertzel filter computes),
+# evaluated for all K frequencies at once as a (K x L) @ (L,) product per
+# chunk, so the cost is O(N*K) and the input can be streamed chunk by chunk.
+#
+# Leakage correction: with all measured frequencies known, the bank output
+#   Y_k = sum_j [ c_j/2 * W(f_k - f_j) + conj(c_j)/2 * W(f_k + f_j) ]
+# (W = DTFT of the window, closed form for cosine-sum windows) is solved for
+# the cosine amplitudes c_j, removing the leakage between listed tones and
+# from each tone's own negative-frequency image.
+
+import numpy as np
+
+from DSP.profiling import profiled
+
+# Symmetric cosine-sum windows: w[n] = sum_m (-1)^m a_m cos(2 pi m n / (N-1))
+COSINE_WINDOWS = {
+    'rect': (1.0,),
+    'hann': (0.5, 0.5),
+    'hamming': (0.54, 0.46),
+    'blackman': (0.42, 0.5, 0.08),
+}
+
+
+def _window_chunk(coeffs, n, N):
+    if N == 1:
+        return np.ones(len(n))
+    w = np.full(len(n), coeffs[0])
+    for m, a in enumerate(coeffs[1:], start=1):
+        w += (-1)**m * a * np.cos(2 * np.pi * m * n / (N - 1))
+    return w
+
+
+def _dirichlet(nu, N):
+    # sum_{n=0}^{N-1} exp(-j 2 pi nu n), nu in cycles/sample
+    nu = np.asarray(nu, dtype=float)
+    s = np.sin(np.pi * nu)
+    near_int = np.abs(s) < 1e-12
+    ratio = np.where(near_int, 0.0, np.sin(np.pi * nu * N) / np.where(near_int, 1.0, s))
+    D = np.exp(-1j * np.pi * nu * (N - 1)) * ratio
+    return np.where(near_int, N, D)
+
+
+def window_dtft(coeffs, nu, N):
+    """
+    DTFT of a length-N symmetric cosine-sum window at nu cycles/sample.
+    """
+    W = coeffs[0] * _dirichlet(nu, N)
+    for m, a in enumerate(coeffs[1:], start=1):
+        shift = m / (N - 1)
+        W = W + (-1)**m * a / 2 * (_dirichlet(nu - shift, N) + _dirichlet(nu + shift, N))
+    return W
+
+
+class ToneBank:
+    """
+    Streaming single-bin DFT bank.
+
+        bank = ToneBank(fs, [fc - fm, fc, fc + fm], n_total=len(x))
+        for chunk in chunks:
+            bank.update(chunk)
+        c = bank.amplitudes()     # complex: |c| = peak amplitude, angle = phase at t=0
+
+    n_total is needed up front because the window spans the whole record.
+    """
+
+    def __init__(self, fs, freqs, n_total, window='hann', chunk_size=16384):
+        if window not in COSINE_WINDOWS:
+            raise ValueError(f'Unknown window: {window} (choose from {list(COSINE_WINDOWS)})')
+        self.fs = fs
+        self.freqs = np.atleast_1d(np.asarray(freqs, dtype=float))
+        self.n_total = n_total
+        self.coeffs = COSINE_WINDOWS[window]
+        self.chunk_size = chunk_size
+        self.n_seen = 0
+        self.acc = np.zeros(len(self.freqs), dtype=complex)
+        # One chunk of phasors per frequency, reused for every chunk
+        l = np.arange(chunk_size)
+        self._basis = np.exp(-2j * np.pi * np.outer(self.freqs / fs, l))
+
+    def update(self, chunk):
+        chunk = np.asarray(chunk, dtype=float)
+        for start in range(0, len(chunk), self.chunk_size):
+            part = chunk[start:start + self.chunk_size]
+            n0 = self.n_seen
+            n = n0 + np.arange(len(part))
+            if n[-1] >= self.n_total:
+                raise ValueError('More samples than n_total were supplied')
+            xw = part * _window_chunk(self.coeffs, n, self.n_total)
+            # Phase of each frequency at the chunk start (mod 1 keeps precision)
+            start_phase = np.exp(-2j * np.pi * np.mod(self.freqs / self.fs * n0, 1.0))
+            self.acc += start_phase * (self._basis[:, :len(part)] @ xw)
+            self.n_seen += len(part)
+
+    def raw(self):
+        """
+        Bank output normalized by the window sum: for an isolated tone
+        A*cos(2*pi*f*t + phi) this is (A/2) e^{j phi}, the value a full FFT
+        would show at f.
+        """
+        if self.n_seen != self.n_total:
+            raise ValueError(f'Only {self.n_seen} of {self.n_total} samples supplied')
+        gain = np.real(window_dtft(self.coeffs, 0.0, self.n_total))
+        return self.acc / gain
+
+    def amplitudes(self, leakage_correction=True):
+        """
+        Complex cosine amplitudes c_j (|c_j| = peak amplitude). Without
+        leakage correction this is simply 2 * raw().
+        """
+        if not leakage_correction:
+            return 2 * self.raw()
+        if self.n_seen != self.n_total:
+            raise ValueError(f'Only {self.n_seen} of {self.n_total} samples supplied')
+
+        f = self.freqs / self.fs
+        A = window_dtft(self.coeffs, f[:, None] - f[None, :], self.n_total)
+        B = window_dtft(self.coeffs, f[:, None] + f[None, :], self.n_total)
+        # Y = (A c + B conj(c)) / 2, solved for c = u + jv as a real system
+        P, M = A + B, A - B
+        lhs = 0.5 * np.block([[P.real, -M.imag], [P.imag, M.real]])
+        rhs = np.concatenate((self.acc.real, self.acc.imag))
+        uv = np.linalg.lstsq(lhs, rhs, rcond=None)[0]
+        K = len(f)
+        return uv[:K] + 1j * uv[K:]
+
+
+@profiled
+def measure_tones(x, fs, freqs, window='hann', leakage_correction=True, chunk_size=16384):
+    """
+    Complex amplitudes of the cosines at `freqs` in the real signal x
+    (array or np.memmap; read chunk by chunk). |c| is the peak amplitude
+    and angle(c) the phase at the first sample.
+    """
+    bank = ToneBank(fs, freqs, len(x), window=window, chunk_size=chunk_size)
+    for start in range(0, len(x), chunk_size):
+        bank.update(x[start:start + chunk_size])
+    return bank.amplitudes(leakage_correction)
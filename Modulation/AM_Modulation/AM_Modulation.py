@@ -1,13 +1,18 @@
 ##This code provides the implementation of AM Modulation    
 
+import os
+import sys
 import numpy as np
 import matplotlib.pyplot as plt
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..'))
+from DSP.analog import am_modulate
+
 # Parameters
 t = np.linspace(0, 1, 1000, endpoint=False)
 carrier = np.cos(2 * np.pi * 100 * t)
 modulating_signal = np.sin(2 * np.pi * 10 * t)
-modulated_signal = carrier * (1 + 0.5 * modulating_signal)
+modulated_signal = am_modulate(modulating_signal, t, 100, Ac=1, ka=0.5)
 
 #frequency domain
 f = np.fft.fftfreq(len(t))
@@ -1,14 +1,19 @@
 ##This code provides the implementation of DSB SC Modulation
 
+import os
+import sys
 import numpy as np
 import matplotlib.pyplot as plt
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..'))
+from DSP.analog import dsb_sc_modulate
+
 # Parameters
 t = np.linspace(0, 1, 1000, endpoint=False)
 carrier = np.cos(2 * np.pi * 100 * t)
 modulating_signal = np.sin(2 * np.pi * 10 * t)
 
-dsb_sc_modulated_signal = carrier * modulating_signal
+dsb_sc_modulated_signal = dsb_sc_modulate(modulating_signal, t, 100)
 
 #frequency domain
 f = np.fft.fftfreq(len(t))
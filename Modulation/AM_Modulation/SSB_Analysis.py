@@ -2,21 +2,21 @@
 # 1. Visualize "Horns" (Hilbert of Square Wave)
 # 2. Simulate Weaver's Method for sideband cancellation
 
+import os
+import sys
 import numpy as np
 import matplotlib.pyplot as plt
 from scipy.signal import hilbert, butter, filtfilt
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..'))
+from DSP.plotting import plot_decimated
+from DSP.spectrum import get_spectrum
+
 # Parameters
 fs = 10000
 duration = 0.5
 t = np.linspace(0, duration, int(fs*duration), endpoint=False)
 
-def get_spectrum(sig):
-    N = len(sig)
-    spec = np.fft.fftshift(np.fft.fft(sig)) / N
-    freqs = np.fft.fftshift(np.fft.fftfreq(N, 1/fs))
-    return freqs, np.abs(spec)
-
 # ==========================================================
 # PART 1: THE HORN PROBLEM
 # ==========================================================
@@ -37,28 +37,24 @@ m_hat_filt = np.imag(hilbert(m_filt))
 plt.figure(figsize=(12, 8))
 
 plt.subplot(2, 2, 1)
-plt.plot(t, m_sq, 'b')
+plot_decimated(t, m_sq, 'b', xlim=(0, 0.2))
 plt.title('Original Square Wave $m(t)$')
-plt.xlim(0, 0.2)
 plt.grid(True)
 
 plt.subplot(2, 2, 2)
-plt.plot(t, m_hat_sq, 'r')
+plot_decimated(t, m_hat_sq, 'r', xlim=(0, 0.2))
 plt.title('Hilbert Transform $\\hat{m}(t)$ ("Horns")')
-plt.xlim(0, 0.2)
 plt.ylim(-5, 5) # Peaks go to infinity, clip for view
 plt.grid(True)
 
 plt.subplot(2, 2, 3)
-plt.plot(t, m_filt, 'b')
+plot_decimated(t, m_filt, 'b', xlim=(0, 0.2))
 plt.title('Pre-Filtered Signal (LPF)')
-plt.xlim(0, 0.2)
 plt.grid(True)
 
 plt.subplot(2, 2, 4)
-plt.plot(t, m_hat_filt, 'r')
+plot_decimated(t, m_hat_filt, 'r', xlim=(0, 0.2))
 plt.title('Hilbert Transform of Filtered Signal')
-plt.xlim(0, 0.2)
 plt.ylim(-5, 5)
 plt.grid(True)
 
@@ -117,13 +113,12 @@ y_weaver = v2_i * np.cos(2 * np.pi * f_final * t) + v2_q * np.sin(2 * np.pi * f_
 # Depending on sign (+/-) we get USB or LSB relative to f_final (+/- f_sub?)
 
 # Spectrum
-freqs, spec_weaver = get_spectrum(y_weaver)
+freqs, spec_weaver = get_spectrum(y_weaver, fs)
 
 plt.figure(figsize=(10, 6))
-plt.plot(freqs, spec_weaver)
+plot_decimated(freqs, spec_weaver, xlim=(f_final - 2000, f_final + 2000))
 plt.title(f"Weaver's Method Output Spectrum (Carrier={f_final}Hz)")
 plt.xlabel('Frequency (Hz)')
-plt.xlim(f_final - 2000, f_final + 2000)
 plt.grid(True)
 plt.savefig('../Output_Plots/SSB_Analysis_Weaver.png')
 
@@ -1,10 +1,17 @@
 # Single Sideband (SSB) Modulation Simulation
 # Using Hilbert Transform Method (Hartley Modulator concept)
 
+import os
+import sys
 import numpy as np
 import matplotlib.pyplot as plt
 from scipy.signal import hilbert
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..'))
+from DSP.analog import ssb_modulate
+from DSP.plotting import plot_decimated
+from DSP.spectrum import get_spectrum
+
 # Parameters
 fc = 100        # Carrier Frequency (Hz)
 fm = 10         # Message Frequency (Hz)
@@ -24,7 +31,6 @@ m_hat_t = np.imag(analytic_signal)
 
 # 3. Carrier Signals
 c_i = Ac * np.cos(2 * np.pi * fc * t) # In-phase carrier
-c_q = Ac * np.sin(2 * np.pi * fc * t) # Quadrature carrier
 
 # 4. SSB Generation
 # USSB = 0.5 * (m*c - m_hat*c_q)
@@ -32,88 +38,76 @@ c_q = Ac * np.sin(2 * np.pi * fc * t) # Quadrature carrier
 # Note: The 0.5 factor comes from product-to-sum identity scaling. 
 # Usually we might omit it to keep amplitude high, but for strict math we keep it.
 
-ussb_signal = 0.5 * (m_t * c_i - m_hat_t * c_q)
-lssb_signal = 0.5 * (m_t * c_i + m_hat_t * c_q)
+ussb_signal = ssb_modulate(m_t, t, fc, Ac, 'upper', m_hat=m_hat_t)
+lssb_signal = ssb_modulate(m_t, t, fc, Ac, 'lower', m_hat=m_hat_t)
 dsb_sc_signal = m_t * c_i # For comparison
 
 # 5. Frequency Domain Analysis
-def get_spectrum(sig):
-    N = len(sig)
-    spec = np.fft.fftshift(np.fft.fft(sig)) / N
-    freqs = np.fft.fftshift(np.fft.fftfreq(N, 1/f_sim))
-    return freqs, np.abs(spec)
-
-freqs, spec_m = get_spectrum(m_t)
-_, spec_ussb = get_spectrum(ussb_signal)
-_, spec_lssb = get_spectrum(lssb_signal)
-_, spec_dsb = get_spectrum(dsb_sc_signal)
+freqs, spec_m = get_spectrum(m_t, f_sim)
+_, spec_ussb = get_spectrum(ussb_signal, f_sim)
+_, spec_lssb = get_spectrum(lssb_signal, f_sim)
+_, spec_dsb = get_spectrum(dsb_sc_signal, f_sim)
 
 # 6. Plotting
 plt.figure(figsize=(14, 12))
 
 # Time Domain: Message & Hilbert
 plt.subplot(3, 2, 1)
-plt.plot(t, m_t, 'b', label='$m(t)$')
-plt.plot(t, m_hat_t, 'g--', label='$\\hat{m}(t)$ (Hilbert)')
+plot_decimated(t, m_t, 'b', label='$m(t)$', xlim=(0, 0.2))
+plot_decimated(t, m_hat_t, 'g--', label='$\\hat{m}(t)$ (Hilbert)', xlim=(0, 0.2))
 plt.title('Message and its Hilbert Transform')
 plt.xlabel('Time (s)')
 plt.ylabel('Amplitude')
 plt.legend()
 plt.grid(True)
-plt.xlim(0, 0.2)
 
 # Time Domain: Modulated Signals
 plt.subplot(3, 2, 2)
-plt.plot(t, dsb_sc_signal, 'k', alpha=0.3, label='DSB-SC')
-plt.plot(t, ussb_signal, 'r', label='USSB (Upper)')
+plot_decimated(t, dsb_sc_signal, 'k', alpha=0.3, label='DSB-SC', xlim=(0, 0.2))
+plot_decimated(t, ussb_signal, 'r', label='USSB (Upper)', xlim=(0, 0.2))
 plt.title('Time Domain: USSB vs DSB-SC')
 plt.xlabel('Time (s)')
 plt.ylabel('Amplitude')
 plt.legend()
 plt.grid(True)
-plt.xlim(0, 0.2)
 
 plt.subplot(3, 2, 3)
-plt.plot(t, dsb_sc_signal, 'k', alpha=0.3, label='DSB-SC')
-plt.plot(t, lssb_signal, 'b', label='LSSB (Lower)')
+plot_decimated(t, dsb_sc_signal, 'k', alpha=0.3, label='DSB-SC', xlim=(0, 0.2))
+plot_decimated(t, lssb_signal, 'b', label='LSSB (Lower)', xlim=(0, 0.2))
 plt.title('Time Domain: LSSB vs DSB-SC')
 plt.xlabel('Time (s)')
 plt.ylabel('Amplitude')
 plt.legend()
 plt.grid(True)
-plt.xlim(0, 0.2)
 
 # Frequency Domain comparison
 plt.subplot(3, 2, 4)
-plt.plot(freqs, spec_dsb, 'k', alpha=0.5, label='DSB-SC')
-plt.plot(freqs, spec_ussb, 'r', label='USSB')
+plot_decimated(freqs, spec_dsb, 'k', alpha=0.5, label='DSB-SC', xlim=(fc-2*fm, fc+2*fm))
+plot_decimated(freqs, spec_ussb, 'r', label='USSB', xlim=(fc-2*fm, fc+2*fm))
 plt.title('Spectrum: USSB Selection')
 plt.xlabel('Frequency (Hz)')
 plt.ylabel('Magnitude')
 plt.legend()
 plt.grid(True)
-plt.xlim(fc-2*fm, fc+2*fm)
 
 plt.subplot(3, 2, 5)
-plt.plot(freqs, spec_dsb, 'k', alpha=0.5, label='DSB-SC')
-plt.plot(freqs, spec_lssb, 'b', label='LSSB')
+plot_decimated(freqs, spec_dsb, 'k', alpha=0.5, label='DSB-SC', xlim=(fc-2*fm, fc+2*fm))
+plot_decimated(freqs, spec_lssb, 'b', label='LSSB', xlim=(fc-2*fm, fc+2*fm))
 plt.title('Spectrum: LSSB Selection')
 plt.xlabel('Frequency (Hz)')
 plt.ylabel('Magnitude')
 plt.legend()
 plt.grid(True)
-plt.xlim(fc-2*fm, fc+2*fm)
 
 # Full Spectrum View
 plt.subplot(3, 2, 6)
-plt.plot(freqs, spec_m, 'g', label='Message')
-plt.plot(freqs, spec_ussb, 'r', label='USSB')
-plt.plot(freqs, spec_lssb, 'b--', label='LSSB')
+plot_decimated(freqs, spec_m, 'g', label='Message', xlim=(-150, 150))
+plot_decimated(freqs, spec_ussb, 'r', label='USSB', xlim=(-150, 150))
+plot_decimated(freqs, spec_lssb, 'b--', label='LSSB', xlim=(-150, 150))
 plt.title('Full Spectrum Overview')
 plt.xlabel('Frequency (Hz)')
 plt.grid(True)
 plt.legend()
-plt.xlim(-150, 150)
 
 plt.tight_layout()
 plt.savefig('../Output_Plots/SSB_Output.png')
@@ -1,6 +1,11 @@
+import os
+import sys
 import numpy as np
 import matplotlib.pyplot as plt
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..'))
+from DSP.plotting import plot_decimated
+
 # Parameters
 fs = 2000  # Sampling frequency (Hz) - high enough to resolve 2*fc
 T = 1.0    # Duration (seconds)
@@ -44,32 +49,29 @@ plt.figure(figsize=(14, 10))
 
 # 1. Time Domain: Input Signals
 plt.subplot(3, 1, 1)
-plt.plot(t, x_t, label='$x(t)$ (Message)')
-plt.plot(t, c_t, alpha=0.5, label='$c(t)$ (Carrier)')
+plot_decimated(t, x_t, label='$x(t)$ (Message)', xlim=(0, 0.2))  # Zoom in to see waveforms
+plot_decimated(t, c_t, alpha=0.5, label='$c(t)$ (Carrier)', xlim=(0, 0.2))
 plt.title('Input Signals: Message and Carrier')
 plt.xlabel('Time (s)')
 plt.ylabel('Amplitude')
 plt.legend(loc='upper right')
-plt.xlim(0, 0.2) # Zoom in to see waveforms
 plt.grid(True)
 
 # 2. Time Domain: Output of Square Law Modulator
 plt.subplot(3, 1, 2)
-plt.plot(t, v_out, color='green', label='$v_{out}(t)$')
+plot_decimated(t, v_out, color='green', label='$v_{out}(t)$', xlim=(0, 0.2))
 plt.title(f'Square Law Output: $v_{{out}} = {a1}v_{{in}} + {a2}v_{{in}}^2$')
 plt.xlabel('Time (s)')
 plt.ylabel('Amplitude')
 plt.legend(loc='upper right')
-plt.xlim(0, 0.2)
 plt.grid(True)
 
 # 3. Frequency Domain: Spectrum of Output
 plt.subplot(3, 1, 3)
-plt.plot(freqs_shifted, spectrum_mag, color='red')
+plot_decimated(freqs_shifted, spectrum_mag, color='red', xlim=(0, 2.5 * fc))  # Show up to slight past 2*fc
 plt.title('Spectrum of Output Signal $V_{out}(f)$')
 plt.xlabel('Frequency (Hz)')
 plt.ylabel('Magnitude')
-plt.xlim(0, 2.5 * fc) # Show up to slight past 2*fc
 plt.grid(True)
 
 # Annotate peaks based on the derivation
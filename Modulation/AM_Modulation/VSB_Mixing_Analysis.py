@@ -2,14 +2,14 @@
 # 1. Verify VSB Symmetry Condition
 # 2. Visualize Frequency Mixing (Up/Down Conversion)
 
+import os
+import sys
 import numpy as np
 import matplotlib.pyplot as plt
 
-def get_spectrum(sig, fs):
-    N = len(sig)
-    spec = np.fft.fftshift(np.fft.fft(sig)) / N
-    freqs = np.fft.fftshift(np.fft.fftfreq(N, 1/fs))
-    return freqs, np.abs(spec)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..'))
+from DSP.plotting import plot_decimated
+from DSP.spectrum import get_spectrum
 
 # ==========================================================
 # PART 1: VSB SYMMETRY CONDITION
@@ -115,10 +115,9 @@ freqs, spec = get_spectrum(mixed, fs_mix)
 
 plt.figure(figsize=(10, 6))
 plt.subplot(1, 1, 1)
-plt.plot(freqs, spec, 'k')
+plot_decimated(freqs, spec, 'k', xlim=(0, 5000))
 plt.title(f'Mixer Output Spectrum ($f_{{in}}={f_in}, f_{{LO}}={f_lo}$)')
 plt.xlabel('Frequency (Hz)')
-plt.xlim(0, 5000)
 plt.grid(True)
 
 # Annotate peaks
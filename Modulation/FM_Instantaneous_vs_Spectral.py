@@ -1,5 +1,15 @@
+import os
+import sys
 import numpy as np
 import matplotlib.pyplot as plt
+from scipy.special import jv
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from DSP.analog import estimate_inst_freq, fm_tone
+from DSP.plotting import plot_decimated
+from DSP.spectrum import zoom_spectrum
+from DSP.tones import measure_tones
+
 
 # Parameters
 fc = 10000       # Carrier Frequency (10 kHz)
@@ -12,14 +22,22 @@ t = np.linspace(0, duration, int(fs*duration), endpoint=False)
 
 # Generate FM Signal
 # s(t) = cos(2*pi*fc*t + beta*sin(2*pi*fm*t))
-phase = 2 * np.pi * fc * t + beta * np.sin(2 * np.pi * fm * t)
-s_t = np.cos(phase)
+s_t = fm_tone(t, fc, fm, beta)
 
 # Instantaneous Frequency Calculation
-# f_inst(t) = fc + delta_f * cos(2*pi*fm*t)
-# We calculate it theoretically for the plot to be clean and exact
+# Closed form: f_inst(t) = fc + delta_f * cos(2*pi*fm*t)
 f_inst = fc + delta_f * np.cos(2 * np.pi * fm * t)
 
+# Measured from s_t itself (block-streamed analytic-signal phase differentiation)
+f_meas = estimate_inst_freq(s_t, fs, block_size=2**14)
+
+# Validation: the backward phase difference estimates f_inst half a sample
+# earlier, so compare against the closed form at t - 1/(2 fs)
+f_ref = fc + delta_f * np.cos(2 * np.pi * fm * (t - 0.5 / fs))
+edge = 256  # the FIR Hilbert transformer is only approximate at the record ends
+f_err = np.max(np.abs(f_meas[edge:-edge] - f_ref[edge:-edge]))
+print(f"Measured vs closed-form f_inst: max error = {f_err:.3e} Hz")
+
 # Plotting Setup
 fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(16, 6))
 
@@ -28,7 +46,11 @@ cycles_to_plot = 3
 t_plot_duration = cycles_to_plot / fm
 samples_zoom = int(t_plot_duration * fs)
 
-ax1.plot(t[:samples_zoom] * 1000, f_inst[:samples_zoom], 'b-', linewidth=2)
+ax1.plot(t[:samples_zoom] * 1000, f_inst[:samples_zoom], 'b-', linewidth=2, label='Closed form')
+# Measured trace taken whole message periods later (same phase), clear of the
+# FIR start-up transient at the beginning of the record
+offset = 10 * int(fs / fm)
+ax1.plot(t[:samples_zoom:4] * 1000, f_meas[offset:offset + samples_zoom:4], 'c.', markersize=4, label='Measured from $s(t)$')
 ax1.set_title('Instantaneous Frequency vs Time')
 ax1.set_xlabel('Time (ms)')
 ax1.set_ylabel('Frequency (Hz)')
@@ -50,10 +72,9 @@ ax1.text(t[samples_zoom//2]*1000, fc - delta_f*1.5,
 
 
 # --- Pane 2: Frequency Domain (Spectral Bandwidth) ---
-# Compute FFT
-N = len(s_t)
-freqs = np.fft.rfftfreq(N, d=1/fs)
-spectrum = np.abs(np.fft.rfft(s_t)) / N
+# Zoom spectrum over the plotted 0-20 kHz only (1 Hz grid, |FFT|/N scaling)
+freqs, spectrum = zoom_spectrum(s_t, fs, 0, 20000, 20001)
+spectrum = np.abs(spectrum)
 spectrum_db = 20 * np.log10(spectrum + 1e-12) # Use dB for better visibility if needed, or linear for "footprint"
 # User asked for "Spectral Footprint", linear magnitude is often clearer for "peaks" existence unless dynamic range is huge.
 # Given beta=0.05, J0(0.05)~=1, J1(0.05)~=0.025. The sidebands are small (-32dB). 
@@ -64,8 +85,8 @@ spectrum_db = 20 * np.log10(spectrum + 1e-12) # Use dB for better visibility if
 
 spectrum_norm = spectrum / np.max(spectrum)
 
-ax2.plot(freqs, spectrum_norm, 'k')
-ax2.set_xlim(0, 20000) # 0 to 20 kHz
+# 20001 bins on a few hundred pixels: min/max decimation keeps every line
+plot_decimated(freqs, spectrum_norm, 'k', ax=ax2, xlim=(0, 20000)) # 0 to 20 kHz
 ax2.set_title('Spectral Footprint (FFT)')
 ax2.set_xlabel('Frequency (Hz)')
 ax2.set_ylabel('Normalized Amplitude')
@@ -75,10 +96,14 @@ ax2.grid(True)
 peaks_to_mark = [fc, fc-fm, fc+fm]
 labels = ['$f_c$\n(10k)', '$f_c-f_m$\n(8k)', '$f_c+f_m$\n(12k)']
 
-for f_val, lbl in zip(peaks_to_mark, labels):
-    # Find closest index
-    idx = np.argmin(np.abs(freqs - f_val))
-    amp = spectrum_norm[idx]
+# Line amplitudes measured at the exact frequencies (tone bank), normalized
+# to the carrier like the plotted spectrum
+line_amps = np.abs(measure_tones(s_t, fs, peaks_to_mark))
+line_norm = line_amps / line_amps[0]
+print(f"Lines (carrier, LSB, USB): {np.round(line_amps, 5)} "
+      f"vs Bessel J0, J1, J1 = {jv(0, beta):.5f}, {jv(1, beta):.5f}")
+
+for f_val, lbl, amp in zip(peaks_to_mark, labels, line_norm):
     ax2.annotate(lbl, xy=(f_val, amp), xytext=(f_val, amp + 0.1),
                  arrowprops=dict(facecolor='red', shrink=0.05),
                  ha='center')
@@ -87,8 +112,6 @@ for f_val, lbl in zip(peaks_to_mark, labels):
 ax2.text(10000, 0.5, "Spectral Width spans\n8 kHz - 12 kHz\n(Even though Inst Freq\nonly varies $\pm$100 Hz!)", 
          ha='center', bbox=dict(facecolor='yellow', alpha=0.2))
 
-import os
-
 # Save content
 output_dir = os.path.join(os.path.dirname(__file__), '../Output_Plots')
 output_file = os.path.join(output_dir, 'FM_Instantaneous_vs_Spectral.png')
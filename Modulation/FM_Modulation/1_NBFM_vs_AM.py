@@ -1,6 +1,11 @@
+import os
+import sys
 import numpy as np
 import matplotlib.pyplot as plt
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..'))
+from DSP.analog import am_modulate, fm_tone, nbfm_approx
+
 # Parameters
 fc = 100  # Carrier frequency (Hz)
 fm = 5    # Modulating frequency (Hz)
@@ -10,14 +15,14 @@ fs = 4000 # Sampling frequency
 t = np.linspace(0, 0.4, int(fs * 0.4), endpoint=False) # 400ms
 
 # Exact NBFM Signal
-fm_signal = Ac * np.cos(2 * np.pi * fc * t + beta * np.sin(2 * np.pi * fm * t))
+fm_signal = fm_tone(t, fc, fm, beta, Ac)
 
 # NBFM Approximation: s(t) = Ac cos(w_c t) - Ac * beta * sin(w_m t) * sin(w_c t)
-nbfm_approx = Ac * np.cos(2 * np.pi * fc * t) - Ac * beta * np.sin(2 * np.pi * fm * t) * np.sin(2 * np.pi * fc * t)
+nbfm_signal = nbfm_approx(t, fc, fm, beta, Ac)
 
 # AM Signal with identical sideband magnitudes: s(t) = Ac (1 + beta * cos(w_m t)) * cos(w_c t)
 # In NBFM, the integrated message sin(w_m t) modulates the carrier's phase.
-am_signal = Ac * (1 + beta * np.sin(2 * np.pi * fm * t)) * np.cos(2 * np.pi * fc * t)
+am_signal = am_modulate(np.sin(2 * np.pi * fm * t), t, fc, Ac, ka=beta)
 
 # --- Phasor Diagram Representation ---
 # The complex envelope (baseband analytic signal)
@@ -41,7 +46,7 @@ axs[0, 0].legend()
 
 # 2. NBFM Time Domain
 axs[0, 1].plot(t, fm_signal, label='FM Signal (Exact)')
-axs[0, 1].plot(t, nbfm_approx, alpha=0.5, label='NBFM (Approx)')
+axs[0, 1].plot(t, nbfm_signal, alpha=0.5, label='NBFM (Approx)')
 axs[0, 1].plot(t, Ac * np.ones_like(t), 'r--', label='Carrier Envelope')
 axs[0, 1].set_title('Narrowband FM (NBFM) Time Domain')
 axs[0, 1].set_xlabel('Time (s)')
@@ -1,7 +1,13 @@
+import os
+import sys
 import numpy as np
 import matplotlib.pyplot as plt
 from scipy.special import jv
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..'))
+from DSP.analog import fm_tone
+from DSP.tones import measure_tones
+
 def generate_wbfm_plots():
     # --- 1. Bessel Functions Plot ---
     beta_vals = np.linspace(0, 15, 500)
@@ -26,12 +32,13 @@ def generate_wbfm_plots():
     
     # Analyze multiple modulation indexes
     betas = [0.5, 2, 5, 10]
+    measured = {}
     fig, axs = plt.subplots(len(betas), 1, figsize=(12, 12), sharex=True)
     
     for i, beta in enumerate(betas):
         # Time-domain FM signal
         # s(t) = Ac * cos(2pi fc t + beta sin(2pi fm t))
-        s_t = np.cos(2 * np.pi * fc * t + beta * np.sin(2 * np.pi * fm * t))
+        s_t = fm_tone(t, fc, fm, beta)
         
         # FFT to observe the spectrum
         S_f = np.fft.fftshift(np.fft.fft(s_t))
@@ -62,6 +69,13 @@ def generate_wbfm_plots():
         mag_theoretical = np.abs(jv(n_indices, beta))
         
         ax.stem(f_theoretical, mag_theoretical, linefmt='r--', basefmt='k-', markerfmt='ro', label='Bessel Theory $|J_n(\\beta)|$')
+
+        # Measure each line at its exact frequency with the tone bank
+        mag_measured = np.abs(measure_tones(s_t, fs, f_theoretical))
+        measured[beta] = mag_measured
+        ax.plot(f_theoretical, mag_measured, 'gx', markersize=8, label='Measured (tone bank)')
+        print(f"beta = {beta}: max |measured - |J_n(beta)|| = "
+              f"{np.max(np.abs(mag_measured - mag_theoretical)):.2e}")
         
         # Shade Carson's Bandwidth region
         ax.axvspan(fc - B_carson/2, fc + B_carson/2, color='green', alpha=0.15, label=f"Carson's BW: {B_carson} Hz")
@@ -75,6 +89,7 @@ def generate_wbfm_plots():
     plt.tight_layout()
     plt.savefig('2b_WBFM_Spectrum.png', dpi=150)
     print("Saved 2b_WBFM_Spectrum.png")
+    return {'line_magnitudes': measured}
 
 if __name__ == '__main__':
     generate_wbfm_plots()
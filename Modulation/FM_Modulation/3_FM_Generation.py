@@ -1,5 +1,12 @@
+import os
+import sys
 import numpy as np
 import matplotlib.pyplot as plt
+from scipy.signal import firwin, filtfilt, resample_poly
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..'))
+from DSP.analog import fm_modulate, nbfm_approx
+from DSP.profiling import profiled
 
 def generate_fm_methods():
     fs = 10000
@@ -15,12 +22,10 @@ def generate_fm_methods():
     m_t = Am * np.cos(2 * np.pi * fm_msg * t)
     
     # Phase is integral of instantaneous frequency variation
-    # int(m_t) dt = Am/(2*pi*fm_msg) * sin(2*pi*fm_msg*t)
-    integral_m_t = (Am / (2 * np.pi * fm_msg)) * np.sin(2 * np.pi * fm_msg * t)
-    
     # FM direct signal = cos(2*pi*fc*t + 2*pi*kf * integral[m(t)dt])
-    theta_t = 2 * np.pi * fc * t + 2 * np.pi * kf * integral_m_t
-    s_direct = np.cos(theta_t)
+    # (the VCO integrates the sampled message; for this tone the integral is
+    # Am/(2*pi*fm_msg) * sin(2*pi*fm_msg*t))
+    s_direct = fm_modulate(m_t, fs, fc, kf)
     
     # Instantaneous frequency: fi(t) = fc + kf*m(t)
     fi_t = fc + kf * m_t
@@ -53,7 +58,7 @@ def generate_fm_methods():
     beta_nb = 0.2  # NBFM index (must be small)
     
     # NBFM formulation: cos(wc t) - beta * sin(wm t) * sin(wc t)
-    s_nbfm = np.cos(2 * np.pi * fc_nb * t) - beta_nb * np.sin(2 * np.pi * fm_nb * t) * np.sin(2 * np.pi * fc_nb * t)
+    s_nbfm = nbfm_approx(t, fc_nb, fm_nb, beta_nb)
     
     # Step 2: Frequency Multiplier (Simulated using a polynomial non-linearity)
     # y(t) = s_t^3 leads to a 3*fc harmonic among others.
@@ -87,6 +92,164 @@ def generate_fm_methods():
     plt.tight_layout()
     plt.savefig('3b_Indirect_FM.png', dpi=150)
     print("Saved 3b_Indirect_FM.png")
+    return {'s_direct': s_direct, 's_nbfm': s_nbfm, 'S_mult_f': S_mult_f}
+
+
+# --- 3. Multirate Armstrong Chain ---
+# A broadcast Armstrong transmitter cascades several xN multipliers and a
+# down-mixer. Simulating the real passband signal at 91 MHz would need a
+# sample rate of several hundred MHz, so the chain is simulated on the
+# complex envelope z(t) around a tracked centre frequency fc instead:
+#   - Multiplier xN: limiter + Nth-harmonic select -> z_out = (z/|z|)^N,
+#     fc -> N*fc, delta_f -> N*delta_f
+#   - Mixer with LO f_lo: difference product, fc -> |fc - f_lo|
+#     (spectrum is inverted, i.e. z is conjugated, when f_lo > fc)
+#   - Filter: bandpass of width B around fc == lowpass B/2 on z(t)
+# Each stage runs at the lowest rate that holds its output bandwidth
+# (oversample x Carson bandwidth) and the signal is resampled between stages.
+
+# Classic wideband Armstrong chain (200 kHz crystal -> 91.2 MHz, 75 kHz dev.)
+ARMSTRONG_CHAIN = [
+    {'type': 'multiply', 'n': 64},
+    {'type': 'mix', 'f_lo': 10.9e6},
+    {'type': 'filter'},
+    {'type': 'multiply', 'n': 48},
+    {'type': 'filter'},
+]
+
+
+def carson_bandwidth(delta_f, fm):
+    # B = 2(delta_f + fm)
+    return 2 * (delta_f + fm)
+
+
+def measure_deviation(z, fs, trim=0.1):
+    """
+    Peak frequency deviation (Hz) of a complex envelope, ignoring the
+    first/last `trim` fraction of the record (filter transients).
+    """
+    f_inst = np.diff(np.unwrap(np.angle(z))) * fs / (2 * np.pi)
+    k = int(len(f_inst) * trim)
+    f_inst = f_inst[k:len(f_inst) - k]
+    return (np.max(f_inst) - np.min(f_inst)) / 2
+
+
+def _rate_for(bandwidth, fs, oversample):
+    # Smallest integer upsampling factor so that fs*up >= oversample*B
+    return max(1, int(np.ceil(oversample * bandwidth / fs)))
+
+
+@profiled
+def run_multirate_chain(z, fs, fc, delta_f, fm, stages, oversample=4):
+    """
+    Runs the complex envelope z (sampled at fs, centred on fc) through a
+    list of multiplier/mixer/filter stages, resampling automatically so
+    that each stage runs at the lowest rate that avoids aliasing.
+    Returns the output envelope and a per-stage log.
+    """
+    log = [{'stage': 'NBFM source', 'fc': fc, 'delta_f': delta_f,
+            'fs': fs, 'z': z}]
+
+    for stage in stages:
+        if stage['type'] == 'multiply':
+            n = stage['n']
+            # Output bandwidth grows with n*delta_f: interpolate first
+            up = _rate_for(carson_bandwidth(n * delta_f, fm), fs, oversample)
+            if up > 1:
+                z = resample_poly(z, up, 1)
+                fs = fs * up
+            z = (z / np.abs(z)) ** n
+            fc, delta_f = n * fc, n * delta_f
+            name = f'x{n} multiplier'
+
+        elif stage['type'] == 'mix':
+            f_lo = stage['f_lo']
+            if f_lo > fc:
+                z = np.conj(z)
+            fc = abs(fc - f_lo)
+            name = f'Mixer (LO {f_lo / 1e6:g} MHz)'
+
+        elif stage['type'] == 'filter':
+            B = stage.get('bandwidth') or carson_bandwidth(delta_f, fm)
+            taps = firwin(129, B / 2, fs=fs)
+            z = filtfilt(taps, 1, z)
+            # Decimate down to the lowest rate that still holds B
+            down = max(1, int(fs // (oversample * B)))
+            if down > 1:
+                z = resample_poly(z, 1, down)
+                fs = fs / down
+            name = f'BPF (B = {B / 1e3:.1f} kHz)'
+
+        else:
+            raise ValueError(f"Unknown stage type: {stage['type']}")
+
+        log.append({'stage': name, 'fc': fc, 'delta_f': delta_f,
+                    'fs': fs, 'z': z})
+
+    return z, log
+
+
+def generate_armstrong_chain(stages=ARMSTRONG_CHAIN, oversample=4):
+    # NBFM source: 200 kHz crystal, 100 Hz tone, 25 Hz deviation (beta << 1)
+    fc_0 = 200e3
+    fm = 100
+    delta_f_0 = 25
+    beta_0 = delta_f_0 / fm
+    duration = 0.2
+
+    fs_0 = _rate_for(carson_bandwidth(delta_f_0, fm), 1, oversample)
+    t = np.arange(int(fs_0 * duration)) / fs_0
+    # NBFM complex envelope: Ac (1 + j beta sin(w_m t))
+    z_0 = 1 + 1j * beta_0 * np.sin(2 * np.pi * fm * t)
+
+    z, log = run_multirate_chain(z_0, fs_0, fc_0, delta_f_0, fm, stages,
+                                 oversample)
+
+    print(f"{'Stage':<24}{'fc (MHz)':>10}{'df theory':>12}"
+          f"{'df meas.':>12}{'beta':>9}{'fs sim (kHz)':>14}")
+    for entry in log:
+        measured = measure_deviation(entry['z'], entry['fs'])
+        print(f"{entry['stage']:<24}{entry['fc'] / 1e6:>10.4f}"
+              f"{entry['delta_f']:>12.1f}{measured:>12.1f}"
+              f"{entry['delta_f'] / fm:>9.2f}{entry['fs'] / 1e3:>14.2f}")
+
+    # Spectrum of the final envelope, placed back around the output carrier
+    fc_out, fs_out = log[-1]['fc'], log[-1]['fs']
+    Z_f = np.abs(np.fft.fftshift(np.fft.fft(z))) / len(z)
+    f_axis = np.fft.fftshift(np.fft.fftfreq(len(z), 1 / fs_out)) + fc_out
+    B_out = carson_bandwidth(log[-1]['delta_f'], fm)
+
+    fig3, axs3 = plt.subplots(2, 1, figsize=(12, 8))
+
+    stage_idx = np.arange(len(log))
+    axs3[0].semilogy(stage_idx, [e['delta_f'] / fm for e in log], 'bo-',
+                     label='$\\beta$')
+    axs3[0].semilogy(stage_idx, [e['fs'] for e in log], 'rs--',
+                     label='Simulation rate (Hz)')
+    axs3[0].semilogy(stage_idx, [e['fc'] for e in log], 'g^:',
+                     label='Carrier $f_c$ (Hz)')
+    axs3[0].set_xticks(stage_idx)
+    axs3[0].set_xticklabels([e['stage'] for e in log], rotation=15)
+    axs3[0].set_title('Armstrong Chain: $\\beta$ grows, simulation rate '
+                      'tracks the bandwidth (not the carrier)')
+    axs3[0].legend()
+    axs3[0].grid(True, which='both')
+
+    axs3[1].plot(f_axis / 1e6, Z_f, 'r')
+    axs3[1].axvspan((fc_out - B_out / 2) / 1e6, (fc_out + B_out / 2) / 1e6,
+                    color='green', alpha=0.15,
+                    label=f"Carson's BW: {B_out / 1e3:.1f} kHz")
+    axs3[1].set_title(f'Output Spectrum ($f_c = {fc_out / 1e6:.1f}$ MHz, '
+                      f'$\\beta = {log[-1]["delta_f"] / fm:.0f}$)')
+    axs3[1].set_xlabel('Frequency (MHz)')
+    axs3[1].legend(loc='upper right')
+    axs3[1].grid(True)
+
+    plt.tight_layout()
+    plt.savefig('3c_Armstrong_Chain.png', dpi=150)
+    print("Saved 3c_Armstrong_Chain.png")
+    return {'chain_log': log}
 
 if __name__ == '__main__':
     generate_fm_methods()
+    generate_armstrong_chain()
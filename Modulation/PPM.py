@@ -1,9 +1,15 @@
 # Pulse Position Modulation (PPM) Simulation
 # Using Shifted Center Definition
 
+import os
+import sys
 import numpy as np
 import matplotlib.pyplot as plt
-import scipy.signal as signal
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from DSP.pulse import ppm_modulate, ppm_to_pwm
+from DSP.filters import butter_lowpass_filter
+from DSP.plotting import axvlines, plot_decimated
 
 # Parameters
 fs = 200        # Sampling Frequency (Hz)
@@ -27,34 +33,7 @@ kp_p = 0.4 * Ts     # Max shift sensitivity (40% of slot)
 # Constraint check: |Shift| + tau/2 < Ts/2
 # 0.4*Ts + 0.1*Ts = 0.5*Ts. Valid limit.
 
-ppm_signal = np.zeros_like(t)
-clock_ticks = np.zeros_like(t) # For visualization
-
-num_pulses = int(duration / Ts)
-for n in range(num_pulses):
-    t_clock = n * Ts
-    if t_clock >= duration: break
-    
-    idx_clock = int(t_clock * f_sim)
-    if idx_clock < len(t):
-        clock_ticks[idx_clock] = 1 # Marker
-    
-    # Sample Message
-    sample_val = m_t[idx_clock] if idx_clock < len(m_t) else 0
-    
-    # Calculate Center Position
-    t_center = t_clock + kp_p * sample_val
-    
-    # Generate Pulse
-    # Pulse exists in [t_center - tau/2, t_center + tau/2]
-    t_start = t_center - tau/2
-    t_end = t_center + tau/2
-    
-    idx_start = int(t_start * f_sim)
-    idx_end = int(t_end * f_sim)
-    
-    if idx_start < len(t) and idx_end > 0:
-        ppm_signal[max(0, idx_start) : min(len(t), idx_end)] = A
+ppm_signal, clock_ticks = ppm_modulate(m_t, f_sim, fs, tau, kp_p, A)
 
 # Demodulation
 # Strategy: PPM -> PWM -> LPF
@@ -62,25 +41,9 @@ for n in range(num_pulses):
 # Set High at Clock Tick (n*Ts)
 # Reset Low at PPM Pulse Leading Edge
 
-pwm_conv = np.zeros_like(t)
-current_state = 0
-
 # Edge Detection Loop
-# efficient iteration
 clock_period_samples = int(f_sim * Ts)
-
-for i in range(1, len(t)):
-    # 1. Synchronization (Clock Tick)
-    # Using modulo logic or pre-calculated clock ticks
-    if (i % clock_period_samples) == 0:
-        current_state = 1
-        
-    # 2. Reset on PPM Pulse (Rising Edge)
-    # Detect rising edge: current is high, previous was low
-    if ppm_signal[i] > 0.5 and ppm_signal[i-1] < 0.5 and current_state == 1:
-        current_state = 0
-        
-    pwm_conv[i] = current_state
+pwm_conv = ppm_to_pwm(ppm_signal, clock_period_samples)
 
 # Filter Design
 # A high order Butterworth can cause ringing on step inputs.
@@ -89,8 +52,7 @@ for i in range(1, len(t)):
 cutoff = 2 * fm # Nyquist is 2*fm, usually we want some buffer. 
 # Previous was 4*fm, might let too much switching noise through.
 # Let's try 3rd order Butterworth.
-b, a = signal.butter(3, cutoff / (f_sim / 2), btype='low')
-demod_signal = signal.filtfilt(b, a, pwm_conv)
+demod_signal = butter_lowpass_filter(pwm_conv, cutoff, f_sim, order=3)
 
 # Normalization and Offset Removal
 # Remove DC
@@ -112,43 +74,41 @@ demod_final = demod_ac * scale_factor * sign
 # The current f_sim=10000 with fs=200 gives 50 samples/cycle, which is usually sufficient.
 
 # Plotting
+# Only the first 0.2 s is shown: lines are clipped to it and min/max
+# decimated to the axes width (DSP.plotting)
 plt.figure(figsize=(14, 12))
+view = (0, 0.2)
 
 # Message
 plt.subplot(4, 1, 1)
-plt.plot(t, m_t, 'g', label='Message $m(t)$')
+plot_decimated(t, m_t, 'g', xlim=view, label='Message $m(t)$')
 plt.title('Message Signal')
 plt.grid(True)
-plt.xlim(0, 0.2)
 
 # PPM
 plt.subplot(4, 1, 2)
-# Plot clock ticks for reference
-for n in range(int(duration/Ts)):
-    plt.axvline(n*Ts, color='k', linestyle=':', alpha=0.3)
-plt.plot(t, ppm_signal, 'b', label='PPM Signal')
+# Plot clock ticks for reference (one LineCollection, not one artist per tick)
+axvlines(np.arange(int(duration/Ts)) * Ts, xlim=view, color='k', linestyle=':', alpha=0.3)
+plot_decimated(t, ppm_signal, 'b', xlim=view, label='PPM Signal')
 plt.title(f'PPM Signal (Shifted Center). Fixed $\\tau={tau*1000:.1f}$ms')
 plt.ylabel('Amplitude')
 plt.grid(True)
-plt.xlim(0, 0.2)
 plt.ylim(-0.2, 1.2)
 
 # Converted PWM
 plt.subplot(4, 1, 3)
-plt.step(t, pwm_conv, where='post', color='r', linewidth=1, label='Converted PWM')
+plot_decimated(t, pwm_conv, color='r', linewidth=1, drawstyle='steps-post', xlim=view, label='Converted PWM')
 plt.title('Internal PPM-to-PWM Conversion (Variable Width)')
 plt.grid(True)
-plt.xlim(0, 0.2)
 plt.ylim(-0.2, 1.2)
 
 # Demod
 plt.subplot(4, 1, 4)
-plt.plot(t, m_t, 'g--', label='Original', alpha=0.5)
-plt.plot(t, demod_final, 'k', label='Demodulated')
+plot_decimated(t, m_t, 'g--', xlim=view, label='Original', alpha=0.5)
+plot_decimated(t, demod_final, 'k', xlim=view, label='Demodulated')
 plt.title('Demodulation (via PWM Conversion + LPF)')
 plt.legend()
 plt.grid(True)
-plt.xlim(0, 0.2)
 
 plt.tight_layout()
 plt.savefig('../Output_Plots/PPM_Output.png')
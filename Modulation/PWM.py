@@ -1,9 +1,15 @@
 # Pulse Width Modulation (PWM) Simulation
 # Using Trailing-Edge Definition
 
+import os
+import sys
 import numpy as np
 import matplotlib.pyplot as plt
-import scipy.signal as signal
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from DSP.pulse import pwm_modulate
+from DSP.filters import butter_lowpass_filter
+from DSP.plotting import plot_decimated
 
 # Parameters
 fs = 200        # Sampling Frequency of message (Hz) - determines pulse rate
@@ -28,43 +34,13 @@ kp_w = 0.8 * Ts / 2 # Sensitivity. Max shift should ensure tau_n < Ts.
 # Let basic width tau_0 be Ts/2 (50% duty cycle at 0)
 tau_0 = Ts/2
 
-pwm_signal = np.zeros_like(t)
-
-# Loop over pulse indices
-num_pulses = int(duration / Ts)
-for n in range(num_pulses):
-    # Sample message at start of period n*Ts
-    t_sample = n * Ts
-    if t_sample >= duration: break
-    
-    # We need sample index in high res grid
-    idx = int(t_sample * f_sim) 
-    sample_val = m_t[idx] if idx < len(m_t) else 0
-    
-    # Calculate Pulse Width
-    tau_n = tau_0 + kp_w * sample_val
-    
-    # Ensure physical limits (0 < tau_n < Ts)
-    tau_n = np.clip(tau_n, 0, Ts)
-    
-    # Trailing Edge Logic: Pulse is ON from [n*Ts] to [n*Ts + tau_n]
-    # In 'center' terms: center = t_sample + tau_n/2. Width = tau_n.
-    
-    # Generate Pulse in Time Array
-    # Start Index
-    start_idx = idx
-    # End Index
-    end_idx = start_idx + int(tau_n * f_sim)
-    
-    if start_idx < len(t):
-        pwm_signal[start_idx : min(end_idx, len(t))] = A
+pwm_signal = pwm_modulate(m_t, f_sim, fs, tau_0, kp_w, A)
 
 # Demodulation
 # Simple LPF recovers the baseband from PWM
 # Design Butterworth Low Pass Filter
 cutoff = 4 * fm # Cutoff slightly above message frequency
-b, a = signal.butter(4, cutoff / (f_sim / 2), btype='low')
-demod_signal = signal.filtfilt(b, a, pwm_signal)
+demod_signal = butter_lowpass_filter(pwm_signal, cutoff, f_sim, order=4)
 
 # Remove Delay/Phase shift for visual comparison (filtfilt does zero phase, but Amplitude is scaled)
 # PWM DC component is A * (tau_0/Ts). AC component is proportional to kp_w.
@@ -87,23 +63,21 @@ plt.ylabel('Amplitude')
 
 # PWM
 plt.subplot(3, 1, 2)
-plt.plot(t, pwm_signal, 'b', label='PWM Signal (Trailing Edge)')
-plt.step(t, pwm_signal, where='post', color='b', linewidth=1) # Step plot looks cleaner for pulses
+# Zoom in: show 5 cycles
+plot_decimated(t, pwm_signal, 'b', label='PWM Signal (Trailing Edge)', xlim=(0, 5/fm))
+plot_decimated(t, pwm_signal, color='b', linewidth=1, drawstyle='steps-post', xlim=(0, 5/fm)) # Step plot looks cleaner for pulses
 plt.title('Pulse Width Modulation (Trailing Edge)')
 plt.ylabel('Amplitude')
 plt.grid(True)
-# Zoom in
-plt.xlim(0, 5/fm) # Show 5 cycles
 
 # Demod
 plt.subplot(3, 1, 3)
-plt.plot(t, m_t, 'g--', label='Original', alpha=0.5)
-plt.plot(t, demod_final, 'r', label='Demodulated (LPF)')
+plot_decimated(t, m_t, 'g--', label='Original', alpha=0.5, xlim=(0, 5/fm))
+plot_decimated(t, demod_final, 'r', label='Demodulated (LPF)', xlim=(0, 5/fm))
 plt.title('Demodulation (Low Pass Filter)')
 plt.ylabel('Amplitude')
 plt.legend()
 plt.grid(True)
-plt.xlim(0, 5/fm)
 
 plt.tight_layout()
 plt.savefig('../Output_Plots/PWM_Output.png')
@@ -1,9 +1,17 @@
 # Flat Top Sampling Simulation
-# Demonstrates "Sample and Hold" and the Aperture Effect
+# Demonstrates "Sample and Hold" and the Aperture Effect, and the ideal
+# (sinc) reconstruction of x(t) from its samples
 
+import os
+import sys
 import numpy as np
 import matplotlib.pyplot as plt
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from DSP.plotting import plot_decimated
+from DSP.profiling import stage
+from DSP.reconstruct import SincInterpolator, sinc_reconstruct, fft_interpolate, reconstruction_error_db
+
 # Parameters
 B = 5       # Bandwidth (Hz)
 fs = 20     # Sampling Frequency (Hz)
@@ -30,20 +38,21 @@ x_flat = np.zeros_like(t)
 start_n = int(np.ceil(t[0] / Ts))
 end_n = int(np.floor(t[-1] / Ts))
 
-for n in range(start_n, end_n + 1):
-    t_sample = n * Ts
-    # Sample value
-    # We need to interpolate x(t) at t_sample because t might not hit exactly simulation grid
-    # Or just evaluate analytical function
-    sample_val = 2 * B * np.sinc(2 * B * t_sample)
-    
-    # Pulse generation: rect((t - t_sample)/tau) centered at t_sample_center?
-    # Flat top usually implies starting at sample instant or centered?
-    # Usually "sample at nTs" -> pulse exists at [nTs - tau/2, nTs + tau/2] or [nTs, nTs+tau].
-    # To align with Natural Sampling previous example, let's center it.
-    
-    mask = np.abs(t - t_sample) <= tau/2
-    x_flat[mask] = sample_val
+with stage('flat_top.sample_hold', t):
+    for n in range(start_n, end_n + 1):
+        t_sample = n * Ts
+        # Sample value
+        # We need to interpolate x(t) at t_sample because t might not hit exactly simulation grid
+        # Or just evaluate analytical function
+        sample_val = 2 * B * np.sinc(2 * B * t_sample)
+
+        # Pulse generation: rect((t - t_sample)/tau) centered at t_sample_center?
+        # Flat top usually implies starting at sample instant or centered?
+        # Usually "sample at nTs" -> pulse exists at [nTs - tau/2, nTs + tau/2] or [nTs, nTs+tau].
+        # To align with Natural Sampling previous example, let's center it.
+
+        mask = np.abs(t - t_sample) <= tau/2
+        x_flat[mask] = sample_val
 
 # 3. Demodulation (LPF)
 # Aperture Effect Correction (Equalizer) is theoretically needed: H_eq(f) = 1/sinc(f*tau)
@@ -67,50 +76,82 @@ x_demod = np.real(x_demod)
 # So we divide by d to normalize (same as natural sampling).
 x_demod_scaled = x_demod / d
 
-# 4. Frequency Domain Analysis
+# 4. Reconstruction from the Samples
+# The sample sequence x[n] = x(nTs) read off the simulated waveform (every
+# Ts falls on the simulation grid), interpolated back onto the grid
+n_idx = np.arange(start_n, end_n + 1)
+x_n = x_t[np.round((n_idx * Ts - t[0]) * f_sim).astype(int)]
+sinc_interp = SincInterpolator(half_width=16)
+with stage('flat_top.reconstruct', t):
+    x_rec = sinc_reconstruct(x_n, fs, t, t0=n_idx[0] * Ts)
+    x_rec_ws = sinc_interp(x_n, fs, t, t0=n_idx[0] * Ts)
+rec_error_db = reconstruction_error_db(x_rec, x_t)
+rec_ws_error_db = reconstruction_error_db(x_rec_ws, x_t)
+print(f"Reconstruction from {len(x_n)} samples: exact sinc sum {rec_error_db:.1f} dB, "
+      f"windowed sinc {rec_ws_error_db:.1f} dB (error power / signal power)")
+
+# The error is set by the samples missing outside the record (the sinc
+# message decays only as 1/t), so longer records reconstruct the central
+# 2 s better, down to the interpolator's own floor
+record_lengths = [2, 20, 200, 2000]
+long_record_errors = []
+for T_rec in record_lengths:
+    n_long = np.arange(int(np.ceil(-T_rec / 2 * fs)), int(np.floor(T_rec / 2 * fs)) + 1)
+    x_long = 2 * B * np.sinc(2 * B * n_long * Ts)
+    t0_long = n_long[0] * Ts
+    long_record_errors.append((
+        reconstruction_error_db(sinc_reconstruct(x_long, fs, t, t0=t0_long), x_t),
+        reconstruction_error_db(sinc_interp(x_long, fs, t, t0=t0_long), x_t),
+        # FFT zero-padding of the whole record onto the simulation grid
+        reconstruction_error_db(fft_interpolate(x_long, f_sim // fs)[np.round((t - t0_long) * f_sim).astype(int)], x_t),
+    ))
+print(f"{'Record (s)':>10}{'exact sinc':>12}{'windowed':>10}{'FFT':>8}   (dB, central 2 s)")
+for T_rec, errs in zip(record_lengths, long_record_errors):
+    print(f"{T_rec:>10}" + ''.join(f'{e:>{w}.1f}' for e, w in zip(errs, (12, 10, 8))))
+
+# 5. Frequency Domain Analysis
 X_f = np.fft.fftshift(np.fft.fft(x_t)) * (1/f_sim)
 X_flat_spectrum = np.fft.fftshift(np.fft.fft(x_flat)) * (1/f_sim)
 X_demod_spectrum = np.fft.fftshift(np.fft.fft(x_demod_scaled)) * (1/f_sim)
 
 freqs = np.fft.fftshift(freqs_full)
 
-# 5. Plotting
+# 6. Plotting
 plt.figure(figsize=(14, 12))
 
 # Time Domain
 plt.subplot(3, 1, 1)
-plt.plot(t, x_t, label='Original $x(t)$', linewidth=1.5)
-plt.plot(t, x_flat, 'r', label='Flat Top Sampled', linewidth=2, alpha=0.7)
+plot_decimated(t, x_t, label='Original $x(t)$', linewidth=1.5, xlim=(-0.5, 0.5))
+plot_decimated(t, x_flat, 'r', label='Flat Top Sampled', linewidth=2, alpha=0.7, xlim=(-0.5, 0.5))
 plt.title(f'Flat Top Sampling ($B={B}$Hz, $f_s={fs}$Hz, $d={d:.2f}$)')
 plt.ylabel('Amplitude')
 plt.legend()
 plt.grid(True)
-plt.xlim(-0.5, 0.5)
 
 # Demodulation
 plt.subplot(3, 1, 2)
-plt.plot(t, x_t, 'g--', label='Original', alpha=0.5)
-plt.plot(t, x_demod_scaled, 'b', label='Demodulated')
-plt.title('Demodulated Signal (LPF only)')
+plot_decimated(t, x_t, 'g--', label='Original', alpha=0.5, xlim=(-0.5, 0.5))
+plot_decimated(t, x_demod_scaled, 'b', label='Demodulated', xlim=(-0.5, 0.5))
+plot_decimated(t, x_rec_ws, 'm:', label=f'Sinc reconstruction from samples ({rec_ws_error_db:.0f} dB error)',
+               linewidth=2, xlim=(-0.5, 0.5))
+plt.title('Demodulated Signal (LPF only) and Reconstruction from Samples')
 plt.ylabel('Amplitude')
 plt.legend()
 plt.grid(True)
-plt.xlim(-0.5, 0.5)
 
 # Frequency Domain - Aperture Effect
 plt.subplot(3, 1, 3)
-plt.plot(freqs, np.abs(X_f), label='Original Spectrum')
-plt.plot(freqs, np.abs(X_flat_spectrum), 'r', label='Flat Top Spectrum')
+plot_decimated(freqs, np.abs(X_f), label='Original Spectrum', xlim=(-50, 50))
+plot_decimated(freqs, np.abs(X_flat_spectrum), 'r', label='Flat Top Spectrum', xlim=(-50, 50))
 # Overlay Sinc Envelope for Aperture Effect visualization
 # Envelope H(f) = tau * sinc(f*tau) * fs ? 
 # Peaks follow sinc(f*tau).
 envelope = d * np.abs(np.sinc(freqs * tau)) # Normalized to match DC=d
-plt.plot(freqs, envelope, 'k--', alpha=0.4, label='Aperture Envelope (sinc)')
+plot_decimated(freqs, envelope, 'k--', alpha=0.4, label='Aperture Envelope (sinc)', xlim=(-50, 50))
 
 plt.title('Frequency Domain & Aperture Effect')
 plt.xlabel('Frequency (Hz)')
 plt.ylabel('Magnitude')
-plt.xlim(-50, 50)
 plt.legend()
 plt.grid(True)
 
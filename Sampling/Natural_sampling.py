@@ -1,7 +1,13 @@
 # Natural Sampling Implementation
+import os
+import sys
 import numpy as np
 import matplotlib.pyplot as plt
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from DSP.plotting import plot_decimated
+from DSP.pulse import natural_pulse_train
+
 # Parameters
 B = 5       # Bandwidth of the signal (Hz)
 fs = 20     # Sampling frequency (Hz)
@@ -17,17 +23,9 @@ t = np.linspace(-T_duration/2, T_duration/2, int(f_sim * T_duration), endpoint=F
 
 x_t = 2 * B * np.sinc(2 * B * t)
 
-# 2. Pulse Train Generation
 # 2. Pulse Train Generation
 # Rectangular pulses with width tau and period Ts = 1/fs
-Ts = 1/fs
-pulse_train = np.zeros_like(t)
-for n in range(int(-T_duration/2 * fs) - 1, int(T_duration/2 * fs) + 2):
-    center = n * Ts
-    # Find indices within [center - tau/2, center + tau/2]
-    # Use boolean mask for efficiency
-    mask = np.abs(t - center) <= tau/2
-    pulse_train[mask] = 1
+pulse_train = natural_pulse_train(t, fs, tau)
 
 # 3. Natural Sampling
 x_s = x_t * pulse_train
@@ -74,41 +72,37 @@ plt.figure(figsize=(14, 12))
 
 # Time Domain
 plt.subplot(4, 1, 1)
-plt.plot(t, x_t, label='Original Signal $x(t)$', linewidth=2)
+plot_decimated(t, x_t, label='Original Signal $x(t)$', linewidth=2, xlim=(-0.5, 0.5))
 # plt.plot(t, x_s, label='Sampled Signal $x_s(t)$', alpha=0.5)
 plt.title('Original Signal')
 plt.ylabel('Amplitude')
-plt.xlim(-0.5, 0.5)
 plt.legend()
 plt.grid(True)
 
 plt.subplot(4, 1, 2)
-plt.plot(t, pulse_train, 'r', label='Switching Signal $s(t)$', alpha=0.6)
-plt.plot(t, x_s, 'k', label='Sampled Signal $x_s(t)$', alpha=0.8)
+plot_decimated(t, pulse_train, 'r', label='Switching Signal $s(t)$', alpha=0.6, xlim=(-0.5, 0.5))
+plot_decimated(t, x_s, 'k', label='Sampled Signal $x_s(t)$', alpha=0.8, xlim=(-0.5, 0.5))
 plt.title('Natural Sampling')
 plt.ylabel('Amplitude')
-plt.xlim(-0.5, 0.5)
 plt.legend()
 plt.grid(True)
 
 plt.subplot(4, 1, 3)
-plt.plot(t, x_t, 'g--', label='Original $x(t)$', alpha=0.5)
-plt.plot(t, x_demod_scaled, 'b', label='Demodulated Output $y(t)$')
+plot_decimated(t, x_t, 'g--', label='Original $x(t)$', alpha=0.5, xlim=(-0.5, 0.5))
+plot_decimated(t, x_demod_scaled, 'b', label='Demodulated Output $y(t)$', xlim=(-0.5, 0.5))
 plt.title('Demodulated Signal (LPF Output)')
 plt.ylabel('Amplitude')
-plt.xlim(-0.5, 0.5)
 plt.legend()
 plt.grid(True)
 
 # Frequency Domain
 plt.subplot(4, 1, 4)
-plt.plot(freqs, np.abs(X_f), label='Original $|X(f)|$')
-plt.plot(freqs, np.abs(Xs_f), label='Sampled $|X_s(f)|$', alpha=0.6)
-plt.plot(freqs, np.abs(Xd_f), 'k--', label='Demodulated $|Y(f)|$')
+plot_decimated(freqs, np.abs(X_f), label='Original $|X(f)|$', xlim=(-50, 50))
+plot_decimated(freqs, np.abs(Xs_f), label='Sampled $|X_s(f)|$', alpha=0.6, xlim=(-50, 50))
+plot_decimated(freqs, np.abs(Xd_f), 'k--', label='Demodulated $|Y(f)|$', xlim=(-50, 50))
 plt.title('Frequency Domain')
 plt.xlabel('Frequency (Hz)')
 plt.ylabel('Magnitude')
-plt.xlim(-50, 50)
 plt.legend()
 plt.grid(True)
 
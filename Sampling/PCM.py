@@ -1,33 +1,19 @@
 # Pulse Code Modulation (PCM) Simulation
-# Demonstrates Sampling, Quantization, and SNR Analysis
+# Demonstrates Sampling, Quantization, and SNR Analysis, and compares
+# uniform PCM with differential coders (DM, ADM, DPCM, IMA ADPCM), dithered
+# and noise-shaped PCM, and sigma-delta modulation
 
+import os
+import sys
 import numpy as np
 import matplotlib.pyplot as plt
 
-def uniform_pcm(x, n_bits, V_min=-1, V_max=1):
-    """
-    Applies uniform PCM quantization to a signal.
-    """
-    # 1. Levels
-    L = 2**n_bits
-    
-    # 2. Step Size (Delta)
-    delta = (V_max - V_min) / L
-    
-    # 3. Quantization
-    # x_norm ranges roughly 0 to L
-    x_norm = (x - V_min) / delta
-    x_q_int = np.round(x_norm)
-    
-    # Clip to valid limits [0, L-1]
-    # In mid-tread or mid-rise, getting exact boundary handling is key for SNR
-    # This maps to integer indices
-    x_q_int = np.clip(x_q_int, 0, L - 1)
-    
-    # Reconstruction
-    x_q = x_q_int * delta + V_min
-    
-    return x_q, delta
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from DSP.differential import compare_coders
+from DSP.linecode import SCHEMES, line_encode, shape_pulses, transmit_bits
+from DSP.noiseshape import (CICDecimator, NoiseShaper, SigmaDelta, dithered_pcm, inband_snr_db,
+                            shaped_snr_theory_db)
+from DSP.pcm import uniform_pcm, calculate_snr_db, get_binary_codes, pcm_encode, pack_codes
 
 # Parameters
 fm = 5          # Message Frequency (Hz)
@@ -53,12 +39,6 @@ x_q8, delta8 = uniform_pcm(x_s, n_bits_snr, -1.2, 1.2)
 error3 = x_q3 - x_s
 error8 = x_q8 - x_s
 
-def calculate_snr_db(signal, noise):
-    power_s = np.mean(signal**2)
-    power_n = np.mean(noise**2)
-    if power_n == 0: return float('inf')
-    return 10 * np.log10(power_s / power_n)
-
 snr3_real = calculate_snr_db(x_s, error3)
 snr8_real = calculate_snr_db(x_s, error8)
 
@@ -71,17 +51,103 @@ snr8_theo = 1.76 + 6.02 * n_bits_snr + 20*np.log10(2/2.4)
 
 # 4. Binary Encoding (Demonstration for first few samples)
 # Code samples as binary strings
-def get_binary_codes(x_val, n_bits, V_min, V_max):
-    L = 2**n_bits
-    delta = (V_max - V_min) / L
-    x_norm = (x_val - V_min) / delta
-    idx = int(np.clip(np.round(x_norm), 0, L-1))
-    return format(idx, f'0{n_bits}b')
-
 sample_codes = [get_binary_codes(val, 3, -1.2, 1.2) for val in x_s[:5]]
 print(f"Sample Binary Codes (3-bit): {sample_codes}")
 
-# 5. Plotting
+# Packed bitstream of the same code words, straight from the code array
+codes3 = pcm_encode(x_s, n_bits_visual, -1.2, 1.2)
+packed3 = pack_codes(codes3, n_bits_visual)
+bits5 = np.unpackbits(packed3, count=5 * n_bits_visual)
+
+# 5. Line Coding of the first five code words (8 samples per bit)
+sps = 8
+line_waves = {scheme: shape_pulses(line_encode(bits5, scheme)[0], sps) for scheme in SCHEMES}
+t_bits = np.arange(len(bits5) * sps) / sps
+
+# The record repeated to 2*10^5 bits through the channel at Eb/N0 = 4 dB
+# (matched-filter receiver)
+n_stream = 200000
+packed_stream = pack_codes(np.resize(codes3, n_stream // n_bits_visual), n_bits_visual)
+ber_stats = {scheme: transmit_bits(packed_stream, n_stream - n_stream % n_bits_visual, scheme, 4.0,
+                                   sps=sps, rng=np.random.default_rng(0))[1]
+             for scheme in SCHEMES}
+for scheme, st in ber_stats.items():
+    print(f"{scheme:>10}: {st['errors']} / {st['bits']} bit errors at Eb/N0 = 4 dB "
+          f"(theory BER {st['ber_theory']:.2e})")
+
+# 6. Differential Coding vs PCM on the same input: 10 s of the 5 Hz tone
+# plus a 13 Hz tone at the same fs, all coders block-processed
+t_d = np.arange(10 * fs) / fs
+x_d = 0.6 * np.cos(2 * np.pi * fm * t_d) + 0.3 * np.sin(2 * np.pi * 13 * t_d)
+coder_rows = compare_coders(x_d, -1.2, 1.2)
+print(f"{'Coder':<10}{'bits/sample':>12}{'SNR (dB)':>10}")
+for row in coder_rows:
+    print(f"{row['coder']:<10}{row['bits_per_sample']:>12}{row['snr_db']:>10.2f}")
+
+# 7. Dither, noise shaping and sigma-delta
+# A tone 2.5 steps high at 8 bits: plain rounding leaves an error that
+# repeats with the tone (harmonics), TPDF dither turns it into a flat floor
+rng_d = np.random.default_rng(357)
+x_low = 2.5 * delta8 * np.cos(2 * np.pi * fm * t_d)
+f_low = np.fft.rfftfreq(len(t_d), 1 / fs)
+low_spectra = {}
+for name, y in [('Plain rounding', uniform_pcm(x_low, n_bits_snr, -1.2, 1.2)[0]),
+                ('TPDF dither', dithered_pcm(x_low, n_bits_snr, -1.2, 1.2, 'tpdf', rng=rng_d)[0])]:
+    low_spectra[name] = 20 * np.log10(np.abs(np.fft.rfft((y - x_low) * np.hanning(len(y)))) / len(y) + 1e-12)
+# Largest error component at a harmonic of fm (dB)
+harmonics = (f_low % fm == 0) & (f_low > 0)
+low_spur_db = {name: float(np.max(spec[harmonics])) for name, spec in low_spectra.items()}
+
+# The message oversampled 64x (band = fs/2): 8-bit requantization with TPDF
+# dither and error feedback of order 0 .. 3, blocks of 4096 samples
+osr = 64
+fs_os = fs * osr
+t_os = np.arange(10 * fs_os) / fs_os
+x_os = 0.8 * np.cos(2 * np.pi * fm * t_os)
+os_blocks = [x_os[i:i + 4096] for i in range(0, len(x_os), 4096)]
+shaper_orders = [0, 1, 2, 3]
+shaped = {}
+for order in shaper_orders:
+    shaper = NoiseShaper(n_bits_snr, -1.2, 1.2, order=order, dither='tpdf', rng=rng_d)
+    shaped[order] = np.concatenate([shaper.process(b) for b in os_blocks])
+shaped_snr_db = [inband_snr_db(shaped[order], fs_os, fm, fs / 2) for order in shaper_orders]
+# TPDF dither adds twice the rounding noise power: -4.77 dB
+shaped_theory_db = [shaped_snr_theory_db(n_bits_snr, order, osr, 20 * np.log10(0.8 / 1.2)) - 4.77
+                    for order in shaper_orders]
+
+# Sigma-delta modulators over +-1.2 V, decimated back to fs by a 3rd-order CIC
+sdm_cases = [(1, 2), (2, 2), (1, 4), (2, 4)]          # (order, levels)
+sdm_rows = []
+for order, levels in sdm_cases:
+    sdm = SigmaDelta(order, levels, full_scale=1.2)
+    cic = CICDecimator(osr, order=3)
+    codes = [sdm.process(b) for b in os_blocks]
+    decimated = sdm.values(np.concatenate([cic.process(c) for c in codes]))
+    codes = np.concatenate(codes)
+    sdm_rows.append({'order': order, 'levels': levels, 'codes': codes, 'decimated': decimated,
+                     'snr_db': inband_snr_db(sdm.values(codes), fs_os, fm, fs / 2)})
+# Overload: order 3 with 16 levels driven to 0.95 of full scale (beyond its
+# stable range) for 5 s, then to 0.3. The loop clears its runaway state and
+# keeps shaping: the second half is within about 10 dB of a fresh modulator
+x_over = np.where(t_os < 5, 0.95 * 1.2, 0.3) / 0.8 * x_os
+overload = SigmaDelta(3, 16, full_scale=1.2)
+codes_over = np.concatenate([overload.process(x_over[i:i + 4096]) for i in range(0, len(x_over), 4096)])
+second_half = t_os >= 5
+fresh = SigmaDelta(3, 16, full_scale=1.2)
+overload_snr_db = [inband_snr_db(m.values(c), fs_os, fm, fs / 2) for m, c in
+                   ((overload, codes_over[second_half]), (fresh, fresh.process(x_over[second_half])))]
+print(f"SDM order 3, 16 levels after overload: {overload_snr_db[0]:.1f} dB in band "
+      f"(fresh: {overload_snr_db[1]:.1f} dB, {overload.quantizer.resets} state resets)")
+# Output k of the CIC covers inputs up to k R + R - 1, delayed by 3 (R - 1) / 2
+t_dec = (np.arange(len(t_d)) * osr + osr - 1 - 3 * (osr - 1) / 2) / fs_os
+print(f"{'Requantizer (OSR 64)':<26}{'in-band SNR (dB)':>18}")
+for order, snr in zip(shaper_orders, shaped_snr_db):
+    print(f"{f'8-bit + TPDF, order {order}':<26}{snr:>18.1f}")
+for row in sdm_rows:
+    label = f"SDM order {row['order']}, {row['levels']} levels"
+    print(f"{label:<26}{row['snr_db']:>18.1f}")
+
+# 8. Plotting
 plt.figure(figsize=(12, 10))
 
 # Time Domain (Visual 3-bit)
@@ -133,6 +199,107 @@ plt.grid(True, axis='y')
 plt.tight_layout()
 plt.savefig('../Output_Plots/PCM_Output.png')
 print("PCM Simulation plots saved to ../Output_Plots/PCM_Output.png")
+
+# Line-coded waveforms of the first five code words
+plt.figure(figsize=(12, 8))
+for i, scheme in enumerate(SCHEMES):
+    plt.subplot(len(SCHEMES), 1, i + 1)
+    plt.step(t_bits, line_waves[scheme], 'b', where='post')
+    for k in range(1, 5):
+        plt.axvline(k * n_bits_visual, color='k', linestyle=':', linewidth=0.8)
+    plt.ylim(-1.5, 1.5)
+    plt.ylabel(scheme.upper() if scheme != 'manchester' else 'Manch.')
+    plt.title(f"{scheme}: bits {''.join(map(str, bits5))}, "
+              f"BER {ber_stats[scheme]['ber']:.2e} at Eb/N0 = 4 dB "
+              f"(theory {ber_stats[scheme]['ber_theory']:.2e})", fontsize=10)
+    plt.grid(True)
+plt.xlabel('Time (bit periods)')
+plt.tight_layout()
+plt.savefig('../Output_Plots/PCM_Line_Coding.png')
+print("Line coding plots saved to ../Output_Plots/PCM_Line_Coding.png")
+
+# Differential coders: SNR per bit and a stretch of the reconstructions
+plt.figure(figsize=(12, 8))
+plt.subplot(2, 1, 1)
+for coder, style in [('PCM', 'o-'), ('DPCM', 's-'), ('IMA ADPCM', 'D'), ('DM', '^-'), ('ADM', 'v--')]:
+    rows = [r for r in coder_rows if r['coder'] == coder]
+    plt.plot([r['bits_per_sample'] for r in rows], [r['snr_db'] for r in rows], style, label=coder)
+plt.xlabel('Bits per input sample (DM / ADM: oversampling factor)')
+plt.ylabel('SNR (dB)')
+plt.title('Differential Coding vs Uniform PCM (same input)')
+plt.legend()
+plt.grid(True)
+
+plt.subplot(2, 1, 2)
+shown = slice(0, fs)
+plt.plot(t_d[shown], x_d[shown], 'k', linewidth=2, label='Input')
+for coder, bits in [('PCM', 3), ('DPCM', 3), ('IMA ADPCM', 4), ('DM', 4)]:
+    row = next(r for r in coder_rows if r['coder'] == coder and r['bits_per_sample'] == bits)
+    plt.step(t_d[shown], row['y'][shown], where='mid',
+             label=f"{coder} {bits} bits/sample ({row['snr_db']:.1f} dB)")
+plt.xlabel('Time (s)')
+plt.ylabel('Amplitude(V)')
+plt.title('Reconstructions (first second)')
+plt.legend(fontsize=8)
+plt.grid(True)
+plt.tight_layout()
+plt.savefig('../Output_Plots/PCM_Differential.png')
+print("Differential coding plots saved to ../Output_Plots/PCM_Differential.png")
+
+# Dither, noise shaping and sigma-delta
+plt.figure(figsize=(12, 9))
+plt.subplot(2, 2, 1)
+for name, spec in low_spectra.items():
+    plt.plot(f_low, spec, label=f'{name} (largest harmonic {low_spur_db[name]:.0f} dB)')
+plt.xlabel('Frequency (Hz)')
+plt.ylabel('Error spectrum (dB)')
+plt.title(f'{n_bits_snr}-bit Error of a 2.5-Step Tone ({fm} Hz)')
+plt.legend(fontsize=8)
+plt.grid(True)
+
+plt.subplot(2, 2, 2)
+f_seg = np.fft.rfftfreq(4096, 1 / fs_os)
+for order in shaper_orders:
+    e = (shaped[order] - x_os)[:len(x_os) // 4096 * 4096].reshape(-1, 4096)
+    psd = np.mean(np.abs(np.fft.rfft(e * np.hanning(4096), axis=1))**2, axis=0)
+    plt.semilogx(f_seg[1:], 10 * np.log10(psd[1:]), label=f'Order {order}')
+plt.axvline(fs / 2, color='k', linestyle='--', label='Signal band')
+plt.xlabel('Frequency (Hz)')
+plt.ylabel('Error PSD (dB)')
+plt.title(f'Noise Shaping (1 - z$^{{-1}}$)$^N$, {n_bits_snr} bits, TPDF, OSR {osr}')
+plt.legend(fontsize=8)
+plt.grid(True, which='both')
+
+plt.subplot(2, 2, 3)
+plt.plot(shaper_orders, shaped_snr_db, 'o-', label=f'{n_bits_snr}-bit + TPDF (measured)')
+plt.plot(shaper_orders, shaped_theory_db, 'k--', label='Theory')
+for levels, style in [(2, 's'), (4, 'D')]:
+    rows = [r for r in sdm_rows if r['levels'] == levels]
+    plt.plot([r['order'] for r in rows], [r['snr_db'] for r in rows], style + '-',
+             label=f'Sigma-delta, {levels} levels')
+plt.xlabel('Noise-shaping order')
+plt.ylabel('In-band SNR (dB)')
+plt.title(f'In-band SNR (0 - {fs // 2} Hz) at OSR {osr}')
+plt.legend(fontsize=8)
+plt.grid(True)
+
+plt.subplot(2, 2, 4)
+row = next(r for r in sdm_rows if r['order'] == 2 and r['levels'] == 2)
+shown_os = slice(0, fs_os // 5)
+plt.step(t_os[shown_os], row['codes'][shown_os] * 2.4 - 1.2, 'c', where='post', alpha=0.3,
+         linewidth=0.5, label='1-bit stream')
+plt.plot(t_os[shown_os], x_os[shown_os], 'k', linewidth=2, label='Input')
+shown_dec = (np.arange(len(t_dec)) >= 3) & (t_dec < 0.2)      # after the CIC has filled
+plt.plot(t_dec[shown_dec], row['decimated'][shown_dec], 'ro-', markersize=4,
+         label=f"CIC$^3$ / {osr} output ({row['snr_db']:.1f} dB in band)")
+plt.xlabel('Time (s)')
+plt.ylabel('Amplitude(V)')
+plt.title('2nd-order 1-bit Sigma-Delta and Decimation')
+plt.legend(fontsize=8, loc='lower right')
+plt.grid(True)
+plt.tight_layout()
+plt.savefig('../Output_Plots/PCM_Noise_Shaping.png')
+print("Noise shaping plots saved to ../Output_Plots/PCM_Noise_Shaping.png")
 try:
     plt.show()
 except:
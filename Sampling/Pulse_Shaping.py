@@ -0,0 +1,97 @@
+# Raised-Cosine Pulse Shaping and Eye Diagrams
+# Demonstrates ISI-free (Nyquist) pulses, excess bandwidth (roll-off beta)
+# and the eye diagram of binary polar symbols
+
+import os
+import sys
+import numpy as np
+import matplotlib.pyplot as plt
+from scipy.signal import lfilter
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from DSP.pulseshape import raised_cosine, root_raised_cosine, PolyphaseUpsampler, EyeDiagram
+from DSP.profiling import stage
+
+# Parameters
+sps = 32            # Samples per symbol
+span = 12           # Pulse length (symbols)
+betas = [0, 0.35, 1.0]
+n_symbols = 20000   # Random polar symbols, sent in blocks
+block = 2000
+rng = np.random.default_rng(357)
+symbols = rng.choice([-1.0, 1.0], n_symbols)
+
+# 1. Pulses and their spectra
+pulses = {beta: raised_cosine(beta, sps, span) for beta in betas}
+t_pulse = (np.arange(span * sps + 1) - span * sps / 2) / sps
+n_fft = 8192
+f_norm = np.fft.rfftfreq(n_fft, 1 / sps)          # frequency in units of the symbol rate
+spectra = {beta: np.abs(np.fft.rfft(h, n_fft)) / sps for beta, h in pulses.items()}
+
+# 2. Eye diagrams, built block by block (traces are never stored)
+def run_eye(h_tx, h_rx=None):
+    up = PolyphaseUpsampler(h_tx, sps)
+    delay = up.delay + (0 if h_rx is None else (len(h_rx) - 1) / 2)
+    eye = EyeDiagram(sps, delay=delay, y_range=(-1.6, 1.6), skip_symbols=span)
+    zi = None if h_rx is None else np.zeros(len(h_rx) - 1)
+    for i in range(0, n_symbols, block):
+        y = up.process(symbols[i:i + block])
+        if h_rx is not None:
+            y, zi = lfilter(h_rx, 1, y, zi=zi)      # matched filter, state carried
+        eye.update(y)
+    return eye
+
+h_rrc = root_raised_cosine(0.35, sps, span)
+with stage('eyes'):
+    eyes = {
+        'RC beta=0': run_eye(pulses[0]),
+        'RC beta=0.35': run_eye(pulses[0.35]),
+        'RRC beta=0.35, no matched filter': run_eye(h_rrc * np.sqrt(sps)),
+        'RRC -> RRC beta=0.35': run_eye(h_rrc, h_rrc),
+    }
+eye_titles = [r'RC $\beta=0$', r'RC $\beta=0.35$', r'RRC $\beta=0.35$ (no matched filter)',
+              r'RRC $\rightarrow$ RRC $\beta=0.35$']
+eye_metrics = {name: eye.metrics() for name, eye in eyes.items()}
+for name, m in eye_metrics.items():
+    print(f"{name:<34} height {m['eye_height']:.3f}  width {m['eye_width']:.3f} T  "
+          f"ISI rms {m['isi_rms']:.4f}  ({m['traces']} traces)")
+
+# 3. Plotting
+plt.figure(figsize=(14, 9))
+
+plt.subplot(2, 3, 1)
+for beta, h in pulses.items():
+    plt.plot(t_pulse, h, label=rf'$\beta={beta}$')
+plt.plot(np.arange(-4, 5), np.zeros(9), 'ko', markersize=4, label='Symbol instants')
+plt.xlim(-4, 4)
+plt.title('Raised-Cosine Pulses $p(t)$')
+plt.xlabel('Time ($T$)')
+plt.legend()
+plt.grid(True)
+
+plt.subplot(2, 3, 2)
+for beta, P in spectra.items():
+    plt.plot(f_norm, P, label=rf'$\beta={beta}$')
+plt.xlim(0, 1.2)
+plt.title('Spectra $|P(f)|$ (bandwidth $(1+\\beta)/2T$)')
+plt.xlabel('Frequency ($1/T$)')
+plt.legend()
+plt.grid(True)
+
+for k, (name, eye) in enumerate(eyes.items()):
+    plt.subplot(2, 3, 3 + k)
+    hist, t_eye, y_edges = eye.histogram()
+    dt = t_eye[1] - t_eye[0]
+    t_edges = np.append(t_eye - dt / 2, t_eye[-1] + dt / 2)
+    plt.pcolormesh(t_edges, y_edges, np.log1p(hist.T), cmap='Blues', shading='flat')
+    m = eye_metrics[name]
+    plt.title(f"{eye_titles[k]}\nheight {m['eye_height']:.2f}, ISI rms {m['isi_rms']:.3f}", fontsize=10)
+    plt.xlabel('Time from symbol instant ($T$)')
+
+plt.tight_layout()
+plt.savefig('../Output_Plots/Pulse_Shaping_Eye.png')
+print("Pulse shaping plots saved to ../Output_Plots/Pulse_Shaping_Eye.png")
+try:
+    plt.show()
+except:
+    pass
@@ -0,0 +1,3 @@
+# Parameter sweeps: simulation functions (simulations.py) and the configs
+# that sweep them. Run from the repository root, e.g.
+#   python -m Tools.sweep Sweeps/pcm_snr.toml
@@ -0,0 +1,23 @@
+# Aliasing / reconstruction-error map over (pulse type, B, fs, d)
+# python -m Tools.sweep Sweeps/aliasing_map.py -j 4 --npz aliasing_map.npz
+# Every point is a whole (fs, d) plane (157 x 20 combinations), evaluated
+# from the analytic spectra; --npz stacks the planes into
+# (pulse, B, fs, d) metric arrays.
+
+import numpy as np
+
+SWEEP = {
+    'function': 'Sweeps.simulations:aliasing_map',
+    'name': 'aliasing_map',
+    'fixed': {
+        'fs': [float(f) for f in np.arange(2, 80.5, 0.5)],
+        'd': [round(float(x), 4) for x in np.linspace(0.05, 1, 20)],
+        'message': 'sinc',
+        'cutoff': 'nyquist',
+        'target_db': -40.0,
+    },
+    'grid': {
+        'pulse': ['ideal', 'natural', 'flat_top'],
+        'B': [1, 2, 5, 10, 20],
+    },
+}
@@ -0,0 +1,15 @@
+# Natural sampling recovery error vs sample rate and duty cycle
+# python -m Tools.sweep Sweeps/natural_sampling_sweep.py
+# (A Python config: the grid can be built with NumPy.)
+
+import numpy as np
+
+SWEEP = {
+    'function': 'Sweeps.simulations:natural_sampling',
+    'name': 'natural_sampling',
+    'fixed': {'B': 5, 'f_sim': 1000, 'T_duration': 2.0},
+    'grid': {
+        'fs': [int(f) for f in np.arange(8, 41, 4)],
+        'd': [0.1, 1/3, 0.5, 0.9],
+    },
+}
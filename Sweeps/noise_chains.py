@@ -0,0 +1,177 @@
+# Noise Performance Chains
+# Transmitter -> channel -> receiver chains of the analog modulation
+# scripts, as Monte Carlo trial functions for DSP.montecarlo:
+#
+#   am  - Lab 2 AM: fs 400 kHz, fc 20 kHz, 1 kHz tone, mu 0.8, synchronous
+#         detector with the lab's 5 kHz 2nd-order LPF, DC removed
+#   dsb - DSB_SC_Modulation.py: fs 1 kHz, fc 100 Hz, 10 Hz sine
+#   ssb - SSB_Modulation.py: fs 2 kHz, fc 100 Hz, 10 Hz tone, USSB
+#   fm  - 3_FM_Generation.py's kf = 50 Hz/V and a 10 Hz tone (beta 5), on a
+#         300 Hz carrier at fs 2 kHz so the Carson band stays clear of DC
+#
+#   from DSP.montecarlo import run_monte_carlo
+#   res = run_monte_carlo(chain_trial, {'chain': 'ssb', 'cnr_db': 10})
+#
+# Every receiver starts with an ideal predetection band-pass of the
+# transmission bandwidth B_T (2W, W for SSB, Carson's rule for FM). A trial
+# passes the transmitted signal through DSP.channel (noise at the given
+# CNR = P_R / (N0 B_T), optionally a carrier offset and phase noise),
+# demodulates, and measures the output noise as y - y_clean over the middle
+# 80% of the record, y_clean being the noiseless output of the same
+# receiver. The transmitted signal and y_clean are computed once per
+# process, so a trial is one batched channel() and one batched demodulation.
+#
+# theory_snr() is the textbook output SNR for the receiver as built: the
+# ideal-LPF bandwidth W is replaced by the noise-equivalent bandwidth of
+# the zero-phase Butterworth (filtfilt, so |H|^4) over the bins passed by
+# the predetection filter.
+
+from functools import lru_cache
+
+import numpy as np
+
+from DSP.analog import am_modulate, coherent_demodulate, dsb_sc_modulate, fm_discriminate, \
+    fm_modulate, ssb_modulate
+from DSP.channel import channel, noise_density, signal_power
+from DSP.filters import butter_lowpass_filter, ideal_bandpass
+
+# W: baseband bandwidth passed by the receiver (the gamma reference)
+CHAINS = {
+    'am':  {'fs': 400000, 'fc': 20000, 'fm': 1000, 'Am': 1.6, 'duration': 0.005, 'Ac': 2.0,
+            'ka': 0.5, 'W': 2000, 'cutoff': 5000, 'order': 2},
+    'dsb': {'fs': 1000, 'fc': 100, 'fm': 10, 'Am': 1.0, 'duration': 1.0, 'Ac': 1.0,
+            'W': 20, 'cutoff': 20, 'order': 4},
+    'ssb': {'fs': 2000, 'fc': 100, 'fm': 10, 'Am': 1.0, 'duration': 0.5, 'Ac': 1.0,
+            'W': 20, 'cutoff': 20, 'order': 4},
+    'fm':  {'fs': 2000, 'fc': 300, 'fm': 10, 'Am': 1.0, 'duration': 0.5, 'Ac': 1.0,
+            'kf': 50, 'W': 10, 'cutoff': 20, 'order': 4},
+}
+
+
+def predetection_band(chain):
+    """
+    (f_lo, f_hi) of the receiver's band-pass filter.
+    """
+    p = CHAINS[chain]
+    fc, W = p['fc'], p['W']
+    if chain == 'ssb':
+        return fc, fc + W
+    if chain == 'fm':
+        half = p['kf'] * p['Am'] + W          # Carson: B_T = 2 (delta_f + W)
+        return fc - half, fc + half
+    return fc - W, fc + W
+
+
+def transmission_bandwidth(chain):
+    f_lo, f_hi = predetection_band(chain)
+    return f_hi - f_lo
+
+
+def transmit(chain):
+    """
+    (t, m_t, s_t) of the chain's transmitter.
+    """
+    p = CHAINS[chain]
+    fs, fc = p['fs'], p['fc']
+    t = np.arange(int(fs * p['duration'])) / fs
+    if chain == 'dsb':
+        m_t = p['Am'] * np.sin(2 * np.pi * p['fm'] * t)
+    else:
+        m_t = p['Am'] * np.cos(2 * np.pi * p['fm'] * t)
+    if chain == 'am':
+        s_t = am_modulate(m_t, t, fc, p['Ac'], ka=p['ka'])
+    elif chain == 'dsb':
+        s_t = dsb_sc_modulate(m_t, t, fc, p['Ac'])
+    elif chain == 'ssb':
+        s_t = ssb_modulate(m_t, t, fc, p['Ac'], sideband='upper')
+    else:
+        s_t = fm_modulate(m_t, fs, fc, p['kf'], p['Ac'])
+    return t, m_t, s_t
+
+
+def receive(chain, r):
+    """
+    Demodulated output for received signal(s) r (1-D or trials x samples).
+    """
+    p = CHAINS[chain]
+    fs, fc = p['fs'], p['fc']
+    r = ideal_bandpass(r, fs, *predetection_band(chain))
+    if chain == 'fm':
+        y = fm_discriminate(r, fs, fc, p['kf'])
+        return butter_lowpass_filter(y, p['cutoff'], fs, order=p['order'])
+    t = np.arange(r.shape[-1]) / fs
+    y = coherent_demodulate(r, t, fc, fs, p['cutoff'], order=p['order'])
+    if chain == 'am':
+        y = 2 * (y - np.mean(y, axis=-1, keepdims=True))   # Lab 2: remove DC, undo the 1/2
+    return y
+
+
+@lru_cache(maxsize=None)
+def reference(chain):
+    """
+    Noiseless transmitted signal and receiver output of a chain, with the
+    received power P_R and output signal power P_out (middle of the record).
+    """
+    t, m_t, s_t = transmit(chain)
+    y = receive(chain, s_t)
+    trim = len(t) // 10
+    mid = slice(trim, len(t) - trim)
+    return {'s': s_t, 'y': y, 'mid': mid, 'P_R': float(signal_power(s_t)),
+            'P_out': float(signal_power(y[mid]))}
+
+
+def chain_trial(rng, n, chain, cnr_db, freq_offset=0.0, linewidth=0.0):
+    """
+    n noisy trials of a chain at once. Returns per-trial output noise power.
+    """
+    p = CHAINS[chain]
+    ref = reference(chain)
+    n0 = noise_density(ref['P_R'], cnr_db, transmission_bandwidth(chain))
+    r = channel(ref['s'], p['fs'], n0=n0, freq_offset=freq_offset, linewidth=linewidth,
+                trials=n, rng=rng)
+    err = (receive(chain, r) - ref['y'])[..., ref['mid']]
+    return {'noise_power': np.mean(np.asarray(err, dtype=np.float64)**2, axis=-1)}
+
+
+def gamma(chain, cnr_db):
+    """
+    Baseband SNR gamma = P_R / (N0 W) for a CNR (dB) over B_T.
+    """
+    return 10**(cnr_db / 10) * transmission_bandwidth(chain) / CHAINS[chain]['W']
+
+
+@lru_cache(maxsize=None)
+def _noise_bandwidths(chain):
+    # Sums of |H|^4 and f^2 |H|^4 of the post-detection filter over the FFT
+    # bins the brick-wall passes (baseband side). The carrier bin folds onto
+    # DC alone where the others pair up (weight 1/2; AM removes DC: 0).
+    from scipy.signal import butter, freqz
+    p = CHAINS[chain]
+    df = 1 / p['duration']
+    f_max = transmission_bandwidth(chain) / (1 if chain == 'ssb' else 2)
+    f = np.arange(int(round(f_max / df)) + 1) * df
+    w = np.ones_like(f)
+    if chain != 'ssb':
+        w[0] = 0 if chain == 'am' else 0.5
+    b, a = butter(p['order'], p['cutoff'] / (p['fs'] / 2))
+    _, h = freqz(b, a, worN=f, fs=p['fs'])
+    h4 = w * np.abs(h)**4
+    return float(np.sum(h4) * df), float(np.sum(f**2 * h4) * df)
+
+
+def theory_snr(chain, cnr_db):
+    """
+    Textbook output SNR (linear, above threshold) of the chain's receiver.
+    DSB-SC and SSB: gamma W / W_eq; AM: eta gamma W / W_eq with
+    eta = ka^2 P_m / (1 + ka^2 P_m); FM: kf^2 P_m gamma W / int f^2 |H|^4.
+    """
+    p = CHAINS[chain]
+    g = gamma(chain, cnr_db) * p['W']
+    W_eq, F2 = _noise_bandwidths(chain)
+    P_m = p['Am']**2 / 2
+    if chain == 'am':
+        k = p['ka']**2 * P_m
+        return k / (1 + k) * g / W_eq
+    if chain == 'fm':
+        return p['kf']**2 * P_m * g / F2
+    return g / W_eq
@@ -0,0 +1,110 @@
+# Sweepable Simulations
+# The computations of the Sampling scripts as functions of their parameters
+# (the module-level constants of the scripts), returning a dict of scalars
+# and arrays for Tools/sweep.py to cache. noise_performance runs the
+# Monte Carlo noise chains of Sweeps/noise_chains.py; aliasing_map evaluates
+# a whole (fs, d) plane of Sweeps/aliasing.py metrics per point.
+
+import numpy as np
+
+from DSP.pcm import uniform_pcm, calculate_snr_db
+from DSP.montecarlo import run_monte_carlo
+from DSP.pulse import natural_pulse_train
+from Sweeps.aliasing import sampling_metrics
+from Sweeps.noise_chains import chain_trial, gamma, reference, theory_snr
+
+
+def pcm_snr(n_bits, fm=5, fs=100, Am=1.0, V_min=-1.2, V_max=1.2, duration=0.5):
+    """
+    Sampling/PCM.py: measured vs theoretical quantization SNR of a tone.
+    """
+    t = np.arange(int(fs * duration)) / fs
+    x_s = Am * np.cos(2 * np.pi * fm * t)
+    x_q, delta = uniform_pcm(x_s, n_bits, V_min, V_max)
+    # 1.76 + 6.02 n for a full-scale sine, less the loading loss
+    snr_theo = 1.76 + 6.02 * n_bits + 20 * np.log10(2 * Am / (V_max - V_min))
+    return {
+        'snr_db': calculate_snr_db(x_s, x_q - x_s),
+        'snr_theory_db': snr_theo,
+        'delta': delta,
+    }
+
+
+def natural_sampling(B, fs, d, f_sim=1000, T_duration=2.0, f_cutoff=None):
+    """
+    Sampling/Natural_sampling.py: sinc message, natural sampling with duty
+    cycle d, ideal LPF recovery scaled by 1/d. Returns the recovery error
+    (RMS and as an SNR) over the middle half of the record and the
+    recovered waveform.
+    """
+    tau = d / fs
+    if f_cutoff is None:
+        f_cutoff = fs / 2   # between B and fs - B whenever fs > 2B
+    t = np.linspace(-T_duration/2, T_duration/2, int(f_sim * T_duration), endpoint=False)
+    x_t = 2 * B * np.sinc(2 * B * t)
+    x_s = x_t * natural_pulse_train(t, fs, tau)
+
+    # Ideal low-pass filter in the frequency domain
+    X_f = np.fft.fft(x_s)
+    freqs = np.fft.fftfreq(len(t), 1/f_sim)
+    X_f[np.abs(freqs) > f_cutoff] = 0
+    x_demod = np.real(np.fft.ifft(X_f)) / d
+
+    mid = np.abs(t) <= T_duration / 4
+    err = x_demod[mid] - x_t[mid]
+    return {
+        'error_rms': np.sqrt(np.mean(err**2)),
+        'snr_db': calculate_snr_db(x_t[mid], err),
+        'aliased': bool(fs < 2 * B),
+        't': t,
+        'x_demod': x_demod,
+    }
+
+
+def noise_performance(chain, cnr_db, freq_offset=0.0, linewidth=0.0, rel_tol=0.02,
+                      max_trials=8192, batch_size=64, workers=1, seed=0):
+    """
+    Output SNR of an AM / DSB-SC / SSB / FM chain at a given CNR (dB over
+    B_T), by Monte Carlo until the output noise power is known to rel_tol
+    (95% CI). Also returns gamma = P_R / (N0 W), the figure of merit
+    SNR_out / gamma and the above-threshold theory.
+    """
+    res = run_monte_carlo(chain_trial, {'chain': chain, 'cnr_db': cnr_db,
+                                        'freq_offset': freq_offset, 'linewidth': linewidth},
+                          target='noise_power', batch_size=batch_size, rel_tol=rel_tol,
+                          max_trials=max_trials, workers=workers, seed=seed)
+    noise = res['mean']['noise_power']
+    snr = reference(chain)['P_out'] / noise
+    g = gamma(chain, cnr_db)
+    return {
+        'snr_db': 10 * np.log10(snr),
+        'snr_ci_db': 10 / np.log(10) * res['ci']['noise_power'] / noise,
+        'snr_theory_db': 10 * np.log10(theory_snr(chain, cnr_db)),
+        'gamma_db': 10 * np.log10(g),
+        'figure_of_merit': snr / g,
+        'trials': res['trials'],
+        'converged': res['converged'],
+    }
+
+
+def aliasing_map(pulse, B, fs, d, message='sinc', cutoff='nyquist', method='auto', target_db=-40.0):
+    """
+    Sampling/Natural_sampling.py and Flat_Top_Sampling.py over a plane of
+    sample rates fs and duty cycles d (lists) for one pulse type and band
+    B: the fs and d axes, error_db, alias_db, aperture_db and lost_db as
+    (len(fs), len(d)) arrays, and per duty cycle the lowest fs of the grid whose error is at
+    most target_db (NaN if none).
+    """
+    fs = np.asarray(fs, dtype=float)
+    d = np.asarray(d, dtype=float)
+    m = sampling_metrics(fs[:, None], B, d[None, :], pulse, message, cutoff, method)
+    ok = m['error_db'] <= target_db
+    fs_min = np.where(ok.any(axis=0), fs[np.argmax(ok, axis=0)], np.nan)
+    return {
+        'fs': fs,
+        'd': d,
+        **m,
+        'fs_min': fs_min,
+        'fs_min_any_d': float(np.nanmin(fs_min)) if ok.any() else float('nan'),
+        'min_error_db': float(np.min(m['error_db'])),
+    }
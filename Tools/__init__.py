@@ -0,0 +1,2 @@
+# Repository tooling (runner, benchmarks, ...) for the simulation scripts.
+# Run the tools from the repository root, e.g. `python -m Tools.run_all`.
@@ -0,0 +1,433 @@
+# Kernel Benchmark Suite
+# Times the numeric kernels on their own (no plotting) across growing record
+# lengths N, and reports samples/s, peak memory and the fitted scaling
+# exponent (time ~ N^k) of each one:
+#
+#   python -m Tools.benchmarks                          # all kernels -> benchmark.json
+#   python -m Tools.benchmarks -k pulse -n 1e4 -n 1e5   # some kernels / lengths
+#   python -m Tools.benchmarks -o after.json --plot scaling.png
+#   python -m Tools.benchmarks --compare before.json after.json
+#   python -m Tools.benchmarks --zoom                   # zoom_spectrum vs full FFT per script
+#
+# Inputs keep each script's rate ratios (f_sim/fs, fc/f_sim ...) and only the
+# duration grows with N. A size whose time, extrapolated from the smaller
+# sizes, exceeds --budget seconds is skipped (and recorded in the JSON), so
+# quadratic kernels do not stall the run.
+#
+# Peak memory is measured with tracemalloc in a separate call (tracing slows
+# Python code down), counting only what the kernel allocates beyond its inputs.
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+import scipy
+
+from DSP.analog import am_modulate, estimate_inst_freq, fm_tone, ssb_modulate
+from DSP.filters import butter_lowpass_filter
+from DSP.pcm import uniform_pcm
+from DSP.pulse import natural_pulse_train, ppm_modulate, ppm_to_pwm, pwm_modulate
+from DSP.spectrum import benchmark_zoom, get_spectrum, welch_spectrum, zoom_spectrum
+from DSP.tones import measure_tones
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_SIZES = [10**3, 10**4, 10**5, 10**6]
+
+
+# --- Kernels -----------------------------------------------------------------
+# Each setup(N) builds the inputs and returns a zero-argument callable.
+
+def _pcm(N):
+    # Sampling/PCM.py: 8-bit quantizer over a +/-1.2 V range
+    x = np.cos(2 * np.pi * 5 * np.arange(N) / 100)
+    return lambda: uniform_pcm(x, 8, -1.2, 1.2)
+
+
+def _natural(N):
+    # Sampling/Natural_sampling.py: fs = 20 Hz, d = 1/3, f_sim = 1 kHz
+    f_sim, fs = 1000, 20
+    t = (np.arange(N) - N // 2) / f_sim
+    return lambda: natural_pulse_train(t, fs, (1/3) / fs)
+
+
+def _pwm(N):
+    # Modulation/PWM.py: fs = 200 Hz, f_sim = 10 kHz
+    f_sim, fs = 10000, 200
+    m_t = np.sin(2 * np.pi * 10 * np.arange(N) / f_sim)
+    Ts = 1/fs
+    return lambda: pwm_modulate(m_t, f_sim, fs, Ts/2, 0.8 * Ts / 2)
+
+
+def _ppm(N):
+    # Modulation/PPM.py
+    f_sim, fs = 10000, 200
+    m_t = np.sin(2 * np.pi * 10 * np.arange(N) / f_sim)
+    Ts = 1/fs
+    return lambda: ppm_modulate(m_t, f_sim, fs, Ts / 5, 0.4 * Ts)
+
+
+def _ppm_edges(N):
+    # Modulation/PPM.py: PPM -> PWM edge loop (one Python iteration per sample)
+    f_sim, fs = 10000, 200
+    Ts = 1/fs
+    m_t = np.sin(2 * np.pi * 10 * np.arange(N) / f_sim)
+    ppm_signal, _ = ppm_modulate(m_t, f_sim, fs, Ts / 5, 0.4 * Ts)
+    return lambda: ppm_to_pwm(ppm_signal, int(f_sim * Ts))
+
+
+def _ssb(N):
+    # Modulation/AM_Modulation/SSB_Modulation.py: fc = 100 Hz, f_sim = 2 kHz
+    f_sim = 2000
+    t = np.arange(N) / f_sim
+    m_t = np.cos(2 * np.pi * 10 * t)
+    return lambda: ssb_modulate(m_t, t, 100, 1, 'upper')
+
+
+def _lab2_demod(N):
+    # labs/AM_Modulation/Lab2_AM_Demod.py: 2nd order, 5 kHz, fs = 400 kHz
+    fs, fc = 400000, 20000
+    t = np.arange(N) / fs
+    v_t = (2 + 1.6 * np.cos(2 * np.pi * 1000 * t)) * np.cos(2 * np.pi * fc * t)**2
+    return lambda: butter_lowpass_filter(v_t, 5000, fs, order=2)
+
+
+def _ppm_demod(N):
+    # Modulation/PPM.py: 3rd order, 20 Hz, f_sim = 10 kHz
+    f_sim = 10000
+    x = (np.sin(2 * np.pi * 10 * np.arange(N) / f_sim) > 0).astype(float)
+    return lambda: butter_lowpass_filter(x, 20, f_sim, order=3)
+
+
+def _inst_freq(N):
+    # Modulation/FM_Instantaneous_vs_Spectral.py: fc = 10 kHz, fm = 2 kHz, beta = 0.05 at 200 kHz,
+    # smoothed and decimated by 8 as for a long capture (-n 1e7 is its 50 s record)
+    fs = 200000
+    s = fm_tone(np.arange(N) / fs, 10000, 2000, 0.05)
+    return lambda: estimate_inst_freq(s, fs, smooth=8, decimate=8)
+
+
+def _spectrum(N):
+    x = np.random.default_rng(0).standard_normal(N)
+    return lambda: get_spectrum(x, 1e6)
+
+
+def _welch(N):
+    x = np.random.default_rng(0).standard_normal(N)
+    return lambda: welch_spectrum(x, 1e6, nperseg=min(4096, N))
+
+
+def _zoom(N):
+    # LSSB_Simulation.py style: +/-20 kHz around 1 MHz at fs = 10 MHz
+    fs = 10e6
+    x = np.cos(2 * np.pi * 1e6 * np.arange(N) / fs)
+    return lambda: zoom_spectrum(x, fs, 980e3, 1020e3, 401)
+
+
+def _tones(N):
+    # solve_am.py style: carrier and two sidebands
+    fs = 10e6
+    x = np.cos(2 * np.pi * 1e6 * np.arange(N) / fs)
+    return lambda: measure_tones(x, fs, [990e3, 1e6, 1010e3])
+
+
+KERNELS = {
+    'pcm.uniform_pcm': _pcm,
+    'pulse.natural_pulse_train': _natural,
+    'pulse.pwm_modulate': _pwm,
+    'pulse.ppm_modulate': _ppm,
+    'pulse.ppm_to_pwm': _ppm_edges,
+    'analog.ssb_modulate': _ssb,
+    'analog.estimate_inst_freq': _inst_freq,
+    'filters.butter_lowpass_filter[lab2]': _lab2_demod,
+    'filters.butter_lowpass_filter[ppm]': _ppm_demod,
+    'spectrum.get_spectrum': _spectrum,
+    'spectrum.welch_spectrum': _welch,
+    'spectrum.zoom_spectrum': _zoom,
+    'tones.measure_tones': _tones,
+}
+
+
+# --- Zoom spectra of the scripts --------------------------------------------
+# Each case builds the script's signal and returns benchmark_zoom arguments.
+
+def _zoom_solve_am():
+    # AM_Problem_Solver/solve_am.py: the 1 Hz bins within +/-2 kHz of fc = 707 Hz, 1 s at 200 kHz
+    fs, f1, fc, Ac = 200000.0, 500.0, 500.0 * np.sqrt(2), 100.0
+    t = np.arange(0, 1.0, 1 / fs)
+    m = 0.2 * np.sin(2 * np.pi * f1 * t) + 0.5 * np.cos(2 * np.pi * f1 * t)
+    return am_modulate(m, t, fc, Ac, ka=1 / Ac), fs, round(fc) - 2000, round(fc) + 2000, 4001
+
+
+def _zoom_lssb():
+    # labs/AM_Modulation/LSSB_Simulation.py: 980 - 1020 kHz on a 10 Hz grid, 2 ms at 4 MHz
+    fs, fc, fm, Ac = 4e6, 1e6, 5000, 40.0
+    t = np.arange(int(fs * 0.002)) / fs
+    wm, wc = 2 * np.pi * fm * t, 2 * np.pi * fc * t
+    m, m_hat = np.cos(wm) + 4 * np.sin(wm), np.sin(wm) - 4 * np.cos(wm)
+    return (Ac / 2) * (m * np.cos(wc) + m_hat * np.sin(wc)), fs, 980e3, 1020e3, 4001
+
+
+def _zoom_fm():
+    # Modulation/FM_Instantaneous_vs_Spectral.py: 0 - 20 kHz on a 1 Hz grid, 1 s at 200 kHz
+    fs = 200000
+    t = np.arange(fs) / fs
+    return fm_tone(t, 10000, 2000, 0.05), fs, 0, 20000, 20001
+
+
+ZOOM_CASES = {
+    'solve_am': _zoom_solve_am,
+    'LSSB_Simulation': _zoom_lssb,
+    'FM_Instantaneous_vs_Spectral': _zoom_fm,
+}
+
+
+def run_zoom_cases(patterns=None, repeats=3):
+    """
+    benchmark_zoom on the band each script evaluates. Returns
+    {case: timings}.
+    """
+    results = {}
+    for name, setup in ZOOM_CASES.items():
+        if patterns and not any(p in name for p in patterns):
+            continue
+        print(f"[{name}]")
+        x, fs, f_start, f_stop, n_points = setup()
+        zoom_spectrum(x, fs, f_start, f_stop, n_points)          # first-call imports
+        results[name] = benchmark_zoom(x, fs, f_start, f_stop, n_points, repeats=repeats)
+    return results
+
+
+# --- Measurement -------------------------------------------------------------
+
+def time_call(fn, repeats=5, min_batch=0.005):
+    """
+    Best wall time (s) per call of fn(), timeit-style: fast kernels are
+    called in batches of at least min_batch seconds, and the best of
+    `repeats` batches is kept (a single extra call for slow kernels).
+    Returns (seconds, total calls).
+    """
+    t0 = time.perf_counter()
+    fn()
+    first = time.perf_counter() - t0
+    number = max(1, int(min_batch / max(first, 1e-9)))
+    batches = repeats if first < 0.5 else 1
+    best = first
+    for _ in range(batches):
+        t0 = time.perf_counter()
+        for _ in range(number):
+            fn()
+        best = min(best, (time.perf_counter() - t0) / number)
+    return best, 1 + batches * number
+
+
+def peak_memory(fn):
+    """
+    Peak bytes allocated (Python and NumPy) during one call of fn().
+    """
+    tracemalloc.start()
+    try:
+        tracemalloc.reset_peak()
+        base = tracemalloc.get_traced_memory()[0]
+        fn()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return peak - base
+
+
+def scaling_exponent(sizes, seconds):
+    """
+    Slope of log(time) vs log(N): ~1 for linear kernels, ~2 for quadratic.
+    """
+    if len(sizes) < 2:
+        return None
+    return float(np.polyfit(np.log(sizes), np.log(seconds), 1)[0])
+
+
+def _predict(done, N):
+    # Time extrapolated from the measured points (linear growth if only one)
+    if not done:
+        return 0.0
+    k = scaling_exponent([r['n'] for r in done[-2:]], [r['seconds'] for r in done[-2:]])
+    last = done[-1]
+    return last['seconds'] * (N / last['n'])**max(1.0 if k is None else k, 1.0)
+
+
+def _git_commit():
+    try:
+        out = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=REPO_ROOT,
+                             capture_output=True, text=True, timeout=10)
+        return out.stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def run_benchmarks(sizes=DEFAULT_SIZES, patterns=None, budget=2.0, repeats=5, verbose=True):
+    """
+    Benchmarks every kernel whose name contains one of `patterns` (all if
+    None) at each N in `sizes`. Returns the JSON-ready result dict:
+    {'meta': {...}, 'results': [{kernel, n, seconds, samples_per_s,
+    peak_bytes, runs}, ...], 'scaling': {kernel: exponent}, 'skipped': [...]}.
+    """
+    names = [k for k in KERNELS if not patterns or any(p in k for p in patterns)]
+    results, skipped, scaling = [], [], {}
+
+    if verbose:
+        print(f"{'Kernel':<38}{'N':>10}{'time (ms)':>12}{'Msamples/s':>12}{'peak (MiB)':>12}")
+    for name in names:
+        done = []
+        for N in sorted(sizes):
+            N = int(N)
+            predicted = _predict(done, N)
+            if predicted > budget:
+                skipped.append({'kernel': name, 'n': N,
+                                'reason': f'predicted {predicted:.3g} s > {budget:g} s budget'})
+                if verbose:
+                    print(f"{name:<38}{N:>10}  skipped (predicted {predicted:.3g} s)")
+                continue
+            fn = KERNELS[name](N)
+            seconds, runs = time_call(fn, repeats=repeats)
+            peak = peak_memory(fn)
+            r = {'kernel': name, 'n': N, 'seconds': seconds,
+                 'samples_per_s': N / seconds, 'peak_bytes': int(peak), 'runs': runs}
+            results.append(r)
+            done.append(r)
+            if verbose:
+                print(f"{name:<38}{N:>10}{seconds * 1e3:>12.3f}"
+                      f"{N / seconds / 1e6:>12.2f}{peak / 2**20:>12.2f}", flush=True)
+        # The two largest sizes show the asymptotic trend (small N is overhead)
+        scaling[name] = scaling_exponent([r['n'] for r in done[-2:]],
+                                         [r['seconds'] for r in done[-2:]])
+
+    if verbose:
+        print('\nScaling (time ~ N^k):')
+        for name, k in scaling.items():
+            print(f"  {name:<38}" + ('   n/a' if k is None else f"{k:6.2f}"))
+
+    meta = {
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'commit': _git_commit(),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'scipy': scipy.__version__,
+        'machine': platform.machine(),
+        'processor': platform.processor(),
+        'cpus': os.cpu_count(),
+    }
+    return {'meta': meta, 'results': results, 'scaling': scaling, 'skipped': skipped}
+
+
+def compare_runs(before, after, threshold=0.25, verbose=True):
+    """
+    Compares two result dicts (or JSON paths) kernel by kernel and N by N.
+    A time or peak-memory ratio above 1 + threshold is a regression.
+    Returns the list of regressions.
+    """
+    if isinstance(before, str):
+        with open(before, encoding='utf-8') as f:
+            before = json.load(f)
+    if isinstance(after, str):
+        with open(after, encoding='utf-8') as f:
+            after = json.load(f)
+    old = {(r['kernel'], r['n']): r for r in before['results']}
+
+    regressions = []
+    if verbose:
+        print(f"before: {before['meta'].get('commit')} ({before['meta'].get('timestamp')})  "
+              f"after: {after['meta'].get('commit')} ({after['meta'].get('timestamp')})")
+        print(f"{'Kernel':<38}{'N':>10}{'before (ms)':>13}{'after (ms)':>12}{'time':>8}{'memory':>8}")
+    for r in after['results']:
+        o = old.get((r['kernel'], r['n']))
+        if o is None:
+            continue
+        t_ratio = r['seconds'] / o['seconds']
+        m_ratio = (r['peak_bytes'] + 1) / (o['peak_bytes'] + 1)
+        flags = []
+        if t_ratio > 1 + threshold:
+            flags.append('time')
+        # Ignore memory noise below 64 KiB
+        if m_ratio > 1 + threshold and r['peak_bytes'] - o['peak_bytes'] > 65536:
+            flags.append('memory')
+        if flags:
+            regressions.append({'kernel': r['kernel'], 'n': r['n'], 'time_ratio': t_ratio,
+                                'memory_ratio': m_ratio, 'flags': flags})
+        if verbose:
+            mark = '  <- REGRESSION (' + ', '.join(flags) + ')' if flags else ''
+            print(f"{r['kernel']:<38}{r['n']:>10}{o['seconds'] * 1e3:>13.3f}"
+                  f"{r['seconds'] * 1e3:>12.3f}{t_ratio:>7.2f}x{m_ratio:>7.2f}x{mark}")
+    if verbose:
+        print(f"\n{len(regressions)} regression(s) at a {threshold:.0%} threshold")
+    return regressions
+
+
+def plot_scaling(report, path):
+    """
+    Log-log time vs N (left) and throughput vs N (right) for every kernel.
+    """
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+
+    fig, (ax_t, ax_r) = plt.subplots(1, 2, figsize=(14, 6))
+    for name in dict.fromkeys(r['kernel'] for r in report['results']):
+        rows = [r for r in report['results'] if r['kernel'] == name]
+        n = [r['n'] for r in rows]
+        ax_t.loglog(n, [r['seconds'] for r in rows], 'o-', label=name)
+        ax_r.loglog(n, [r['samples_per_s'] for r in rows], 'o-', label=name)
+    ax_t.set_title('Kernel Time vs Record Length')
+    ax_t.set_xlabel('N (samples)')
+    ax_t.set_ylabel('Time (s)')
+    ax_t.grid(True, which='both', alpha=0.3)
+    ax_r.set_title('Throughput vs Record Length')
+    ax_r.set_xlabel('N (samples)')
+    ax_r.set_ylabel('Samples / s')
+    ax_r.grid(True, which='both', alpha=0.3)
+    ax_r.legend(fontsize=8, loc='lower left')
+    fig.tight_layout()
+    fig.savefig(path)
+    plt.close(fig)
+    print(f"Saved to {path}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark the DSP kernels across record lengths.')
+    parser.add_argument('-k', '--only', action='append', metavar='PATTERN',
+                        help='Only kernels whose name contains PATTERN (repeatable)')
+    parser.add_argument('-n', '--size', action='append', type=float, metavar='N',
+                        help='Record length to test (repeatable, default 1e3 1e4 1e5 1e6)')
+    parser.add_argument('-o', '--output', default='benchmark.json', help='JSON results file')
+    parser.add_argument('--budget', type=float, default=2.0,
+                        help='Skip sizes predicted to take longer than this per call (s)')
+    parser.add_argument('--repeats', type=int, default=5, help='Timed batches per point (best is kept)')
+    parser.add_argument('--plot', metavar='PNG', help='Also save the scaling curves')
+    parser.add_argument('--compare', nargs=2, metavar=('BEFORE', 'AFTER'),
+                        help='Compare two saved JSON runs and exit (status 1 on regressions)')
+    parser.add_argument('--threshold', type=float, default=0.25,
+                        help='Slow-down ratio counted as a regression (default 0.25 = 25%%)')
+    parser.add_argument('--list', action='store_true', help='List the kernels and exit')
+    parser.add_argument('--zoom', action='store_true',
+                        help='Time zoom_spectrum against the full FFT on each script\'s band and exit')
+    args = parser.parse_args()
+
+    if args.list:
+        print('\n'.join(KERNELS))
+        sys.exit(0)
+    if args.zoom:
+        run_zoom_cases(args.only, args.repeats)
+        sys.exit(0)
+    if args.compare:
+        sys.exit(1 if compare_runs(*args.compare, threshold=args.threshold) else 0)
+
+    sizes = [int(n) for n in args.size] if args.size else DEFAULT_SIZES
+    report = run_benchmarks(sizes, patterns=args.only, budget=args.budget, repeats=args.repeats)
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    print(f"\nSaved to {args.output}")
+    if args.plot:
+        plot_scaling(report, args.plot)
@@ -0,0 +1,104 @@
+# Import-Time Budget for the Compute-Only Modules
+# Checks that the numeric APIs (PCM, pulse modulation, AM/FM generation ...)
+# import with NumPy alone and within a time budget, using CPython's own
+# import profiler (`python -X importtime`):
+#
+#   python -m Tools.import_budget                        # default modules and budget
+#   python -m Tools.import_budget -m DSP.pcm --budget 20
+#
+# Each module is imported in a fresh interpreter (best of several runs).
+# Reported: the module's total import time, the part spent importing NumPy,
+# the module's own cost on top of NumPy (what the budget applies to) and any
+# heavy package (scipy, matplotlib) that was pulled in. Exits with status 1
+# if a module is over budget or imports a forbidden package.
+
+import argparse
+import os
+import subprocess
+import sys
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+COMPUTE_MODULES = ['DSP.pcm', 'DSP.pulse', 'DSP.analog', 'DSP.filters', 'DSP.tones',
+                   'DSP.precision', 'DSP.memtrace', 'DSP.profiling', 'DSP.channel',
+                   'DSP.montecarlo', 'DSP.linecode', 'DSP.pulseshape', 'DSP.differential',
+                   'DSP.tdm', 'DSP.reconstruct', 'DSP.noiseshape', 'DSP.audio', 'DSP.capture',
+                   'DSP.streaming', 'DSP.pipeline', 'Sweeps.simulations']
+FORBIDDEN = ('scipy', 'matplotlib')
+
+
+def parse_importtime(stderr):
+    """
+    -X importtime lines -> list of (name, self_us, cumulative_us, depth).
+    """
+    entries = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cum_us, name = line[len('import time:'):].split('|')
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        entries.append((name.strip(), int(self_us), int(cum_us), depth))
+    return entries
+
+
+def measure_import(module, runs=5, python=sys.executable):
+    """
+    Imports `module` in `runs` fresh interpreters. Returns a dict with the
+    best total / numpy / own times (ms) and the imported top-level packages.
+    """
+    best = None
+    for _ in range(runs):
+        out = subprocess.run([python, '-X', 'importtime', '-c', f'import {module}'],
+                             cwd=REPO_ROOT, capture_output=True, text=True)
+        if out.returncode != 0:
+            raise RuntimeError(f'import {module} failed:\n{out.stderr[-2000:]}')
+        entries = parse_importtime(out.stderr)
+        cum = {}
+        for name, _, cum_us, _ in entries:
+            cum.setdefault(name, cum_us)
+        total = cum[module] / 1e3
+        numpy = cum.get('numpy', 0) / 1e3
+        packages = sorted({name.split('.')[0] for name, *_ in entries})
+        r = {'module': module, 'total_ms': total, 'numpy_ms': numpy,
+             'own_ms': total - numpy, 'packages': packages}
+        if best is None or r['total_ms'] < best['total_ms']:
+            best = r
+    return best
+
+
+def check_budget(modules=COMPUTE_MODULES, budget_ms=50.0, forbidden=FORBIDDEN, runs=5, verbose=True):
+    """
+    Measures every module; returns the list of failures (empty = pass).
+    """
+    failures = []
+    if verbose:
+        print(f"{'Module':<22}{'total (ms)':>12}{'numpy (ms)':>12}{'own (ms)':>10}  heavy imports")
+    for module in modules:
+        r = measure_import(module, runs=runs)
+        heavy = [p for p in r['packages'] if p in forbidden]
+        problems = []
+        if r['own_ms'] > budget_ms:
+            problems.append(f"{r['own_ms']:.1f} ms > {budget_ms:g} ms budget")
+        if heavy:
+            problems.append('imports ' + ', '.join(heavy))
+        if problems:
+            failures.append({'module': module, 'problems': problems, **r})
+        if verbose:
+            mark = '' if not problems else '  <- ' + '; '.join(problems)
+            print(f"{module:<22}{r['total_ms']:>12.1f}{r['numpy_ms']:>12.1f}{r['own_ms']:>10.1f}"
+                  f"  {', '.join(heavy) or '-'}{mark}")
+    if verbose:
+        print(f"\n{len(modules) - len(failures)}/{len(modules)} modules within budget "
+              f"({budget_ms:g} ms on top of NumPy, no {' / '.join(forbidden)})")
+    return failures
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Check import time of the compute-only modules.')
+    parser.add_argument('-m', '--module', action='append', help='Module to check (repeatable)')
+    parser.add_argument('--budget', type=float, default=50.0,
+                        help='Allowed import time on top of NumPy, in ms (default 50)')
+    parser.add_argument('--runs', type=int, default=5, help='Fresh interpreters per module (best is kept)')
+    args = parser.parse_args()
+
+    failures = check_budget(args.module or COMPUTE_MODULES, budget_ms=args.budget, runs=args.runs)
+    sys.exit(1 if failures else 0)
@@ -0,0 +1,175 @@
+# float32 vs float64 Precision Report
+# Runs the simulation pipelines once per precision (DSP.precision policy),
+# with per-stage peak memory from DSP.memtrace, and reports how far every
+# float32 output is from its float64 reference:
+#
+#   python -m Tools.precision_report                    # all pipelines, N = 2^20
+#   python -m Tools.precision_report -p ssb -n 4000000 --json ssb.json
+#
+# Accuracy per output: max |x32 - x64| / max |x64| and the SNR of the
+# float32 result with the float64 one as reference,
+#   10*log10( sum x64^2 / sum (x32 - x64)^2 ).
+
+import argparse
+import json
+
+import numpy as np
+
+from DSP.analog import am_modulate, dsb_sc_modulate, fm_modulate, ssb_modulate
+from DSP.filters import butter_lowpass_filter
+from DSP.memtrace import MemoryTrace
+from DSP.pcm import uniform_pcm
+from DSP.precision import as_real, precision
+from DSP.spectrum import get_spectrum
+
+
+# --- Pipelines -------------------------------------------------------------
+# pipeline(N, mem) runs its stages under mem.stage() and returns the arrays
+# to compare. Rates follow the script each one comes from; time axes stay
+# float64 (see DSP.precision).
+
+def am_pipeline(N, mem):
+    # Modulation/AM_Modulation/AM_Modulation.py
+    fs = 1000
+    with mem.stage('generate'):
+        t = np.arange(N) / fs
+        modulating_signal = as_real(np.sin(2 * np.pi * 10 * t))
+        modulated_signal = am_modulate(modulating_signal, t, 100, Ac=1, ka=0.5)
+    with mem.stage('spectra'):
+        _, spec_mod = get_spectrum(modulating_signal, fs)
+        _, spec_am = get_spectrum(modulated_signal, fs)
+    return {'am': modulated_signal, '|AM(f)|': spec_am, '|M(f)|': spec_mod}
+
+
+def ssb_pipeline(N, mem):
+    # Modulation/AM_Modulation/SSB_Modulation.py
+    f_sim, fc = 2000, 100
+    with mem.stage('message'):
+        t = np.arange(N) / f_sim
+        m_t = as_real(np.cos(2 * np.pi * 10 * t))
+    with mem.stage('hilbert'):
+        from scipy.signal import hilbert
+        m_hat = np.imag(hilbert(m_t))
+    with mem.stage('modulate'):
+        ussb = ssb_modulate(m_t, t, fc, 1, 'upper', m_hat=m_hat)
+        lssb = ssb_modulate(m_t, t, fc, 1, 'lower', m_hat=m_hat)
+        dsb = dsb_sc_modulate(m_t, t, fc)
+    with mem.stage('spectra'):
+        _, spec_ussb = get_spectrum(ussb, f_sim)
+        _, spec_lssb = get_spectrum(lssb, f_sim)
+        _, spec_dsb = get_spectrum(dsb, f_sim)
+    return {'m_hat': m_hat, 'ussb': ussb, 'lssb': lssb,
+            '|USSB(f)|': spec_ussb, '|LSSB(f)|': spec_lssb, '|DSB(f)|': spec_dsb}
+
+
+def lab2_pipeline(N, mem):
+    # labs/AM_Modulation/Lab2_AM_Demod.py
+    fs, fc, fm, Ac, mu = 400000, 20000, 1000, 2.0, 0.8
+    with mem.stage('modulate'):
+        t = np.arange(N) / fs
+        m_t = as_real(mu * Ac * np.cos(2 * np.pi * fm * t))
+        s_t = am_modulate(m_t, t, fc, Ac, ka=1/Ac)
+    with mem.stage('mix'):
+        v_t = dsb_sc_modulate(s_t, t, fc)
+    with mem.stage('lowpass'):
+        demod = butter_lowpass_filter(v_t, 5000, fs, order=2)
+    return {'am': s_t, 'demodulated': demod}
+
+
+def fm_pipeline(N, mem):
+    # Modulation/FM_Modulation/3_FM_Generation.py (direct FM, VCO)
+    fs, fc, kf = 10000, 100, 50
+    with mem.stage('message'):
+        m_t = as_real(np.cos(2 * np.pi * 10 * np.arange(N) / fs))
+    with mem.stage('vco'):
+        s_fm = fm_modulate(m_t, fs, fc, kf)
+    with mem.stage('spectrum'):
+        _, spec = get_spectrum(s_fm, fs, window='hann')
+    return {'fm': s_fm, '|FM(f)|': spec}
+
+
+def pcm_pipeline(N, mem):
+    # Sampling/PCM.py at 8 and 16 bits
+    with mem.stage('signal'):
+        x_s = as_real(np.cos(2 * np.pi * 5 * np.arange(N) / 100 + 0.1))
+    with mem.stage('quantize'):
+        x_q8, _ = uniform_pcm(x_s, 8, -1.2, 1.2)
+        x_q16, _ = uniform_pcm(x_s, 16, -1.2, 1.2)
+    return {'x_q8': x_q8, 'x_q16': x_q16}
+
+
+PIPELINES = {
+    'am': am_pipeline,
+    'ssb': ssb_pipeline,
+    'lab2': lab2_pipeline,
+    'fm': fm_pipeline,
+    'pcm': pcm_pipeline,
+}
+
+
+# --- Comparison ------------------------------------------------------------
+
+def accuracy(x32, x64):
+    """
+    (relative max error, SNR in dB) of x32 against the reference x64.
+    """
+    ref = np.asarray(x64, dtype=np.float64)
+    err = np.asarray(x32, dtype=np.float64) - ref
+    scale = np.max(np.abs(ref))
+    rel = float(np.max(np.abs(err)) / scale) if scale > 0 else float(np.max(np.abs(err)))
+    p_err = np.sum(err**2)
+    snr = float('inf') if p_err == 0 else float(10 * np.log10(np.sum(ref**2) / p_err))
+    return rel, snr
+
+
+def run_pipeline(name, N, verbose=True):
+    """
+    Runs one pipeline in float64 and float32. Returns a dict with the
+    per-stage memory of both runs and the accuracy of every output.
+    """
+    fn = PIPELINES[name]
+    runs, outputs = {}, {}
+    for prec in ('float64', 'float32'):
+        mem = MemoryTrace()
+        with precision(prec), mem:
+            outputs[prec] = fn(N, mem)
+        runs[prec] = mem
+
+    acc = {}
+    for key, x64 in outputs['float64'].items():
+        x32 = outputs['float32'][key]
+        rel, snr = accuracy(x32, x64)
+        acc[key] = {'dtype': str(np.asarray(x32).dtype), 'rel_max_error': rel, 'snr_db': snr}
+
+    if verbose:
+        print(f"\n=== {name} (N = {N})")
+        print(f"  {'Stage':<16}{'float64 peak':>14}{'float32 peak':>14}{'ratio':>8}  (MiB)")
+        for s64, s32 in zip(runs['float64'].stages, runs['float32'].stages):
+            print(f"  {s64['name']:<16}{s64['peak_bytes'] / 2**20:>14.2f}"
+                  f"{s32['peak_bytes'] / 2**20:>14.2f}"
+                  f"{s32['peak_bytes'] / max(s64['peak_bytes'], 1):>8.2f}")
+        p64, p32 = runs['float64'].peak_bytes, runs['float32'].peak_bytes
+        print(f"  {'overall':<16}{p64 / 2**20:>14.2f}{p32 / 2**20:>14.2f}{p32 / max(p64, 1):>8.2f}")
+        print(f"  {'Output':<16}{'dtype':>10}{'rel. max err':>14}{'SNR (dB)':>10}")
+        for key, a in acc.items():
+            print(f"  {key:<16}{a['dtype']:>10}{a['rel_max_error']:>14.2e}{a['snr_db']:>10.1f}")
+
+    return {'pipeline': name, 'n': N,
+            'memory': {p: runs[p].stages for p in runs},
+            'peak_bytes': {p: runs[p].peak_bytes for p in runs},
+            'accuracy': acc}
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Compare float32 and float64 runs of the simulation pipelines.')
+    parser.add_argument('-p', '--pipeline', action='append', choices=list(PIPELINES),
+                        help='Pipeline to run (repeatable, default all)')
+    parser.add_argument('-n', '--size', type=float, default=2**20, help='Samples per signal')
+    parser.add_argument('--json', metavar='PATH', help='Also save the report as JSON')
+    args = parser.parse_args()
+
+    report = [run_pipeline(name, int(args.size)) for name in (args.pipeline or PIPELINES)]
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"\nSaved to {args.json}")
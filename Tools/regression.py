@@ -0,0 +1,410 @@
+# Golden-Metric Regression Harness
+# Runs every simulation script in compute-only mode and checks the numbers
+# it produces against stored golden values:
+#
+#   python -m Tools.regression                 # check all (exit status 1 on any mismatch)
+#   python -m Tools.regression -k PCM -v       # only matching scripts, every metric listed
+#   python -m Tools.regression --update        # re-record the goldens after an intended change
+#
+# Compute-only mode runs the script itself (runpy, in this process, from its
+# own folder) with the Agg backend and savefig / show / tight_layout turned
+# into no-ops, so the plot calls only build artists and nothing is rendered
+# or written. Scripts that keep their work in functions are run as a module
+# and the functions listed under 'entry' are called instead of the
+# __main__ block; each returns a dict of named results.
+#
+# A metric is read from the script's globals (plus the entry results) by
+# name or by a function of them, optionally strided for long arrays. It
+# passes if max |value - golden| <= atol + rtol * max |golden|, i.e. errors
+# are measured against the largest golden value of the metric, so spectra
+# and waveforms with near-zero samples do not need per-sample tolerances.
+# Goldens live in Tools/golden_metrics.json.
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import runpy
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+GOLDEN_PATH = os.path.join(REPO_ROOT, 'Tools', 'golden_metrics.json')
+
+
+def metric(source, rtol=1e-6, atol=0.0, stride=1):
+    """
+    source: global name, or function(ns) -> scalar / array. stride keeps
+    every stride-th element of a 1-D array (smaller golden file).
+    """
+    return {'source': source, 'rtol': rtol, 'atol': atol, 'stride': stride}
+
+
+def _peak(freqs, spectrum):
+    # (frequency, value) of the largest spectrum bin
+    spectrum = np.asarray(spectrum)
+    i = int(np.argmax(spectrum))
+    return [float(np.asarray(freqs)[i]), float(spectrum[i])]
+
+
+def _lines(freqs, spectrum, n=3):
+    # [[frequency, value], ...] of the n largest non-negative-frequency bins,
+    # in frequency order (carrier and sidebands)
+    freqs, spectrum = np.asarray(freqs), np.asarray(spectrum)
+    keep = np.flatnonzero(freqs >= 0)
+    top = np.sort(keep[np.argsort(spectrum[keep])[-n:]])
+    return [[float(freqs[i]), float(spectrum[i])] for i in top]
+
+
+def _envelope(x):
+    # |analytic signal|, i.e. an ideal envelope detector
+    from DSP.analog import analytic_signal
+    return np.abs(analytic_signal(x))
+
+
+def _coherent(x, t, fc, cutoff):
+    # Product detector output scaled back to m(t) (DSB-SC gives Ac*m/2)
+    from DSP.analog import coherent_demodulate
+    return 2 * coherent_demodulate(x, t, fc, 1 / (t[1] - t[0]), cutoff)
+
+
+def _nrmse(x, ref):
+    return float(np.sqrt(np.mean((np.asarray(x) - ref)**2) / np.mean(np.asarray(ref)**2)))
+
+
+# --- Metrics per simulation ---------------------------------------------------
+
+SIMULATIONS = {
+    'Sampling/PCM.py': {'metrics': {
+        'snr3_real': metric('snr3_real'),
+        'snr8_real': metric('snr8_real'),
+        'snr8_theo': metric('snr8_theo'),
+        'delta3': metric('delta3'),
+        'x_q3': metric('x_q3'),
+        'codes3': metric(lambda ns: [int(c, 2) for c in ns['sample_codes']], rtol=0),
+        'packed3': metric('packed3', rtol=0),
+        'line_waves': metric(lambda ns: np.concatenate([ns['line_waves'][k] for k in sorted(ns['line_waves'])]),
+                             rtol=0, stride=4),
+        # Monte Carlo BER of 2e5 bits: a few standard deviations, not the seed's exact draw
+        'line_ber': metric(lambda ns: [ns['ber_stats'][k]['ber'] for k in sorted(ns['ber_stats'])],
+                           rtol=0, atol=2e-3),
+        'coder_snr_db': metric(lambda ns: [r['snr_db'] for r in ns['coder_rows']], atol=1e-6),
+        'dpcm3_y': metric(lambda ns: next(r['y'] for r in ns['coder_rows']
+                                          if r['coder'] == 'DPCM' and r['bits_per_sample'] == 3), stride=10),
+        'low_spur_db': metric(lambda ns: [ns['low_spur_db'][k] for k in sorted(ns['low_spur_db'])], atol=1e-6),
+        'shaped_snr_db': metric('shaped_snr_db', atol=1e-6),
+        'sdm_snr_db': metric(lambda ns: [r['snr_db'] for r in ns['sdm_rows']], atol=1e-6),
+        'sdm2_decimated': metric(lambda ns: ns['sdm_rows'][1]['decimated'], stride=10),
+        'sdm3_overload': metric(lambda ns: ns['overload_snr_db'] + [ns['overload'].quantizer.resets],
+                                atol=1e-6),
+    }},
+    'Sampling/TDM.py': {'metrics': {
+        'offsets': metric(lambda ns: [ns['pam_info']['offset'], ns['pcm_info']['offset']], rtol=0),
+        'sync_errors': metric(lambda ns: ns['pam_info']['sync_errors'], rtol=0),
+        'pam_rms_error': metric('pam_rms_error'),
+        'pcm_exact': metric(lambda ns: float(ns['pcm_exact'] and ns['pcm_zero_copy']), rtol=0),
+        'pam_out': metric('pam_out', stride=7),
+    }},
+    'Sampling/Pulse_Shaping.py': {'metrics': {
+        'eye_metrics': metric(lambda ns: [[m['eye_height'], m['eye_width'], m['isi_rms']]
+                                          for m in ns['eye_metrics'].values()], atol=1e-9),
+        'rc_035': metric(lambda ns: ns['pulses'][0.35], stride=8),
+        '|P(f)|': metric(lambda ns: ns['spectra'][0.35], stride=64, atol=1e-12),
+    }},
+    'Sampling/Natural_sampling.py': {'metrics': {
+        'pulse_duty': metric(lambda ns: np.mean(ns['pulse_train'])),
+        'demod_nrmse': metric(lambda ns: _nrmse(ns['x_demod_scaled'], ns['x_t'])),
+        'x_demod_scaled': metric('x_demod_scaled', stride=10),
+        '|Xs_f|': metric(lambda ns: np.abs(ns['Xs_f']), stride=10),
+    }},
+    'Sampling/Flat_Top_Sampling.py': {'metrics': {
+        'x_flat': metric('x_flat', stride=5),
+        'demod_nrmse': metric(lambda ns: _nrmse(ns['x_demod_scaled'], ns['x_t'])),
+        '|X_flat|': metric(lambda ns: np.abs(ns['X_flat_spectrum']), stride=10),
+        'x_rec_ws': metric('x_rec_ws', stride=10, atol=1e-9),
+        'rec_error_db': metric(lambda ns: [ns['rec_error_db'], ns['rec_ws_error_db']], rtol=1e-4),
+        # Down to the rounding floor (-300 dB) for long records: 1 dB, not digits
+        'long_record_errors': metric('long_record_errors', rtol=0, atol=1.0),
+    }},
+    'Modulation/PWM.py': {'metrics': {
+        'pwm_duty': metric(lambda ns: np.mean(ns['pwm_signal'])),
+        'demod_final': metric('demod_final', stride=25),
+    }},
+    'Modulation/PPM.py': {'metrics': {
+        'ppm_duty': metric(lambda ns: np.mean(ns['ppm_signal'])),
+        'pwm_conv_duty': metric(lambda ns: np.mean(ns['pwm_conv'])),
+        'demod_final': metric('demod_final', stride=25),
+    }},
+    'Modulation/FM_Instantaneous_vs_Spectral.py': {'metrics': {
+        'f_err_hz': metric('f_err', rtol=0, atol=1e-6),
+        'line_amps': metric('line_amps'),
+        'f_meas': metric(lambda ns: ns['f_meas'][256:-256], stride=500),
+        'spectrum_peak': metric(lambda ns: _peak(ns['freqs'], ns['spectrum'])),
+    }},
+    'Modulation/AM_Modulation/AM_Modulation.py': {'metrics': {
+        'modulated_signal': metric('modulated_signal', stride=5),
+        'envelope': metric(lambda ns: _envelope(ns['modulated_signal']), stride=10, atol=1e-9),
+        'envelope_nrmse': metric(lambda ns: _nrmse(_envelope(ns['modulated_signal']),
+                                                   1 + 0.5 * ns['modulating_signal']), rtol=0, atol=1e-9),
+        'spectrum_lines': metric(lambda ns: _lines(ns['f'], np.abs(ns['modulated_signal_fft'])), atol=1e-9),
+    }},
+    'Modulation/AM_Modulation/DSB_SC_Modulation.py': {'metrics': {
+        'dsb_sc_modulated_signal': metric('dsb_sc_modulated_signal', stride=5),
+        'demodulated': metric(lambda ns: _coherent(ns['dsb_sc_modulated_signal'], ns['t'], 100, 30),
+                              stride=10, atol=1e-9),
+        'demod_nrmse': metric(lambda ns: _nrmse(_coherent(ns['dsb_sc_modulated_signal'], ns['t'], 100, 30),
+                                                ns['modulating_signal']), atol=1e-9),
+        'spectrum_lines': metric(lambda ns: _lines(ns['f'], np.abs(ns['dsb_sc_modulated_signal_fft']), n=2),
+                                 atol=1e-9),
+    }},
+    'Modulation/AM_Modulation/SSB_Modulation.py': {'metrics': {
+        'm_hat_t': metric('m_hat_t', stride=5),
+        'ussb_peak': metric(lambda ns: _peak(ns['freqs'], ns['spec_ussb'])),
+        'lssb_peak': metric(lambda ns: _peak(ns['freqs'], ns['spec_lssb'])),
+        'dsb_peak': metric(lambda ns: _peak(ns['freqs'], ns['spec_dsb'])),
+    }},
+    'Modulation/AM_Modulation/SSB_Analysis.py': {'metrics': {
+        'm_hat_filt': metric('m_hat_filt', stride=25),
+        'weaver_peak': metric(lambda ns: _peak(ns['freqs'], ns['spec_weaver'])),
+    }},
+    'Modulation/AM_Modulation/Square_Law_Modulation.py': {'metrics': {
+        'v_out': metric('v_out', stride=10),
+        'spectrum_mag': metric('spectrum_mag', stride=5),
+    }},
+    'Modulation/AM_Modulation/VSB_Mixing_Analysis.py': {'metrics': {
+        'mixer_peak': metric(lambda ns: _peak(ns['freqs'], ns['spec'])),
+        'mixer_spectrum': metric('spec', stride=10),
+    }},
+    'Modulation/FM_Modulation/1_NBFM_vs_AM.py': {'metrics': {
+        'am_signal': metric('am_signal', stride=8),
+        'nbfm_signal': metric('nbfm_signal', stride=8),
+    }},
+    'Modulation/FM_Modulation/2_WBFM_Spectrum.py': {
+        'entry': ['generate_wbfm_plots'],
+        'metrics': {
+            f'lines_beta_{beta:g}': metric(lambda ns, beta=beta: ns['line_magnitudes'][beta])
+            for beta in (0.5, 2, 5, 10)
+        },
+    },
+    'Modulation/FM_Modulation/3_FM_Generation.py': {
+        'entry': ['generate_fm_methods', 'generate_armstrong_chain'],
+        'metrics': {
+            's_direct': metric('s_direct', stride=4),
+            'S_mult_f': metric('S_mult_f', stride=4),
+            'chain_fc': metric(lambda ns: [e['fc'] for e in ns['chain_log']]),
+            'chain_fs': metric(lambda ns: [e['fs'] for e in ns['chain_log']], rtol=0),
+            'chain_df_measured': metric(lambda ns: [ns['measure_deviation'](e['z'], e['fs'])
+                                                    for e in ns['chain_log']]),
+        },
+    },
+    'labs/AM_Modulation/LSSB_Simulation.py': {'metrics': {
+        'peak_freq_khz': metric('peak_freq'),
+        'peak_amp': metric('peak_amp'),
+        'spectrum': metric('spectrum', stride=10),
+    }},
+    'labs/AM_Modulation/Lab1_Simulation.py': {'metrics': {
+        name: metric(lambda ns, name=name: _peak(ns['f'], ns[name]))
+        for name in ('X1', 'X2', 'X3', 'Y1', 'Y2', 'Y3')
+    }},
+    'labs/AM_Modulation/Lab2_AM_Demod.py': {'metrics': {
+        'demod_nrmse': metric(lambda ns: _nrmse(ns['demodulated_scaled'], ns['m_t_mod'])),
+        'demodulated_scaled': metric('demodulated_scaled', stride=10),
+    }},
+    'labs/FM_Modulation/plot_frequency_deviation.py': {'metrics': {
+        'slope': metric('slope'),
+        'intercept': metric('intercept'),
+        'r_squared': metric(lambda ns: ns['r_value']**2),
+    }},
+    'AM_Problem_Solver/solve_am.py': {'metrics': {
+        'modulation_pct': metric('mu'),
+        'carrier_amp': metric('carrier_amp'),
+        'sideband_amps': metric(lambda ns: [ns['lsb_amp'], ns['usb_amp']]),
+        'zoom_magnitude': metric('magnitude', stride=10),
+    }},
+}
+
+
+# --- Running ------------------------------------------------------------------
+
+@contextlib.contextmanager
+def compute_only(script_dir):
+    """
+    Agg backend, no rendering or file output from matplotlib, stdout
+    captured, cwd and sys.argv set as for `python <script>`.
+    """
+    import matplotlib
+    matplotlib.use('Agg', force=True)
+    import matplotlib.pyplot as plt
+    from matplotlib.figure import Figure
+
+    def noop(*args, **kwargs):
+        return None
+
+    patched = [(plt, 'savefig'), (plt, 'show'), (plt, 'tight_layout'),
+               (Figure, 'savefig'), (Figure, 'tight_layout')]
+    saved = [(obj, name, getattr(obj, name)) for obj, name in patched]
+    old_cwd, old_argv = os.getcwd(), sys.argv
+    log = io.StringIO()
+    try:
+        for obj, name in patched:
+            setattr(obj, name, noop)
+        os.chdir(script_dir)
+        with contextlib.redirect_stdout(log):
+            yield log
+    finally:
+        for obj, name, fn in saved:
+            setattr(obj, name, fn)
+        os.chdir(old_cwd)
+        sys.argv = old_argv
+        plt.close('all')
+
+
+def run_simulation(rel_path, spec, root=REPO_ROOT):
+    """
+    Runs one script in compute-only mode. Returns (namespace, stdout): the
+    script's globals updated with the results of its entry functions.
+    """
+    path = os.path.join(root, rel_path)
+    if root not in sys.path:
+        sys.path.insert(0, root)
+    entry = spec.get('entry')
+    with compute_only(os.path.dirname(path)) as log:
+        sys.argv = [path]
+        ns = runpy.run_path(path, run_name='__regression__' if entry else '__main__')
+        for name in entry or []:
+            ns.update(ns[name]())
+    return ns, log.getvalue()
+
+
+def extract_metrics(ns, metrics):
+    """
+    {name: float or list} for every metric, ready for JSON.
+    """
+    values = {}
+    for name, m in metrics.items():
+        src = m['source']
+        value = np.asarray(src(ns) if callable(src) else ns[src], dtype=float)
+        if value.ndim == 1 and m['stride'] > 1:
+            value = value[::m['stride']]
+        values[name] = value.tolist()
+    return values
+
+
+def compare(value, golden, rtol, atol):
+    """
+    (ok, max abs error, error relative to max |golden|).
+    """
+    v = np.asarray(value, dtype=float)
+    g = np.asarray(golden, dtype=float)
+    if v.shape != g.shape:
+        return False, float('inf'), float('inf')
+    if v.size == 0:
+        return True, 0.0, 0.0
+    nan_mismatch = np.any(np.isnan(v) != np.isnan(g))
+    diff = np.abs(np.where(np.isnan(g), 0.0, v - g))
+    err = float('inf') if nan_mismatch else float(np.nanmax(diff))
+    scale = float(np.nanmax(np.abs(g))) if np.any(~np.isnan(g)) else 0.0
+    rel = err / scale if scale > 0 else err
+    return err <= atol + rtol * scale, err, rel
+
+
+def load_golden(path=GOLDEN_PATH):
+    if not os.path.exists(path):
+        return {'meta': {}, 'metrics': {}}
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def save_golden(golden, path=GOLDEN_PATH):
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=REPO_ROOT,
+                                capture_output=True, text=True).stdout.strip()
+    except OSError:
+        commit = ''
+    golden['meta'] = {'commit': commit, 'numpy': np.__version__,
+                      'python': sys.version.split()[0]}
+    # One line per metric, so a re-recorded golden file diffs per metric
+    scripts = sorted(golden['metrics'])
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write('{\n "meta": ' + json.dumps(golden['meta'], sort_keys=True) + ',\n "metrics": {\n')
+        for i, script in enumerate(scripts):
+            values = golden['metrics'][script]
+            f.write(f'  {json.dumps(script)}: {{\n')
+            f.write(',\n'.join(f'   {json.dumps(name)}: {json.dumps(values[name])}'
+                               for name in sorted(values)))
+            f.write('\n  }' + (',' if i < len(scripts) - 1 else '') + '\n')
+        f.write(' }\n}\n')
+
+
+def run_regression(patterns=None, update=False, golden_path=GOLDEN_PATH, verbose=False):
+    """
+    Checks (or, with update, re-records) the metrics of every matching
+    simulation. Returns the list of failures (empty = pass).
+    """
+    golden = load_golden(golden_path)
+    failures = []
+    t_start = time.perf_counter()
+    for rel, spec in SIMULATIONS.items():
+        if patterns and not any(p in rel for p in patterns):
+            continue
+        t0 = time.perf_counter()
+        try:
+            ns, log = run_simulation(rel, spec)
+            values = extract_metrics(ns, spec['metrics'])
+        except Exception as exc:
+            failures.append({'script': rel, 'metric': None, 'problem': f'{type(exc).__name__}: {exc}'})
+            print(f"[ERR ] {rel:<52} {type(exc).__name__}: {exc}")
+            continue
+        seconds = time.perf_counter() - t0
+
+        if update:
+            golden['metrics'][rel] = values
+            print(f"[rec ] {rel:<52}{seconds:>6.2f} s  {len(values)} metric(s)")
+            continue
+
+        stored = golden['metrics'].get(rel, {})
+        rows, bad = [], 0
+        for name, m in spec['metrics'].items():
+            if name not in stored:
+                ok, err, rel_err, note = False, float('nan'), float('nan'), 'no golden value'
+            else:
+                ok, err, rel_err = compare(values[name], stored[name], m['rtol'], m['atol'])
+                note = '' if ok else f"> atol {m['atol']:g} + rtol {m['rtol']:g} * max|golden|"
+            rows.append((name, ok, err, rel_err, note))
+            if not ok:
+                bad += 1
+                failures.append({'script': rel, 'metric': name, 'problem': note or 'mismatch',
+                                 'abs_error': err, 'rel_error': rel_err})
+        worst = max((r[3] for r in rows if r[3] == r[3]), default=0.0)
+        status = 'ok ' if not bad else 'FAIL'
+        print(f"[{status}] {rel:<52}{seconds:>6.2f} s  {len(rows) - bad}/{len(rows)} metrics"
+              f"  worst rel. error {worst:.1e}")
+        for name, ok, err, rel_err, note in rows:
+            if verbose or not ok:
+                print(f"         {'ok  ' if ok else 'FAIL'} {name:<22} abs {err:.3e}  rel {rel_err:.3e}  {note}")
+        if bad and verbose:
+            print('         script output:\n' + ''.join(f'           {l}\n' for l in log.splitlines()))
+
+    if update:
+        save_golden(golden, golden_path)
+        print(f"\nGolden values saved to {os.path.relpath(golden_path, REPO_ROOT)}")
+    else:
+        print(f"\n{len(failures)} failure(s) in {time.perf_counter() - t_start:.1f} s")
+    return failures
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Check simulation results against golden metrics.')
+    parser.add_argument('-k', dest='patterns', action='append', help='Only scripts whose path contains this')
+    parser.add_argument('--update', action='store_true', help='Re-record the golden values')
+    parser.add_argument('--golden', default=GOLDEN_PATH, help='Golden file (default Tools/golden_metrics.json)')
+    parser.add_argument('-v', '--verbose', action='store_true', help='List every metric')
+    args = parser.parse_args()
+
+    failures = run_regression(args.patterns, update=args.update, golden_path=args.golden,
+                              verbose=args.verbose)
+    sys.exit(1 if failures else 0)
@@ -0,0 +1,243 @@
+# Headless Parallel Runner
+# Regenerates every simulation output with one command:
+#
+#   python -m Tools.run_all                  # all scripts -> Output_Plots/
+#   python -m Tools.run_all out/ -j 8        # chosen output dir / pool size
+#   python -m Tools.run_all -k PCM -k SSB    # only scripts matching a pattern
+#   python -m Tools.run_all --profile        # + per-stage profile of every script
+#
+# Each script runs in its own fresh worker process (process pool with one
+# task per child) from its own folder, so its relative paths and imports
+# work as they do interactively. Matplotlib is forced to the Agg backend
+# and every savefig() is redirected to the output directory (keeping the
+# file name). plt.show() saves the open figures that were not saved yet as
+# <script>_<n>.png in the output directory, then closes them, as closing
+# the windows would. Wall time per script is reported.
+#
+# A script is run when it imports matplotlib, calls plt.show() or saves a
+# figure. The others (numbers-only helpers) are listed as skipped.
+#
+# With --profile, DSP.profiling is enabled in each worker and savefig() is
+# timed as its own stage. The stage table of every script is written to
+# <output>/profiles/<script>.txt and its Chrome trace to
+# <output>/profiles/<script>.trace.json. Time not covered by a top-level
+# stage (plot calls, script code) is reported as '(other)'.
+
+import argparse
+import contextlib
+import io
+import itertools
+import multiprocessing
+import os
+import runpy
+import sys
+import time
+import weakref
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SIMULATION_DIRS = ['Sampling', 'Modulation', 'labs', 'AM_Problem_Solver']
+
+
+PLOT_MARKERS = ('matplotlib', 'plt.show', 'savefig')
+
+
+def discover_simulations(root=REPO_ROOT, patterns=None, skipped=None):
+    """
+    All scripts under SIMULATION_DIRS that plot (see PLOT_MARKERS), as
+    paths relative to root. `patterns` keeps only paths containing one of
+    them. Matching scripts that do not plot are appended to `skipped`.
+    """
+    scripts = []
+    for top in SIMULATION_DIRS:
+        for dirpath, dirnames, filenames in os.walk(os.path.join(root, top)):
+            dirnames.sort()
+            for name in sorted(filenames):
+                if not name.endswith('.py'):
+                    continue
+                path = os.path.join(dirpath, name)
+                rel = os.path.relpath(path, root)
+                if patterns and not any(p in rel for p in patterns):
+                    continue
+                with open(path, encoding='utf-8') as f:
+                    source = f.read()
+                if not any(m in source for m in PLOT_MARKERS):
+                    if skipped is not None:
+                        skipped.append(rel)
+                    continue
+                scripts.append(rel)
+    return scripts
+
+
+def _top_level_time(evts):
+    # Total time of the stages not nested inside another stage
+    total, end = 0, 0
+    for _, start, duration, _, _ in sorted(evts, key=lambda e: (e[1], -e[2])):
+        if start >= end:
+            total += duration
+            end = start + duration
+    return total
+
+
+def run_script(rel_path, output_dir, root=REPO_ROOT, profile=False):
+    """
+    Runs one simulation script headless (called inside a worker process).
+    Returns a result dict: script, status, seconds, figures, log (and
+    profile, the stage summary rows, when profile is True).
+    """
+    os.environ['MPLBACKEND'] = 'Agg'
+    import matplotlib
+    matplotlib.use('Agg', force=True)
+    import matplotlib.pyplot as plt
+    from matplotlib.figure import Figure
+
+    sys.path.insert(0, root)
+    from DSP import profiling
+    profiling.enable(profile)
+    profiling.reset()
+
+    figures = []
+    saved = weakref.WeakSet()
+    shown = itertools.count(1)
+    original_savefig = Figure.savefig
+    stem = os.path.splitext(os.path.basename(rel_path))[0]
+
+    def savefig(self, fname, *args, **kwargs):
+        if isinstance(fname, (str, os.PathLike)):
+            fname = os.path.join(output_dir, os.path.basename(os.fspath(fname)))
+            figures.append(os.path.basename(fname))
+        saved.add(self)
+        with profiling.stage('savefig'):
+            return original_savefig(self, fname, *args, **kwargs)
+
+    def show(*args, **kwargs):
+        # Keep what the window would have shown, then close it
+        for num in plt.get_fignums():
+            fig = plt.figure(num)
+            if fig not in saved:
+                fig.savefig(f'{stem}_{next(shown)}.png')
+        plt.close('all')
+
+    Figure.savefig = savefig
+    plt.show = show
+
+    path = os.path.join(root, rel_path)
+    script_dir = os.path.dirname(path)
+    os.chdir(script_dir)
+    sys.path.insert(0, script_dir)
+    sys.argv = [path]
+
+    log = io.StringIO()
+    status = 'ok'
+    t0 = time.perf_counter()
+    with contextlib.redirect_stdout(log), contextlib.redirect_stderr(log):
+        try:
+            runpy.run_path(path, run_name='__main__')
+        except SystemExit as e:
+            if e.code not in (None, 0):
+                status = f'exit {e.code}'
+        except Exception as e:
+            status = f'{type(e).__name__}: {e}'
+        finally:
+            plt.close('all')
+    elapsed = time.perf_counter() - t0
+
+    result = {'script': rel_path, 'status': status, 'seconds': elapsed,
+              'figures': figures, 'log': log.getvalue()}
+    if profile:
+        evts = profiling.events()
+        other = elapsed - _top_level_time(evts) / 1e9
+        base = os.path.join(output_dir, 'profiles', rel_path.replace(os.sep, '__').replace('.py', ''))
+        with open(base + '.txt', 'w', encoding='utf-8') as f:
+            profiling.print_summary(evts, file=f)
+            print(f"{'(other)':<34}{'':>7}{other * 1e3:>12.2f}", file=f)
+        profiling.write_chrome_trace(base + '.trace.json', evts)
+        result['profile'] = profiling.summary(evts) + [{'name': '(other)', 'total_s': other}]
+    return result
+
+
+def run_all(output_dir, jobs=None, patterns=None, root=REPO_ROOT, verbose=True, profile=False):
+    """
+    Runs every discovered simulation on a process pool and writes all
+    figures to output_dir (logs go to output_dir/logs, profiles to
+    output_dir/profiles). Returns the list of result dicts in completion
+    order.
+    """
+    output_dir = os.path.abspath(output_dir)
+    log_dir = os.path.join(output_dir, 'logs')
+    os.makedirs(log_dir, exist_ok=True)
+    if profile:
+        os.makedirs(os.path.join(output_dir, 'profiles'), exist_ok=True)
+    skipped = []
+    scripts = discover_simulations(root, patterns, skipped)
+    if verbose:
+        for rel in skipped:
+            print(f"[skip] {rel} (no plots)", flush=True)
+
+    # Fresh children are forked from a fork server that has already
+    # imported the heavy modules (spawn, with full imports, elsewhere)
+    os.environ['MPLBACKEND'] = 'Agg'
+    context = None
+    if 'forkserver' in multiprocessing.get_all_start_methods():
+        context = multiprocessing.get_context('forkserver')
+        context.set_forkserver_preload(['numpy', 'scipy.signal', 'matplotlib.pyplot'])
+
+    results = []
+    t0 = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=jobs, mp_context=context,
+                             max_tasks_per_child=1) as pool:
+        futures = [pool.submit(run_script, s, output_dir, root, profile) for s in scripts]
+        for future in as_completed(futures):
+            r = future.result()
+            results.append(r)
+            log_name = r['script'].replace(os.sep, '__').replace('.py', '.log')
+            with open(os.path.join(log_dir, log_name), 'w', encoding='utf-8') as f:
+                f.write(r['log'])
+            if verbose:
+                mark = 'ok ' if r['status'] == 'ok' else 'ERR'
+                print(f"[{mark}] {r['script']:<52}{r['seconds']:8.2f} s  "
+                      f"{len(r['figures'])} figure(s)", flush=True)
+                if 'profile' in r:
+                    top = sorted(r['profile'], key=lambda s: s['total_s'], reverse=True)[:3]
+                    print('      ' + ', '.join(f"{s['name']} {s['total_s']:.2f} s" for s in top))
+    wall = time.perf_counter() - t0
+
+    if verbose:
+        failed = [r for r in results if r['status'] != 'ok']
+        cpu = sum(r['seconds'] for r in results)
+        print(f"\n{len(results)} scripts, {len(failed)} failed: "
+              f"{wall:.2f} s wall ({cpu:.2f} s summed script time) -> {output_dir}")
+        for r in failed:
+            print(f"  {r['script']}: {r['status']}")
+
+        seen = {}
+        for r in results:
+            for fig in r['figures']:
+                seen.setdefault(fig, []).append(r['script'])
+        for fig, owners in seen.items():
+            if len(owners) > 1:
+                print(f"  warning: {fig} written by {', '.join(owners)}")
+    return results
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Regenerate every simulation output headless, in parallel.')
+    parser.add_argument('output_dir', nargs='?', default=os.path.join(REPO_ROOT, 'Output_Plots'),
+                        help='Directory for all figures (default: Output_Plots)')
+    parser.add_argument('-j', '--jobs', type=int, default=None, help='Worker processes (default: CPU count)')
+    parser.add_argument('-k', '--only', action='append', metavar='PATTERN',
+                        help='Only run scripts whose path contains PATTERN (repeatable)')
+    parser.add_argument('--list', action='store_true', help='List the discovered scripts and exit')
+    parser.add_argument('--profile', action='store_true',
+                        help='Profile the DSP stages and savefig() of every script')
+    args = parser.parse_args()
+
+    if args.list:
+        skipped = []
+        print('\n'.join(discover_simulations(patterns=args.only, skipped=skipped)))
+        for rel in skipped:
+            print(f"skipped (no plots): {rel}")
+        sys.exit(0)
+
+    results = run_all(args.output_dir, jobs=args.jobs, patterns=args.only, profile=args.profile)
+    sys.exit(1 if any(r['status'] != 'ok' for r in results) else 0)
@@ -0,0 +1,272 @@
+# Parameter Sweep Runner with an On-Disk Result Cache
+# Runs a simulation function over the Cartesian product of a parameter grid
+# on a process pool:
+#
+#   python -m Tools.sweep Sweeps/pcm_snr.toml                # run (or reuse) every point
+#   python -m Tools.sweep Sweeps/natural_sampling_sweep.py -j 4 --csv out.csv
+#   python -m Tools.sweep Sweeps/pcm_snr.toml --dry-run      # how many points are cached
+#   python -m Tools.sweep Sweeps/aliasing_map.py --npz map.npz   # results as grid-shaped arrays
+#
+# Config (TOML, or a Python file defining a SWEEP dict with the same keys):
+#   function = "Sweeps.simulations:pcm_snr"    # module:function (or a callable in .py)
+#   name     = "pcm_snr"                       # optional, cache sub-folder
+#   version  = "1"                             # optional, bump to invalidate by hand
+#   [fixed]  fm = 5                            # passed to every point
+#   [grid]   n_bits = [2, 4, 8]                # one list per swept parameter
+#
+# The function takes the parameters as keyword arguments and returns a dict
+# of scalars / arrays. Each point is saved as <cache_dir>/<name>/<key>.npz,
+# where key hashes the function, its parameters and the code version (the
+# source of the function's package and of the DSP package), so re-running a
+# sweep computes only the missing points and editing the code recomputes.
+
+import argparse
+import csv
+import hashlib
+import importlib
+import inspect
+import itertools
+import json
+import os
+import runpy
+import sys
+import time
+import tomllib
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_CACHE_DIR = os.path.join(REPO_ROOT, '.sweep_cache')
+
+
+def load_config(path):
+    """
+    Reads a sweep config (.toml, or .py defining SWEEP). Returns a dict with
+    function, grid, fixed, name and version filled in.
+    """
+    if path.endswith('.toml'):
+        with open(path, 'rb') as f:
+            config = tomllib.load(f)
+    elif path.endswith('.py'):
+        config = dict(runpy.run_path(path)['SWEEP'])
+    else:
+        raise ValueError(f'Unknown config type: {path} (use .toml or .py)')
+
+    if 'function' not in config or 'grid' not in config:
+        raise ValueError(f'{path}: a sweep needs "function" and "grid"')
+    fn = resolve_function(config['function'])
+    for key, values in config['grid'].items():
+        if not isinstance(values, (list, tuple)) or not values:
+            raise ValueError(f'{path}: grid "{key}" must be a non-empty list')
+
+    config.setdefault('fixed', {})
+    config.setdefault('name', os.path.splitext(os.path.basename(path))[0])
+    config.setdefault('version', '')
+    config['function'] = fn
+    return config
+
+
+def resolve_function(ref):
+    """
+    'package.module:function' -> the function (callables pass through).
+    """
+    if callable(ref):
+        return ref
+    module, _, name = ref.partition(':')
+    if not name:
+        raise ValueError(f'Function reference must look like module:function, got {ref!r}')
+    return getattr(importlib.import_module(module), name)
+
+
+def function_ref(fn):
+    return f'{fn.__module__}:{fn.__qualname__}'
+
+
+def grid_points(grid, fixed=None):
+    """
+    Cartesian product of the grid, in grid order (last key varies fastest),
+    each point merged over `fixed`.
+    """
+    keys = list(grid)
+    return [{**(fixed or {}), **dict(zip(keys, values))}
+            for values in itertools.product(*(grid[k] for k in keys))]
+
+
+def code_version(fn):
+    """
+    Hash of the function's module source, the modules next to it (helpers
+    such as Sweeps/noise_chains.py) and every DSP module, so any edit to
+    the simulation or the shared kernels invalidates the cache.
+    """
+    h = hashlib.sha256()
+    source = inspect.getsourcefile(fn)
+    here = os.path.dirname(source)
+    files = [source] + sorted(os.path.join(here, n) for n in os.listdir(here)
+                              if n.endswith('.py') and os.path.join(here, n) != source)
+    dsp_dir = os.path.join(REPO_ROOT, 'DSP')
+    files += sorted(os.path.join(dsp_dir, n) for n in os.listdir(dsp_dir) if n.endswith('.py'))
+    for path in files:
+        with open(path, 'rb') as f:
+            h.update(f.read())
+    return h.hexdigest()[:16]
+
+
+def point_key(fn_ref, params, version):
+    blob = json.dumps({'function': fn_ref, 'params': params, 'code': version},
+                      sort_keys=True, default=repr)
+    return hashlib.sha256(blob.encode()).hexdigest()[:20]
+
+
+def save_point(path, params, results):
+    """
+    Writes one result dict (plus its parameters) to an .npz atomically, so
+    an interrupted sweep never leaves a truncated cache entry.
+    """
+    tmp = path[:-len('.npz')] + f'.{os.getpid()}.tmp.npz'
+    arrays = {k: np.asarray(v) for k, v in results.items()}
+    np.savez(tmp, __params__=json.dumps(params, default=repr), **arrays)
+    os.replace(tmp, path)
+
+
+def load_point(path):
+    """
+    Returns (params, results) from a cached .npz; 0-d arrays become scalars.
+    """
+    with np.load(path, allow_pickle=False) as data:
+        params = json.loads(str(data['__params__']))
+        results = {k: (data[k].item() if data[k].ndim == 0 else data[k])
+                   for k in data.files if k != '__params__'}
+    return params, results
+
+
+def _run_point(job):
+    fn, params, path = job
+    t0 = time.perf_counter()
+    results = fn(**params)
+    if not isinstance(results, dict):
+        raise TypeError(f'{function_ref(fn)} must return a dict, got {type(results).__name__}')
+    save_point(path, params, results)
+    return path, time.perf_counter() - t0
+
+
+def run_sweep(config, cache_dir=DEFAULT_CACHE_DIR, workers=None, force=False,
+              dry_run=False, verbose=True):
+    """
+    Runs (or loads from cache) every point of a sweep config (a dict from
+    load_config, or a config path). Returns a list of (params, results) in
+    grid order.
+    """
+    if isinstance(config, str):
+        config = load_config(config)
+    fn = config['function']
+    ref = function_ref(fn)
+    version = f"{code_version(fn)}:{config['version']}"
+    out_dir = os.path.join(cache_dir, config['name'])
+    os.makedirs(out_dir, exist_ok=True)
+
+    points = grid_points(config['grid'], config['fixed'])
+    paths = [os.path.join(out_dir, point_key(ref, p, version) + '.npz') for p in points]
+    missing = [(p, path) for p, path in zip(points, paths) if force or not os.path.exists(path)]
+    if verbose:
+        print(f"Sweep '{config['name']}' ({ref}): {len(points)} points, "
+              f"{len(points) - len(missing)} cached, {len(missing)} to compute")
+    if dry_run:
+        return []
+
+    def report(i, path, seconds):
+        if verbose:
+            print(f"  [{i}/{len(missing)}] {os.path.basename(path)}  {seconds:.2f} s", flush=True)
+
+    t0 = time.perf_counter()
+    jobs = [(fn, p, path) for p, path in missing]
+    if workers == 1 or len(jobs) <= 1:
+        for i, job in enumerate(jobs, start=1):
+            report(i, *_run_point(job))
+    elif jobs:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(_run_point, job) for job in jobs]
+            for i, future in enumerate(as_completed(futures), start=1):
+                report(i, *future.result())
+    if verbose and missing:
+        print(f"Computed {len(missing)} point(s) in {time.perf_counter() - t0:.2f} s -> {out_dir}")
+
+    return [load_point(path) for path in paths]
+
+
+def print_table(rows, config, max_rows=200):
+    """
+    Prints the swept parameters and every scalar result, one row per point.
+    """
+    swept = list(config['grid'])
+    outputs = [k for k, v in rows[0][1].items() if np.isscalar(v)] if rows else []
+    print(''.join(f'{k:>14}' for k in swept + outputs))
+    for params, results in rows[:max_rows]:
+        cells = [params[k] for k in swept] + [results[k] for k in outputs]
+        print(''.join(f'{c:>14.6g}' if isinstance(c, (int, float)) and not isinstance(c, bool)
+                      else f'{str(c):>14}'
+                      for c in cells))
+    if len(rows) > max_rows:
+        print(f'... {len(rows) - max_rows} more rows')
+
+
+def write_csv(rows, path):
+    """
+    One CSV row per point: every parameter and every scalar result.
+    """
+    if not rows:
+        return
+    params0, results0 = rows[0]
+    fields = list(params0) + [k for k, v in results0.items() if np.isscalar(v)]
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.DictWriter(f, fieldnames=fields, extrasaction='ignore')
+        writer.writeheader()
+        for params, results in rows:
+            writer.writerow({**params, **results})
+    print(f"Saved to {path}")
+
+
+def write_npz(rows, config, path):
+    """
+    Every result stacked into one array of shape grid shape + result shape
+    (a result identical at every point is stored once), plus the grid axes
+    as grid_<name>.
+    """
+    if not rows:
+        return
+    grid = config['grid']
+    shape = tuple(len(v) for v in grid.values())
+    arrays = {f'grid_{k}': np.asarray(v) for k, v in grid.items()}
+    for key in rows[0][1]:
+        values = [np.asarray(results[key]) for _, results in rows]
+        if all(v.shape == values[0].shape and np.array_equal(v, values[0], equal_nan=v.dtype.kind == 'f')
+               for v in values[1:]):
+            arrays[key] = values[0]
+        elif all(v.shape == values[0].shape for v in values):
+            arrays[key] = np.stack(values).reshape(shape + values[0].shape)
+    np.savez(path, **arrays)
+    print(f"Saved to {path}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Run a parameter sweep with cached results.')
+    parser.add_argument('config', help='Sweep config (.toml, or .py defining SWEEP)')
+    parser.add_argument('-j', '--jobs', type=int, default=None, help='Worker processes (default: CPU count)')
+    parser.add_argument('--cache-dir', default=DEFAULT_CACHE_DIR, help='Result cache (default: .sweep_cache)')
+    parser.add_argument('--force', action='store_true', help='Recompute even cached points')
+    parser.add_argument('--dry-run', action='store_true', help='Only report cached / missing points')
+    parser.add_argument('--csv', metavar='PATH', help='Also write the scalar results as CSV')
+    parser.add_argument('--npz', metavar='PATH', help='Also write every result as a grid-shaped array')
+    args = parser.parse_args()
+
+    sys.path.insert(0, REPO_ROOT)
+    config = load_config(args.config)
+    rows = run_sweep(config, cache_dir=args.cache_dir, workers=args.jobs,
+                     force=args.force, dry_run=args.dry_run)
+    if rows:
+        print()
+        print_table(rows, config)
+    if args.csv:
+        write_csv(rows, args.csv)
+    if args.npz:
+        write_npz(rows, config, args.npz)
@@ -1,6 +1,11 @@
 import numpy as np
 import matplotlib.pyplot as plt
 import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..'))
+from DSP.plotting import plot_decimated
+from DSP.spectrum import zoom_spectrum
 
 # Parameters
 fc = 1000000    # Carrier 1 MHz
@@ -24,23 +29,22 @@ m_hat_t = np.sin(wm * t) - 4 * np.cos(wm * t)
 # s(t) = (Ac/2) * [ m(t)cos(wc t) + m_hat(t)sin(wc t) ]
 s_lssb = (Ac / 2) * (m_t * np.cos(wc * t) + m_hat_t * np.sin(wc * t))
 
-# FFT
-N = len(s_lssb)
-freqs = np.fft.rfftfreq(N, d=1/fs)
-spectrum = np.abs(np.fft.rfft(s_lssb)) / N * 2 # Scale for single-sided amplitude
+# Zoom spectrum: only 980 kHz - 1020 kHz, on a 10 Hz grid
+# (the full rFFT of this 2 ms record only has 500 Hz bins)
+freqs, spectrum = zoom_spectrum(s_lssb, fs, 980e3, 1020e3, 4001)
+spectrum = np.abs(spectrum) * 2 # Scale for single-sided amplitude
 
 # Plotting
 plt.figure(figsize=(10, 6))
 
 # Plot full spectrum centered around 1 MHz
-plt.plot(freqs / 1000, spectrum, 'b')
+plot_decimated(freqs / 1000, spectrum, 'b', xlim=(980, 1020))  # Show 980 kHz to 1020 kHz
 plt.title('Magnitude Spectrum of LSSB Signal')
 plt.xlabel('Frequency (kHz)')
 plt.ylabel('Amplitude (V)')
 plt.grid(True)
 
 # Zoom in around carrier
-plt.xlim(980, 1020) # Show 980 kHz to 1020 kHz
 plt.axvline(1000, color='k', linestyle='--', alpha=0.3, label='Carrier (1 MHz)')
 
 # Annotate Peak
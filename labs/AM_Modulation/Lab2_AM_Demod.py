@@ -1,7 +1,12 @@
 # Lab 2: AM Synchronous Demodulation Simulation
+import os
+import sys
 import numpy as np
 import matplotlib.pyplot as plt
-from scipy.signal import butter, filtfilt
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..'))
+from DSP.analog import am_modulate
+from DSP.filters import butter_lowpass_filter
 
 # Parameters
 fm = 1000       
@@ -23,20 +28,13 @@ Am_mod = mu * Ac
 m_t_mod = Am_mod * np.cos(2 * np.pi * fm * t)
 
 # AM Signal
-s_t = (Ac + m_t_mod) * np.cos(2 * np.pi * fc * t)
+s_t = am_modulate(m_t_mod, t, fc, Ac, ka=1/Ac)
 
 # 3. Synchronous Demodulation
 local_carrier = np.cos(2 * np.pi * fc * t)
 v_t = s_t * local_carrier
 
 # Step B: Low Pass Filter (Specifics: 5kHz cutoff, 2nd order)
-def butter_lowpass_filter(data, cutoff, fs, order=5):
-    nyq = 0.5 * fs
-    normal_cutoff = cutoff / nyq
-    b, a = butter(order, normal_cutoff, btype='low', analog=False)
-    y = filtfilt(b, a, data)
-    return y
-
 # Cutoff = 5 kHz, Order = 2
 demodulated_raw = butter_lowpass_filter(v_t, 5000, fs, order=2)
 
@@ -1,10 +1,24 @@
+import argparse
 import matplotlib.pyplot as plt
 import numpy as np
 from scipy.stats import linregress
 
-# Data
-vdc = np.array([-3, -2.5, -2, -1.5, -1, -0.5, 0, 0.5, 1, 1.5, 2, 2.5, 3])
-frequency_mhz = np.array([0.9718, 0.9765, 0.9812, 0.9859, 0.9906, 0.9953, 1.0000, 1.0046, 1.0097, 1.0144, 1.0191, 1.0238, 1.0285])
+parser = argparse.ArgumentParser(description='Fit the VCO frequency vs control voltage line.')
+parser.add_argument('--captures', help='Estimate frequencies from a directory of raw captures '
+                                       '(see estimate_vco_frequencies.py) instead of the counter readings')
+parser.add_argument('--fs', type=float, default=10e6, help='Capture sample rate (Hz)')
+parser.add_argument('--no-zoom', action='store_true', help='Skip the zoom-spectrum refinement')
+args = parser.parse_args()
+
+if args.captures:
+    from estimate_vco_frequencies import estimate_directory
+    results = estimate_directory(args.captures, args.fs, zoom=not args.no_zoom)
+    vdc = np.array([r['vdc'] for r in results])
+    frequency_mhz = np.array([r['f_hz'] for r in results]) / 1e6
+else:
+    # Data (frequency counter readings)
+    vdc = np.array([-3, -2.5, -2, -1.5, -1, -0.5, 0, 0.5, 1, 1.5, 2, 2.5, 3])
+    frequency_mhz = np.array([0.9718, 0.9765, 0.9812, 0.9859, 0.9906, 0.9953, 1.0000, 1.0046, 1.0097, 1.0144, 1.0191, 1.0238, 1.0285])
 
 # Linear regression
 slope, intercept, r_value, p_value, std_err = linregress(vdc, frequency_mhz)